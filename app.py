@@ -5,6 +5,7 @@ Complete version with Clear All Files functionality - FIXED VERSION
 
 import streamlit as st
 import sys
+import pandas as pd
 import time
 import shutil
 from pathlib import Path
@@ -21,7 +22,8 @@ except ImportError:
     APP_CONFIG = {
         'title': 'Ekstraksi Dokumen Imigrasi',
         'version': '2.0.0',
-        'description': 'Aplikasi berbasis Streamlit untuk mengekstrak data dari dokumen PDF imigrasi'
+        'description': 'Aplikasi berbasis Streamlit untuk mengekstrak data dari dokumen PDF imigrasi',
+        'max_file_size': 500 * 1024 * 1024,
     }
     PAGE_CONFIG = {
         'page_title': 'Ekstraksi Dokumen Imigrasi',
@@ -44,6 +46,7 @@ try:
     from database.models import DatabaseManager
     from auth.auth_manager import AuthManager
     from components.dashboard import Dashboard
+    from blob_store import BlobStore, BLOB_STORE_CONFIG
     DATABASE_ENABLED = True
 except ImportError as e:
     st.warning(f"⚠️ Database components not found: {e}")
@@ -53,8 +56,13 @@ except ImportError as e:
 FILE_HANDLER_ENABLED = False
 try:
     from file_handler import (
-        process_pdfs, process_pdfs_batch, validate_pdf_file, 
-        get_file_info, cleanup_temp_directory
+        process_pdfs, process_pdfs_batch, iter_pdfs, process_pdfs_chunked, plan_batch, BackgroundParser,
+        append_batch_outputs, validate_pdf_file, 
+        get_file_info, cleanup_temp_directory, parse_documents,
+        set_extraction_cache, set_template_log, set_retry_log, set_checkpoint_store, set_blob_store,
+        get_checkpoint_progress,
+        get_extraction_status, get_latency_stats, row_data, ABORT_STATUSES, ROUTING_FIELDS, DUPLICATE_FIELD,
+        PROCESSING_CONFIG
     )
     FILE_HANDLER_ENABLED = True
     st.success("✅ File handler loaded successfully!")
@@ -78,6 +86,12 @@ def initialize_app():
     if 'show_results' not in st.session_state:
         st.session_state.show_results = False
     
+    # Initialize session state for documents kept across reruns and their background parsing
+    if 'parsed_documents' not in st.session_state:
+        st.session_state.parsed_documents = {}
+    if 'background_parser' not in st.session_state:
+        st.session_state.background_parser = None
+    
     # Custom CSS
     st.markdown("""
     <style>
@@ -181,10 +195,47 @@ def initialize_app():
 def clear_uploaded_files():
     """Clear all uploaded files by incrementing the file uploader key"""
     st.session_state.file_uploader_key += 1
+    stop_background_parsing()
+    st.session_state.parsed_documents = {}
+    results = st.session_state.extraction_results
+    if results and results.get('temp_dir'):
+        # Chunked results are served from disk until they are cleared
+        cleanup_temp_directory(results['temp_dir'])
     st.session_state.extraction_results = None
     st.session_state.show_results = False
     # Removed st.rerun() to prevent auto-refresh
 
+def get_upload_key(uploaded_file):
+    """Identity of one upload across reruns (two uploads may still have the same content)"""
+    return getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+
+def get_session_documents(uploaded_files):
+    """ParsedDocuments for the current uploads, kept across reruns so each file is spooled once"""
+    previous = st.session_state.parsed_documents
+    keys = [get_upload_key(f) for f in uploaded_files]
+    new_files = [(key, f) for key, f in zip(keys, uploaded_files) if key not in previous]
+    documents = {key: previous[key] for key in keys if key in previous}
+    for (key, _), document in zip(new_files, parse_documents([f for _, f in new_files])):
+        documents[key] = document
+    st.session_state.parsed_documents = documents
+    return [documents[key] for key in keys]
+
+def start_background_parsing(documents, doc_type):
+    """(Re)start speculative page extraction for the current uploads and document type"""
+    parser = st.session_state.background_parser
+    if parser is not None:
+        if parser.doc_type == doc_type and parser.documents == documents:
+            return
+        parser.stop()
+    st.session_state.background_parser = BackgroundParser(documents, doc_type)
+
+def stop_background_parsing():
+    """Stop speculative parsing; must happen before the documents are extracted"""
+    parser = st.session_state.get('background_parser')
+    if parser is not None:
+        parser.stop()
+        st.session_state.background_parser = None
+
 def render_sidebar(user, auth_manager):
     """Render sidebar with user info and navigation"""
     with st.sidebar:
@@ -238,6 +289,181 @@ def render_sidebar(user, auth_manager):
         if st.button("🚪 Logout", use_container_width=True, type="secondary"):
             auth_manager.logout()
 
+def get_display_dataframe(df, doc_type):
+    """Return the columns of an extraction result worth showing for a document type"""
+    if doc_type == "SKTT":
+        columns_to_show = ['NIK', 'Name', 'Jenis Kelamin', 'Place of Birth', 'Date of Birth', 'Nationality', 'Occupation', 'Address']
+    elif doc_type == "EVLN":
+        columns_to_show = ['Name', 'Place of Birth', 'Date of Birth', 'Passport No', 'Passport Expiry', 'Date Issue']
+    elif doc_type in ["ITAS", "ITK"]:
+        columns_to_show = ['Name', 'Permit Number', 'Stay Permit Expiry', 'Passport Number', 'Nationality', 'Gender']
+    elif doc_type == "Notifikasi":
+        columns_to_show = ['Nomor Keputusan', 'Nama TKA', 'Tempat/Tanggal Lahir', 'Kewarganegaraan', 'Nomor Paspor', 'Jabatan']
+    elif doc_type == "DKPTKA":
+        columns_to_show = ['Nama Pemberi Kerja', 'Nama TKA', 'Nomor Paspor', 'Kewarganegaraan', 'Jabatan', 'DKPTKA']
+    else:
+        columns_to_show = [col for col in df.columns
+                           if col not in ['filename', 'Jenis Dokumen', 'Error', *ROUTING_FIELDS]]
+    
+    # Filter DataFrame to show only relevant columns
+    display_df = df.copy()
+    available_columns = [col for col in columns_to_show if col in display_df.columns]
+    if available_columns:
+        display_df = display_df[available_columns]
+    return display_df
+
+def render_excel_download(results, doc_type, valid_files_count):
+    """Render the Excel file card and its download button"""
+    excel_data = results['excel_data']
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        st.markdown(f"""
+        <div style="background-color: #f8fafc; border-radius: 0.5rem; padding: 1rem; display: flex; align-items: center;">
+            <div style="background-color: #22c55e; border-radius: 0.5rem; padding: 0.75rem; margin-right: 1rem;">
+                <span style="color: white; font-size: 1.5rem;">📊</span>
+            </div>
+            <div>
+                <p style="margin: 0; font-weight: 600;">Hasil_Ekstraksi_{doc_type}.xlsx</p>
+                <p style="margin: 0; color: #64748b; font-size: 0.85rem;">Excel Spreadsheet • {valid_files_count} files • Diekspor pada {results['export_time']}</p>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.download_button(
+            label="📊 Download Excel",
+            data=excel_data,
+            file_name=f"Hasil_Ekstraksi_{doc_type}_{int(time.time())}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+
+def render_renamed_files(results, doc_type):
+    """Render the list of renamed files and the ZIP download button"""
+    renamed_files = results['renamed_files']
+    
+    # Display rename information
+    st.markdown('<div style="background-color: #f8fafc; border-radius: 0.5rem; padding: 1rem;">', unsafe_allow_html=True)
+    
+    for original_name, file_info in renamed_files.items():
+        st.markdown(f'''
+        <div style="display: flex; align-items: center; padding: 0.75rem; border-bottom: 1px solid #e2e8f0;">
+            <div style="flex: 1;">
+                <p style="margin: 0; color: #64748b; font-size: 0.85rem;">Nama Asli:</p>
+                <p style="margin: 0; font-weight: 600;">{original_name}</p>
+            </div>
+            <div style="margin: 0 1rem;">
+                <span style="color: #64748b;">→</span>
+            </div>
+            <div style="flex: 1;">
+                <p style="margin: 0; color: #64748b; font-size: 0.85rem;">Nama Baru:</p>
+                <p style="margin: 0; font-weight: 600; color: #0369a1;">{file_info['new_name']}</p>
+            </div>
+        </div>
+        ''', unsafe_allow_html=True)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Download ZIP button
+    zip_data = results['zip_data']
+    
+    st.download_button(
+        label="📁 Download All Renamed Files (ZIP)",
+        data=zip_data,
+        file_name=f"Renamed_{doc_type}_Files_{int(time.time())}.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
+
+def run_chunked_extraction(valid_files, doc_type, use_name, use_passport, split_bulk, user, db_manager):
+    """Extract a very large batch in chunks; the CSV and ZIP are served from disk"""
+    start_time = time.time()
+    progress_bar = st.progress(0.0)
+    csv_path, zip_path, status_counts, temp_dir = process_pdfs_chunked(
+        valid_files, doc_type, use_name, use_passport,
+        progress_callback=lambda fraction, message: progress_bar.progress(fraction, text=message),
+        split_bulk=split_bulk, owner=user['id']
+    )
+    processing_time = time.time() - start_time
+    
+    # Log to database if available, reading the rows back a chunk at a time
+    if DATABASE_ENABLED and db_manager:
+        file_sizes = {f.name: f.size for f in valid_files}
+        # Parts of split bulk scans are not in this map and are logged without a file hash
+        file_hashes = {f.name: f.sha256 for f in valid_files}
+        for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=500):
+            for row in chunk.to_dict('records'):
+                extracted_data = {key: value for key, value in row.items() if value != ''}
+                db_manager.log_extraction(
+                    user_id=user['id'],
+                    filename=row.get('filename', 'unknown'),
+                    file_size=file_sizes.get(row.get('filename'), 0),
+                    document_type=doc_type,
+                    extracted_data=extracted_data,
+                    processing_time=processing_time / len(valid_files),
+                    status=get_extraction_status(extracted_data),
+                    file_hash=file_hashes.get(row.get('filename'))
+                )
+        
+        aborted = sum(status_counts.get(status, 0) for status in ABORT_STATUSES)
+        db_manager.log_activity(
+            user_id=user['id'],
+            action="BATCH_DOCUMENT_EXTRACTED",
+            details=f"Extracted {len(valid_files)} {doc_type} documents in chunks using file_handler"
+                    f" ({aborted} aborted by time/memory limits)"
+        )
+    
+    return {
+        'chunked': True,
+        'df': pd.read_csv(csv_path, dtype=str, keep_default_na=False, nrows=100),
+        'doc_type': doc_type,
+        'valid_files_count': len(valid_files),
+        'processing_time': processing_time,
+        'first_row_time': None,
+        'status_counts': status_counts,
+        'duplicates': len(valid_files) - len({document.sha256 for document in valid_files}),
+        'csv_path': csv_path,
+        'zip_path': zip_path,
+        'temp_dir': temp_dir,
+        'export_time': time.strftime('%d/%m/%Y %H:%M')
+    }
+
+def render_batch_plan(plan):
+    """Show the pre-flight estimate for a batch next to the extract button"""
+    if plan['eta'] is None:
+        eta = "belum ada riwayat"
+    elif plan['eta'] < 60:
+        eta = f"~{plan['eta']:.0f} detik"
+    else:
+        eta = f"~{plan['eta'] / 60:.1f} menit"
+    
+    if plan['mode'] == 'chunked':
+        mode = f"Bertahap, {plan['workers']} worker"
+    elif plan['mode'] == 'parallel':
+        mode = f"Paralel, {plan['workers']} worker"
+    else:
+        mode = "Serial"
+    
+    details = [f"📄 {plan['files']} file • {plan['pages']} halaman ({plan['targeted_pages']} dibaca)",
+               f"⏱️ Estimasi: {eta} • ⚙️ {mode}"]
+    if plan['cached']:
+        details.append(f"💾 {plan['cached']} file sudah ada di cache")
+    if plan['scanned']:
+        ocr = "OCR" if plan['ocr_available'] else "OCR tidak tersedia"
+        details.append(f"🔍 {plan['scanned']} file hasil scan ({ocr})")
+    if plan['duplicates']:
+        details.append(f"🧬 {plan['duplicates']} file duplikat (isi sama, diproses sekali)")
+    if plan.get('reused'):
+        details.append(f"♻️ {plan['reused']} file sudah diproses di sesi ini (tidak diproses ulang)")
+    if plan.get('resumed'):
+        details.append(f"⏯️ Melanjutkan batch yang terputus: {plan['resumed']} dokumen sudah selesai")
+    parser = st.session_state.background_parser
+    if parser is not None:
+        details.append(f"⚡ Pra-baca teks: {parser.done}/{parser.total} file")
+    st.caption("  \n".join(details))
+
 def render_extraction_page(user, db_manager):
     """Render document extraction page with persistent results"""
     st.markdown('<div class="main-header"><h1>📄 Ekstraksi Dokumen Imigrasi</h1></div>', unsafe_allow_html=True)
@@ -254,10 +480,18 @@ def render_extraction_page(user, db_manager):
         "Pilih file dokumen PDF (dapat memilih multiple files)",
         type=['pdf'],
         accept_multiple_files=True,
-        help="Maksimal ukuran file 50MB per file",
+        help=f"Maksimal ukuran file {APP_CONFIG['max_file_size'] // (1024 * 1024)}MB per file",
         key=f"file_uploader_{st.session_state.file_uploader_key}"
     )
     
+    # Files added to an upload that was already processed: back to the form,
+    # which extracts only the new files
+    previous = st.session_state.extraction_results
+    if st.session_state.show_results and previous and uploaded_files and not previous.get('chunked'):
+        known = set(previous.get('upload_keys', []))
+        if any(get_upload_key(f) not in known for f in uploaded_files):
+            st.session_state.show_results = False
+    
     # Display extraction results if available
     if st.session_state.show_results and st.session_state.extraction_results:
         results = st.session_state.extraction_results
@@ -281,115 +515,95 @@ def render_extraction_page(user, db_manager):
             valid_files_count = results['valid_files_count']
             processing_time = results['processing_time']
             
-            # Display table with proper column configuration
-            if doc_type == "SKTT":
-                columns_to_show = ['NIK', 'Name', 'Jenis Kelamin', 'Place of Birth', 'Date of Birth', 'Nationality', 'Occupation', 'Address']
-            elif doc_type == "EVLN":
-                columns_to_show = ['Name', 'Place of Birth', 'Date of Birth', 'Passport No', 'Passport Expiry', 'Date Issue']
-            elif doc_type in ["ITAS", "ITK"]:
-                columns_to_show = ['Name', 'Permit Number', 'Stay Permit Expiry', 'Passport Number', 'Nationality', 'Gender']
-            elif doc_type == "Notifikasi":
-                columns_to_show = ['Nomor Keputusan', 'Nama TKA', 'Tempat/Tanggal Lahir', 'Kewarganegaraan', 'Nomor Paspor', 'Jabatan']
-            elif doc_type == "DKPTKA":
-                columns_to_show = ['Nama Pemberi Kerja', 'Nama TKA', 'Nomor Paspor', 'Kewarganegaraan', 'Jabatan', 'DKPTKA']
-            else:
-                columns_to_show = [col for col in df.columns if col not in ['filename', 'Jenis Dokumen', 'Error']]
-            
-            # Filter DataFrame to show only relevant columns
-            display_df = df.copy()
-            available_columns = [col for col in columns_to_show if col in display_df.columns]
-            if available_columns:
-                display_df = display_df[available_columns]
+            if results.get('chunked'):
+                st.caption(f"Menampilkan {len(df)} baris pertama; data lengkap tersedia di file CSV.")
             
+            # Display table with proper column configuration
             st.dataframe(
-                display_df,
+                get_display_dataframe(df, doc_type),
                 use_container_width=True,
                 hide_index=True
             )
             
             # Show statistics
-            col1, col2, col3, col4 = st.columns(4)
+            col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
             
             with col1:
                 st.metric("Total Files", valid_files_count)
             
+            status_counts = results.get('status_counts')
             with col2:
-                successful = len([row for _, row in df.iterrows() if "Error" not in row.to_dict()])
+                if status_counts is not None:
+                    successful = status_counts.get('completed', 0)
+                else:
+                    successful = len([row for _, row in df.iterrows() if "Error" not in row.to_dict()])
                 st.metric("Berhasil", successful)
             
             with col3:
-                failed = len([row for _, row in df.iterrows() if "Error" in row.to_dict()])
+                if status_counts is not None:
+                    failed = sum(status_counts.values()) - status_counts.get('completed', 0)
+                else:
+                    failed = len([row for _, row in df.iterrows() if "Error" in row.to_dict()])
                 st.metric("Gagal", failed)
             
             with col4:
                 st.metric("Waktu Proses", f"{processing_time:.2f}s")
-        
-        with tab2:
-            st.subheader("Download File Excel")
             
-            excel_data = results['excel_data']
+            with col5:
+                first_row_time = results.get('first_row_time')
+                st.metric("Waktu Baris Pertama", f"{first_row_time:.2f}s" if first_row_time is not None else "-")
             
-            col1, col2 = st.columns([3, 1])
-            
-            with col1:
-                st.markdown(f"""
-                <div style="background-color: #f8fafc; border-radius: 0.5rem; padding: 1rem; display: flex; align-items: center;">
-                    <div style="background-color: #22c55e; border-radius: 0.5rem; padding: 0.75rem; margin-right: 1rem;">
-                        <span style="color: white; font-size: 1.5rem;">📊</span>
-                    </div>
-                    <div>
-                        <p style="margin: 0; font-weight: 600;">Hasil_Ekstraksi_{doc_type}.xlsx</p>
-                        <p style="margin: 0; color: #64748b; font-size: 0.85rem;">Excel Spreadsheet • {valid_files_count} files • Diekspor pada {results['export_time']}</p>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            with col6:
+                if results.get('chunked'):
+                    duplicates = results.get('duplicates', 0)
+                elif DUPLICATE_FIELD in df.columns:
+                    duplicates = int(df[DUPLICATE_FIELD].notna().sum())
+                else:
+                    duplicates = 0
+                st.metric("Duplikat", duplicates)
             
-            with col2:
-                st.download_button(
-                    label="📊 Download Excel",
-                    data=excel_data,
-                    file_name=f"Hasil_Ekstraksi_{doc_type}_{int(time.time())}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
-                )
+            with col7:
+                # Median time until a file's row was ready, against the same files in upload order
+                latency = results.get('latency')
+                if latency:
+                    st.metric(
+                        "Latensi Median", f"{latency['scheduled']:.2f}s",
+                        delta=f"{latency['scheduled'] - latency['upload_order']:+.2f}s vs urutan upload",
+                        delta_color="inverse"
+                    )
+                else:
+                    st.metric("Latensi Median", "-")
+        
+        with tab2:
+            if results.get('chunked'):
+                st.subheader("Download File CSV")
+                st.info(f"Batch besar ({valid_files_count} file) diproses bertahap; hasil disimpan sebagai CSV.")
+                with open(results['csv_path'], "rb") as f:
+                    st.download_button(
+                        label="📊 Download CSV",
+                        data=f,
+                        file_name=f"Hasil_Ekstraksi_{doc_type}_{int(time.time())}.csv",
+                        mime="text/csv",
+                        use_container_width=True
+                    )
+            else:
+                render_excel_download(results, doc_type, valid_files_count)
         
         with tab3:
             st.subheader("File yang Telah di-Rename")
             
-            renamed_files = results['renamed_files']
-            
-            # Display rename information
-            st.markdown('<div style="background-color: #f8fafc; border-radius: 0.5rem; padding: 1rem;">', unsafe_allow_html=True)
-            
-            for original_name, file_info in renamed_files.items():
-                st.markdown(f'''
-                <div style="display: flex; align-items: center; padding: 0.75rem; border-bottom: 1px solid #e2e8f0;">
-                    <div style="flex: 1;">
-                        <p style="margin: 0; color: #64748b; font-size: 0.85rem;">Nama Asli:</p>
-                        <p style="margin: 0; font-weight: 600;">{original_name}</p>
-                    </div>
-                    <div style="margin: 0 1rem;">
-                        <span style="color: #64748b;">→</span>
-                    </div>
-                    <div style="flex: 1;">
-                        <p style="margin: 0; color: #64748b; font-size: 0.85rem;">Nama Baru:</p>
-                        <p style="margin: 0; font-weight: 600; color: #0369a1;">{file_info['new_name']}</p>
-                    </div>
-                </div>
-                ''', unsafe_allow_html=True)
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Download ZIP button
-            zip_data = results['zip_data']
-            
-            st.download_button(
-                label="📁 Download All Renamed Files (ZIP)",
-                data=zip_data,
-                file_name=f"Renamed_{doc_type}_Files_{int(time.time())}.zip",
-                mime="application/zip",
-                use_container_width=True
-            )
+            if results.get('chunked'):
+                st.info(f"{valid_files_count} file telah di-rename; daftar lengkap ada di dalam file ZIP.")
+                with open(results['zip_path'], "rb") as f:
+                    st.download_button(
+                        label="📁 Download All Renamed Files (ZIP)",
+                        data=f,
+                        file_name=f"Renamed_{doc_type}_Files_{int(time.time())}.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
+            else:
+                render_renamed_files(results, doc_type)
         
         with tab4:
             st.subheader("🔄 Proses Dokumen Baru")
@@ -404,14 +618,17 @@ def render_extraction_page(user, db_manager):
     elif uploaded_files:
         # Validate files
         valid_files = []
+        valid_keys = []
         invalid_files = []
         
-        for uploaded_file in uploaded_files:
-            is_valid, message = validate_pdf_file(uploaded_file)
+        # Parse each upload once; the same document is reused for extraction and logging
+        for uploaded_file, document in zip(uploaded_files, get_session_documents(uploaded_files)):
+            is_valid, message = validate_pdf_file(document)
             if is_valid:
-                valid_files.append(uploaded_file)
+                valid_files.append(document)
+                valid_keys.append(get_upload_key(uploaded_file))
             else:
-                invalid_files.append((uploaded_file.name, message))
+                invalid_files.append((document.name, message))
         
         # Show file validation results
         if invalid_files:
@@ -471,37 +688,149 @@ def render_extraction_page(user, db_manager):
         with col3:
             use_passport = st.checkbox("Gunakan Nomor Paspor untuk Rename File", value=True)
         
+        # Finding the documents inside a bulk scan reads every page, so it is opt-in
+        split_bulk = False
+        if DOCUMENT_TYPES.get(doc_type, {}).get('segment_marker'):
+            split_bulk = st.checkbox(
+                "Scan massal: pisahkan file yang berisi beberapa dokumen",
+                value=PROCESSING_CONFIG.get('split_documents', False)
+            )
+        
+        # Uploads already extracted in this session with the same options are reused;
+        # a new upload with the same content as one of them gets a duplicate row
+        reuse = None
+        new_files = valid_files
+        new_keys = valid_keys
+        earlier_files = []
+        if (previous and not previous.get('chunked') and previous['doc_type'] == doc_type
+                and previous.get('rename_options') == (use_name, use_passport)
+                and previous.get('split_bulk', False) == split_bulk):
+            known = set(previous['upload_keys'])
+            if known <= set(valid_keys):
+                reuse = previous
+                new_files = [document for key, document in zip(valid_keys, valid_files) if key not in known]
+                new_keys = [key for key in valid_keys if key not in known]
+                earlier_files = [document for key, document in zip(valid_keys, valid_files) if key in known]
+        
+        # Pre-flight estimate from page counts and past processing times
+        rates = db_manager.get_processing_rates(doc_type) if DATABASE_ENABLED and db_manager else {}
+        plan = plan_batch(new_files, doc_type, rates)
+        plan['reused'] = len(valid_files) - len(new_files)
+        
+        # An interrupted run of the same batch picks up where it stopped
+        checkpoint_files = valid_files if plan['mode'] == 'chunked' else new_files
+        plan['resumed'] = get_checkpoint_progress(checkpoint_files, doc_type, use_name, use_passport, split_bulk,
+                                                  owner=user['id'])
+        
+        # Read page text while the user is still choosing options
+        if PROCESSING_CONFIG.get('background_parsing', True) and plan['mode'] != 'chunked':
+            start_background_parsing(new_files, doc_type)
+        
         # Extract button
-        if st.button("🚀 Mulai Ekstraksi", type="primary", use_container_width=True):
+        col1, col2 = st.columns([2, 3])
+        with col2:
+            render_batch_plan(plan)
+        with col1:
+            start_extraction = st.button("🚀 Mulai Ekstraksi", type="primary", use_container_width=True)
+        
+        if start_extraction:
+            stop_background_parsing()
             with st.spinner("Sedang memproses dokumen..."):
                 try:
+                    if plan['mode'] == 'chunked':
+                        # Very large batch: results stay on disk instead of in session state
+                        st.session_state.extraction_results = run_chunked_extraction(
+                            valid_files, doc_type, use_name, use_passport, split_bulk, user, db_manager
+                        )
+                        st.session_state.show_results = True
+                        st.success("✅ Proses selesai! Lihat hasil di bawah ini.")
+                        st.rerun()
+                    
+                    if not new_files:
+                        # Every file was already extracted with these options
+                        st.session_state.show_results = True
+                        st.rerun()
+                    
                     start_time = time.time()
+                    first_row_time = None
                     
-                    # Process files using file_handler
-                    df, excel_path, renamed_files, zip_path, temp_dir = process_pdfs(
-                        valid_files, doc_type, use_name, use_passport
-                    )
+                    # Process files using file_handler, showing each row as soon as it is extracted
+                    stats_placeholder = st.empty()
+                    table_placeholder = st.empty()
+                    rows = reuse['df'].to_dict('records') if reuse else []
+                    failed = len([row for row in rows if isinstance(row.get("Error"), str)])
+                    
+                    def refresh_results():
+                        with stats_placeholder.container():
+                            col1, col2, col3, col4 = st.columns(4)
+                            col1.metric("Diproses", len(rows))
+                            col2.metric("Berhasil", len(rows) - failed)
+                            col3.metric("Gagal", failed)
+                            col4.metric("Waktu Baris Pertama", f"{first_row_time:.2f}s")
+                        table_placeholder.dataframe(
+                            get_display_dataframe(pd.DataFrame(rows), doc_type),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                    
+                    # Redrawing the whole table per row is quadratic, so new rows are shown in batches
+                    refresh_rows = PROCESSING_CONFIG.get('stream_refresh_rows', 25)
+                    refresh_seconds = PROCESSING_CONFIG.get('stream_refresh_seconds', 1.0)
+                    pending = 0
+                    last_refresh = None
+                    stream = iter_pdfs(new_files, doc_type, use_name, use_passport, split_bulk=split_bulk,
+                                       owner=user['id'], earlier=earlier_files)
+                    while True:
+                        try:
+                            original_name, new_name, extracted_data = next(stream)
+                        except StopIteration as done:
+                            df, excel_path, renamed_files, zip_path, temp_dir = done.value
+                            break
+                        
+                        if first_row_time is None:
+                            first_row_time = time.time() - start_time
+                        rows.append(extracted_data)
+                        if isinstance(extracted_data.get("Error"), str):
+                            failed += 1
+                        pending += 1
+                        
+                        # The first row is shown at once; later ones every refresh_rows rows or refresh_seconds
+                        if (last_refresh is None or pending >= refresh_rows
+                                or time.time() - last_refresh >= refresh_seconds):
+                            refresh_results()
+                            pending = 0
+                            last_refresh = time.time()
+                    if pending:
+                        refresh_results()
                     
                     processing_time = time.time() - start_time
+                    latency = get_latency_stats(new_files, doc_type)
                     
                     # Log to database if available
                     if DATABASE_ENABLED and db_manager:
+                        aborted = 0
                         for _, row in df.iterrows():
+                            extracted_data = row_data(row)
+                            status = get_extraction_status(extracted_data)
+                            if status in ABORT_STATUSES:
+                                aborted += 1
                             db_manager.log_extraction(
                                 user_id=user['id'],
                                 filename=row.get('filename', 'unknown'),
                                 file_size=next((f.size for f in valid_files if f.name == row.get('filename')), 0),
                                 document_type=doc_type,
-                                extracted_data=row.to_dict(),
-                                processing_time=processing_time / len(valid_files),
-                                status="completed" if "Error" not in row.to_dict() else "failed"
+                                extracted_data=extracted_data,
+                                processing_time=processing_time / len(new_files),
+                                status=status,
+                                file_hash=renamed_files.get(row.get('filename'), {}).get('file_hash')
                             )
                         
                         # Log activity
                         db_manager.log_activity(
                             user_id=user['id'],
                             action="BATCH_DOCUMENT_EXTRACTED",
-                            details=f"Extracted {len(valid_files)} {doc_type} documents using file_handler"
+                            details=f"Extracted {len(new_files)} {doc_type} documents using file_handler"
+                                    f" ({aborted} aborted by time/memory limits, {len(valid_files) - len(new_files)} reused)"
                         )
                     
                     # Store results in session state instead of auto-clearing
@@ -510,15 +839,28 @@ def render_extraction_page(user, db_manager):
                     
                     with open(zip_path, "rb") as f:
                         zip_data = f.read()
+                    upload_keys = new_keys
+                    
+                    if reuse:
+                        # Append the new files to the earlier results instead of rebuilding them
+                        excel_data, zip_data = append_batch_outputs(reuse['excel_data'], reuse['zip_data'], df, zip_path)
+                        df = pd.concat([reuse['df'], df], ignore_index=True)
+                        renamed_files = {**reuse['renamed_files'], **renamed_files}
+                        upload_keys = reuse['upload_keys'] + upload_keys
                     
                     st.session_state.extraction_results = {
                         'df': df,
                         'doc_type': doc_type,
                         'valid_files_count': len(valid_files),
                         'processing_time': processing_time,
+                        'first_row_time': first_row_time,
+                        'latency': latency,
                         'excel_data': excel_data,
                         'zip_data': zip_data,
                         'renamed_files': renamed_files,
+                        'upload_keys': upload_keys,
+                        'rename_options': (use_name, use_passport),
+                        'split_bulk': split_bulk,
                         'export_time': time.strftime('%d/%m/%Y %H:%M')
                     }
                     st.session_state.show_results = True
@@ -548,7 +890,7 @@ def render_extraction_page(user, db_manager):
     
     else:
         # Show help when no files uploaded
-        st.markdown("""
+        st.markdown(f"""
         <div style="background: #e3f2fd; padding: 2rem; border-radius: 8px; text-align: center; margin: 2rem 0;">
             <h3 style="color: #1976d2; margin-bottom: 1rem;">📤 Upload File untuk Memulai</h3>
             <p style="color: #424242; margin-bottom: 1rem;">
@@ -558,7 +900,7 @@ def render_extraction_page(user, db_manager):
                 <li>Pastikan file dalam format PDF</li>
                 <li>Pilih jenis dokumen yang sesuai</li>
                 <li>Atur opsi penamaan file jika diperlukan</li>
-                <li>Maksimal ukuran file 50MB per file</li>
+                <li>Maksimal ukuran file {APP_CONFIG['max_file_size'] // (1024 * 1024)}MB per file</li>
             </ul>
         </div>
         """, unsafe_allow_html=True)
@@ -603,6 +945,18 @@ def main():
         auth_manager = AuthManager()
         db_manager = DatabaseManager()
         
+        # Reuse extraction results for files that were already processed,
+        # record page layouts that have no template yet, count retries,
+        # checkpoint batches so an interrupted one can be resumed and keep
+        # the original PDFs for re-download from the dashboard
+        if FILE_HANDLER_ENABLED:
+            set_extraction_cache(db_manager)
+            set_template_log(db_manager)
+            set_retry_log(db_manager)
+            set_checkpoint_store(db_manager)
+            if BLOB_STORE_CONFIG.get('enabled', True):
+                set_blob_store(BlobStore(db_manager))
+        
         # Require authentication
         if not auth_manager.require_auth():
             return
@@ -0,0 +1,111 @@
+"""
+Blob Store for LDB Application
+Keeps original PDFs on disk by content so past extractions can be downloaded and re-extracted
+"""
+
+import os
+import threading
+
+# Import blob store configuration with fallback
+try:
+    from config import BLOB_STORE_CONFIG
+except ImportError:
+    BLOB_STORE_CONFIG = {
+        'enabled': True,
+        'path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'blobs'),
+        'max_bytes': 5 * 1024 * 1024 * 1024,
+    }
+
+class BlobStore:
+    """
+    Content-addressed store of original PDFs
+    
+    Each file is kept once under its SHA-256, sharded as ab/cd/<hash>.pdf so
+    no directory grows too large. The DatabaseManager's blobs table records
+    sizes and last use; once the store grows past max_bytes the least
+    recently used files are evicted. Extraction history rows refer to a file
+    by its hash (file_hash), so an old entry may find its file evicted.
+    """
+    
+    def __init__(self, db_manager, root=None, max_bytes=None):
+        self.db = db_manager
+        self.root = str(root or BLOB_STORE_CONFIG.get('path'))
+        self.max_bytes = max_bytes if max_bytes is not None else BLOB_STORE_CONFIG.get('max_bytes')
+        self._lock = threading.Lock()
+    
+    def path_for(self, file_hash):
+        """Where a file with this hash is (or would be) stored"""
+        return os.path.join(self.root, file_hash[:2], file_hash[2:4], f"{file_hash}.pdf")
+    
+    def put(self, document):
+        """
+        Store a ParsedDocument's content unless it is already there
+        
+        Returns:
+            str: the file hash, or None when the file could not be stored
+        """
+        file_hash = document.sha256
+        path = self.path_for(file_hash)
+        try:
+            if not os.path.exists(path):
+                if self.max_bytes is not None and document.size > self.max_bytes:
+                    return None
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write under a temporary name so a reader never sees a partial file
+                partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+                document.save_as(partial)
+                os.replace(partial, path)
+            self.db.record_blob(file_hash, document.size)
+            self._evict(keep=file_hash)
+            return file_hash
+        except Exception as e:
+            print(f"Warning: could not store {document.name} in the blob store: {e}")
+            return None
+    
+    def get_path(self, file_hash):
+        """Path of a stored file, marking it as used, or None if it is not (or no longer) stored"""
+        if not file_hash:
+            return None
+        path = self.path_for(file_hash)
+        if not os.path.exists(path):
+            self.db.delete_blob(file_hash)
+            return None
+        self.db.touch_blob(file_hash)
+        return path
+    
+    def read(self, file_hash):
+        """Content of a stored file as bytes, or None"""
+        path = self.get_path(file_hash)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def get_stats(self):
+        """Number of stored files, their total size and the quota"""
+        usage = self.db.get_blob_usage()
+        usage['max_bytes'] = self.max_bytes
+        return usage
+    
+    def _evict(self, keep=None):
+        """Remove least recently used files until the store fits in max_bytes"""
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            usage = self.db.get_blob_usage()['bytes']
+            while usage > self.max_bytes:
+                candidates = [blob for blob in self.db.get_lru_blobs() if blob['file_hash'] != keep]
+                if not candidates:
+                    return
+                for blob in candidates:
+                    self._remove(blob['file_hash'])
+                    usage -= blob['file_size']
+                    if usage <= self.max_bytes:
+                        return
+    
+    def _remove(self, file_hash):
+        try:
+            os.remove(self.path_for(file_hash))
+        except FileNotFoundError:
+            pass
+        self.db.delete_blob(file_hash)
@@ -3,12 +3,22 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import os
+import time
 from database.models import DatabaseManager
 from typing import Dict, List
 
+# Original PDFs of past extractions, for re-download and re-extraction
+try:
+    from blob_store import BlobStore, BLOB_STORE_CONFIG
+except ImportError:
+    BlobStore = None
+    BLOB_STORE_CONFIG = {'enabled': False}
+
 class Dashboard:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+        self.blobs = BlobStore(db_manager) if BlobStore and BLOB_STORE_CONFIG.get('enabled', True) else None
     
     def render_user_dashboard(self, user: Dict):
         """Render dashboard for regular users"""
@@ -66,6 +76,8 @@ class Dashboard:
                 hide_index=True
             )
             
+            self.render_stored_files(history, key="user_history")
+            
             # Chart: Extractions over time
             if len(df) > 1:
                 st.subheader("📈 Grafik Ekstraksi")
@@ -154,6 +166,19 @@ class Dashboard:
         """Render admin statistics"""
         st.subheader("📊 Statistik Sistem")
         
+        stats = self.db.get_dashboard_stats()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric(
+                label="⏱️ Ekstraksi Dibatalkan (timeout/memory)",
+                value=stats.get('aborted_extractions', 0)
+            )
+        with col2:
+            st.metric(
+                label="🔍 Dokumen Hasil Scan (perlu OCR)",
+                value=stats.get('ocr_extractions', 0)
+            )
+        
         # Get all extraction history for charts
         history = self.db.get_extraction_history(limit=1000)
         
@@ -199,6 +224,220 @@ class Dashboard:
             st.plotly_chart(fig_timeline, use_container_width=True)
         else:
             st.info("Belum ada data ekstraksi untuk ditampilkan.")
+        
+        self.render_cache_statistics()
+        self.render_blob_statistics()
+        self.render_retry_statistics()
+        self.render_unknown_templates()
+    
+    def render_blob_statistics(self):
+        """Render usage of the store of original PDFs"""
+        if self.blobs is None:
+            return
+        
+        st.subheader("🗄️ Penyimpanan File Asli")
+        
+        blob_stats = self.blobs.get_stats()
+        used_mb = blob_stats.get('bytes', 0) / (1024 * 1024)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric(
+                label="📦 File Tersimpan",
+                value=blob_stats.get('blobs', 0)
+            )
+        
+        with col2:
+            st.metric(
+                label="💽 Ukuran",
+                value=f"{used_mb:.1f} MB"
+            )
+        
+        with col3:
+            max_bytes = blob_stats.get('max_bytes')
+            st.metric(
+                label="📈 Kuota Terpakai",
+                value=f"{blob_stats.get('bytes', 0) / max_bytes * 100:.1f}%" if max_bytes else "-"
+            )
+    
+    def render_stored_files(self, history: List[Dict], key: str):
+        """Re-download or re-extract the original PDFs of history entries from the blob store"""
+        if self.blobs is None:
+            return
+        entries = [entry for entry in history if entry.get('file_hash')]
+        if not entries:
+            return
+        
+        st.subheader("📥 Unduh / Ekstrak Ulang File Asli")
+        labels = {entry['id']: f"{entry['filename']} · {entry['document_type']} · {entry['created_at']}"
+                  for entry in entries}
+        selected_ids = st.multiselect(
+            "Pilih entri riwayat",
+            options=list(labels),
+            format_func=labels.get,
+            key=f"{key}_stored_files"
+        )
+        if not selected_ids:
+            return
+        
+        selected = [entry for entry in entries if entry['id'] in selected_ids]
+        paths = {entry['id']: self.blobs.get_path(entry['file_hash']) for entry in selected}
+        missing = [entry['filename'] for entry in selected if paths[entry['id']] is None]
+        if missing:
+            st.warning("File asli tidak tersedia lagi (dihapus karena kuota): " + ", ".join(missing))
+        available = [entry for entry in selected if paths[entry['id']] is not None]
+        if not available:
+            return
+        
+        try:
+            from file_handler import ParsedDocument, process_pdfs, create_zip_from_results, cleanup_temp_directory
+            from helpers import generate_new_filename
+        except ImportError as e:
+            st.error(f"❌ File handler not found: {e}")
+            return
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if len(available) == 1:
+                entry = available[0]
+                with open(paths[entry['id']], "rb") as f:
+                    st.download_button(
+                        label="📄 Download File Asli",
+                        data=f.read(),
+                        file_name=entry['filename'],
+                        mime="application/pdf",
+                        use_container_width=True,
+                        key=f"{key}_original"
+                    )
+        
+        with col2:
+            # The ZIP is built on request and kept for this selection instead of on every rerun
+            selection = tuple(sorted(entry['id'] for entry in available))
+            prepared = st.session_state.get(f"{key}_zip_data")
+            if prepared is not None and prepared['selection'] != selection:
+                prepared = None
+            if prepared is None and st.button("📦 Siapkan ZIP (Nama Baru)", use_container_width=True,
+                                              key=f"{key}_zip_build"):
+                # Renamed copies straight from the store, named from the stored extraction results
+                results = [{'file_path': paths[entry['id']],
+                            'new_name': generate_new_filename(entry['extracted_data'] or {})} for entry in available]
+                zip_path = create_zip_from_results(results)
+                with open(zip_path, "rb") as f:
+                    prepared = {'selection': selection, 'data': f.read()}
+                os.remove(zip_path)
+                st.session_state[f"{key}_zip_data"] = prepared
+            if prepared is not None:
+                st.download_button(
+                    label="📦 Download ZIP (Nama Baru)",
+                    data=prepared['data'],
+                    file_name=f"Renamed_Files_{int(time.time())}.zip",
+                    mime="application/zip",
+                    use_container_width=True,
+                    key=f"{key}_zip"
+                )
+        
+        with col3:
+            if st.button("🔄 Ekstrak Ulang", use_container_width=True, key=f"{key}_reextract"):
+                outputs = {}
+                with st.spinner("Sedang memproses dokumen..."):
+                    for doc_type in dict.fromkeys(entry['document_type'] for entry in available):
+                        documents = [ParsedDocument(entry['filename'], path=paths[entry['id']])
+                                     for entry in available if entry['document_type'] == doc_type]
+                        df, excel_path, _, _, temp_dir = process_pdfs(documents, doc_type)
+                        with open(excel_path, "rb") as f:
+                            outputs[doc_type] = {'df': df, 'excel_data': f.read()}
+                        cleanup_temp_directory(temp_dir)
+                st.session_state[f"{key}_reextracted"] = outputs
+        
+        for doc_type, output in st.session_state.get(f"{key}_reextracted", {}).items():
+            st.write(f"**Hasil ekstraksi ulang {doc_type}**")
+            st.dataframe(output['df'], use_container_width=True, hide_index=True)
+            st.download_button(
+                label=f"📊 Download Excel {doc_type}",
+                data=output['excel_data'],
+                file_name=f"Hasil_Ekstraksi_{doc_type}_{int(time.time())}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"{key}_excel_{doc_type}"
+            )
+    
+    def render_retry_statistics(self):
+        """Render how often each retry strategy recovered a failed file"""
+        retry_stats = self.db.get_retry_stats()
+        if not retry_stats:
+            return
+        
+        st.subheader("🔁 Percobaan Ulang Otomatis")
+        
+        labels = {
+            'alternate_backend': 'Mesin teks lain',
+            'all_pages': 'Semua halaman',
+            'ocr': 'OCR',
+        }
+        rows = [{
+            'Strategi': labels.get(strategy, strategy),
+            'Percobaan': counts.get('attempts', 0),
+            'Berhasil': counts.get('successes', 0),
+            'Tingkat Berhasil': f"{counts.get('successes', 0) / counts['attempts'] * 100:.1f}%"
+                                if counts.get('attempts') else "-"
+        } for strategy, counts in retry_stats.items()]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    
+    def render_unknown_templates(self):
+        """Render page layouts that have no registered template yet"""
+        unknown = self.db.get_unknown_templates()
+        if not unknown:
+            return
+        
+        st.subheader("🧩 Template Belum Dikenal")
+        st.caption("Tambahkan ke DOCUMENT_TEMPLATES di config.py; kotak crop yang disarankan ada di detail.")
+        
+        df = pd.DataFrame(unknown)
+        display_df = df[['document_type', 'fingerprint', 'seen_count', 'sample_filename', 'last_seen']].copy()
+        display_df.columns = ['Jenis Dokumen', 'Fingerprint', 'Jumlah', 'Contoh File', 'Terakhir Dilihat']
+        st.dataframe(display_df, use_container_width=True)
+        
+        for template in unknown[:5]:
+            with st.expander(f"{template['document_type']} · {template['fingerprint']}"):
+                st.json(template['labels'])
+    
+    def render_cache_statistics(self):
+        """Render extraction cache statistics"""
+        st.subheader("⚡ Cache Ekstraksi")
+        
+        cache_stats = self.db.get_extraction_cache_stats()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric(
+                label="📦 Entri Cache",
+                value=cache_stats.get('entries', 0)
+            )
+        
+        with col2:
+            st.metric(
+                label="✅ Cache Hit",
+                value=cache_stats.get('hits', 0)
+            )
+        
+        with col3:
+            st.metric(
+                label="❌ Cache Miss",
+                value=cache_stats.get('misses', 0)
+            )
+        
+        with col4:
+            st.metric(
+                label="📈 Hit Rate",
+                value=f"{cache_stats.get('hit_rate', 0.0):.1f}%"
+            )
+        
+        if st.button("🗑️ Kosongkan Cache", key="clear_extraction_cache_btn"):
+            self.db.clear_extraction_cache()
+            st.success("Cache ekstraksi berhasil dikosongkan!")
+            st.rerun()
     
     def render_user_management(self):
         """Render user management interface"""
@@ -275,6 +514,9 @@ class Dashboard:
                 use_container_width=True,
                 hide_index=True
             )
+            
+            shown = set(filtered_df['id'])
+            self.render_stored_files([entry for entry in history if entry['id'] in shown], key="admin_history")
         else:
             st.info("Belum ada riwayat ekstraksi.")
     
@@ -18,7 +18,7 @@ APP_CONFIG = {
     'title': 'Ekstraksi Dokumen Imigrasi',
     'version': '2.0.0',
     'description': 'Aplikasi berbasis Streamlit untuk mengekstrak data dari dokumen PDF imigrasi',
-    'max_file_size': 50 * 1024 * 1024,  # 50MB
+    'max_file_size': 500 * 1024 * 1024,  # 500MB (uploads are spooled to disk, keep server.maxUploadSize in sync)
     'allowed_extensions': ['.pdf', '.jpg', '.jpeg', '.png'],
     'session_timeout': 3600,  # 1 hour
 }
@@ -32,39 +32,138 @@ SECURITY_CONFIG = {
 }
 
 # Document types
+# page_strategy/page_limit select the pages that are parsed for extraction:
+# 'first' or 'last' N pages, or 'all'. Extraction falls back to the whole
+# document when the targeted pages miss a required field.
+# text_backend is 'pdfplumber', 'pypdf2', 'pdfminer' or 'auto' (cheapest of
+# PROCESSING_CONFIG['auto_backends'] first, escalating on missing fields).
+# Run `python file_handler.py <TYPE> samples/*.pdf` to compare backends.
+# extraction_mode 'layout' pairs labels with the value printed to their right
+# (extractors.WordIndex) before falling back to the text extractors; only
+# types listed in extractors.LAYOUT_EXTRACTORS support it.
+# segment_marker is a regex found once per document; a file where it matches
+# on several pages is a bulk scan and is split into one document per match,
+# but only for batches marked as bulk scans (split_bulk / PROCESSING_CONFIG['split_documents']).
 DOCUMENT_TYPES = {
     'SKTT': {
         'name': 'Surat Keterangan Tinggal Terbatas',
         'description': 'Dokumen izin tinggal terbatas',
-        'fields': ['nama', 'nomor_paspor', 'kebangsaan', 'tanggal_lahir', 'masa_berlaku']
+        'fields': ['nama', 'nomor_paspor', 'kebangsaan', 'tanggal_lahir', 'masa_berlaku'],
+        'page_strategy': 'first',  # data and KEPALA DINAS signature block
+        'page_limit': 2,
+        'text_backend': 'pdfplumber',
+        'segment_marker': r"NIK/Number of Population Identity",
     },
     'EVLN': {
         'name': 'Exit Visa Luar Negeri',
         'description': 'Visa keluar untuk warga negara asing',
-        'fields': ['nama', 'nomor_paspor', 'tujuan', 'tanggal_keberangkatan', 'masa_berlaku']
+        'fields': ['nama', 'nomor_paspor', 'tujuan', 'tanggal_keberangkatan', 'masa_berlaku'],
+        'page_strategy': 'first',
+        'page_limit': 2,
+        'text_backend': 'pdfplumber',
     },
     'ITAS': {
         'name': 'Izin Tinggal Terbatas',
         'description': 'Izin tinggal terbatas untuk WNA',
-        'fields': ['nama', 'nomor_paspor', 'sponsor', 'jenis_kegiatan', 'masa_berlaku']
+        'fields': ['nama', 'nomor_paspor', 'sponsor', 'jenis_kegiatan', 'masa_berlaku'],
+        'page_strategy': 'first',
+        'page_limit': 1,
+        'text_backend': 'pdfplumber',  # switch to 'auto' only once benchmark_backends shows pypdf2 matches it
+        'extraction_mode': 'text',  # or 'layout'
+        'segment_marker': r"PERMIT NUMBER",
     },
     'ITK': {
         'name': 'Izin Tinggal Kunjungan',
         'description': 'Izin tinggal kunjungan',
-        'fields': ['nama', 'nomor_paspor', 'tujuan_kunjungan', 'lama_tinggal', 'masa_berlaku']
+        'fields': ['nama', 'nomor_paspor', 'tujuan_kunjungan', 'lama_tinggal', 'masa_berlaku'],
+        'page_strategy': 'first',
+        'page_limit': 1,
+        'text_backend': 'pdfplumber',  # switch to 'auto' only once benchmark_backends shows pypdf2 matches it
+        'extraction_mode': 'text',  # or 'layout'
+        'segment_marker': r"PERMIT NUMBER",
     },
     'NOTIFICATION': {
         'name': 'Notifikasi Imigrasi',
         'description': 'Notifikasi dari kantor imigrasi',
-        'fields': ['nomor_notifikasi', 'perihal', 'tanggal', 'status']
+        'fields': ['nomor_notifikasi', 'perihal', 'tanggal', 'status'],
+        'page_strategy': 'all',
+        'page_limit': None,
+        'text_backend': 'pdfplumber',
     },
     'DKPTKA': {
         'name': 'Dana Kompensasi Penggunaan TKA',
         'description': 'Dokumen pembayaran dana kompensasi TKA',
-        'fields': ['nama_perusahaan', 'nama_tka', 'nomor_paspor', 'jumlah_pembayaran']
+        'fields': ['nama_perusahaan', 'nama_tka', 'nomor_paspor', 'jumlah_pembayaran'],
+        'page_strategy': 'all',
+        'page_limit': None,
+        'text_backend': 'pdfplumber',  # table rows rely on pdfplumber's column spacing
     }
 }
 
+# Known page layouts per document type, keyed by template fingerprint
+# (file_handler.template_fingerprint of the labels on page 1). A matching
+# file is read from each field's crop box on page 1 instead of running the
+# text extractor; 'format' may be 'first_word' or 'date':
+#     'ITAS': {
+#         '<fingerprint>': {
+#             'name': 'ITAS 2023',
+#             'fields': {
+#                 'Permit Number': {'box': [x0, top, x1, bottom], 'format': 'first_word'},
+#                 'Address': [x0, top, x1, bottom],
+#             },
+#         },
+#     },
+# Layouts that match no template are logged with suggested boxes (admin
+# dashboard) so they can be added here.
+DOCUMENT_TEMPLATES = {}
+
+# PDF processing settings
+PROCESSING_CONFIG = {
+    'parallel': True,
+    'max_workers': None,  # None = os.cpu_count()
+    'parallel_min_files': 4,  # smaller batches are processed serially
+    'auto_backends': ['pypdf2', 'pdfplumber'],  # cheapest first
+    'spool_dir': None,  # where uploads are spooled; None = system temp dir
+    'file_timeout': 120,  # seconds per file; None disables
+    'warm_stop_timeout': 5,  # seconds to wait for background parsing to stop before abandoning it
+    'worker_start_method': 'forkserver',  # or 'spawn'; workers are not forked from the threaded app process
+    'file_memory_limit': 1024 * 1024 * 1024,  # bytes per file worker; None disables
+    'early_exit': False,  # stop reading pages once a type's REQUIRED_FIELDS are found; later-page fields are then lost
+    'page_shard_threshold': 50,  # split documents with this many targeted pages across workers; None disables
+    'pages_per_shard': 10,
+    'ocr_language': 'ind+eng',  # tesseract languages for scanned PDFs (needs pytesseract)
+    'ocr_resolution': 300,  # DPI pages are rendered at before OCR
+    'split_documents': False,  # default for split_bulk: split bulk scans at DOCUMENT_TYPES[...]['segment_marker'] (reads every page)
+    'template_matching': True,  # read known layouts (DOCUMENT_TEMPLATES) from crop boxes
+    'template_onboarding': False,  # also fingerprint and log types without templates (reopens page 1 of every file)
+    'template_grid': 5,  # points label positions are rounded to when fingerprinting
+    'writer_queue_size': 16,  # finished files waiting for the writer before extraction pauses
+    'chunk_size': 200,  # files parsed at once by process_pdfs_chunked
+    'chunk_threshold': 500,  # batches larger than this run chunked (CSV + ZIP on disk, no in-memory results)
+    'stream_refresh_rows': 25,  # app redraws the live results table after this many new rows...
+    'stream_refresh_seconds': 1.0,  # ...or this many seconds, whichever comes first
+    'shortest_first': True,  # extract files with the fewest targeted pages / bytes first
+    'background_parsing': True,  # app extracts page text while the user picks options (BackgroundParser)
+    'retry_failed': True,  # re-run failed or empty files through file_handler.RETRY_STRATEGIES after the batch
+    'checkpoint_batches': True,  # record each finished file so a re-opened batch resumes (needs set_checkpoint_store)
+    'checkpoint_dir': BASE_DIR / 'database' / 'checkpoints',  # durable work dirs of checkpointed batches
+    'checkpoint_max_age_days': 7,  # unfinished batches older than this are discarded
+    'checkpoint_lease_seconds': 600,  # a batch's lock expires when its run has not saved a file for this long
+}
+
+# Extraction cache settings
+CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 5000,
+}
+
+# Content-addressed store of original PDFs (blob_store.BlobStore), referenced from extraction history
+BLOB_STORE_CONFIG = {
+    'enabled': True,
+    'path': BASE_DIR / 'database' / 'blobs',
+    'max_bytes': 5 * 1024 * 1024 * 1024,  # least recently used PDFs are evicted above this
+}
+
 # Logging configuration
 LOGGING_CONFIG = {
     'level': 'INFO',
@@ -42,10 +42,88 @@ class DatabaseManager:
                 processing_time REAL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                file_hash VARCHAR(64),
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
         
+        # Databases created before the blob store have no file_hash column yet
+        cursor.execute('PRAGMA table_info(extraction_history)')
+        if 'file_hash' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE extraction_history ADD COLUMN file_hash VARCHAR(64)')
+        
+        # Original PDFs kept in the blob store (blob_store.BlobStore), for quota and LRU eviction
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                file_hash VARCHAR(64) PRIMARY KEY,
+                file_size INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_accessed TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            )
+        ''')
+        
+        # Extraction cache table (keyed by file content, document type and extractor version)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_hash VARCHAR(64) NOT NULL,
+                document_type VARCHAR(50) NOT NULL,
+                extractor_version VARCHAR(20) NOT NULL,
+                extracted_data TEXT,
+                hit_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_accessed TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+                UNIQUE (file_hash, document_type, extractor_version)
+            )
+        ''')
+        
+        # Page-1 layouts without a registered template, collected for onboarding
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS template_fingerprints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fingerprint VARCHAR(64) NOT NULL,
+                document_type VARCHAR(50) NOT NULL,
+                sample_filename VARCHAR(255),
+                labels TEXT,
+                seen_count INTEGER DEFAULT 1,
+                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (fingerprint, document_type)
+            )
+        ''')
+        
+        # Resumable batches: one row per batch plus one row per completed file
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS batch_checkpoints (
+                batch_id VARCHAR(64) PRIMARY KEY,
+                document_type VARCHAR(50) NOT NULL,
+                work_dir TEXT NOT NULL,
+                total_files INTEGER DEFAULT 0,
+                lock_token VARCHAR(32),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Checkpoints created before runs took a lock on their batch have no lock_token column yet
+        cursor.execute('PRAGMA table_info(batch_checkpoints)')
+        if 'lock_token' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE batch_checkpoints ADD COLUMN lock_token VARCHAR(32)')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS batch_checkpoint_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id VARCHAR(64) NOT NULL,
+                position INTEGER NOT NULL,
+                original_name VARCHAR(255),
+                new_name VARCHAR(255),
+                extracted_data TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (batch_id, position),
+                FOREIGN KEY (batch_id) REFERENCES batch_checkpoints (batch_id)
+            )
+        ''')
+        
         # Activity logs table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS activity_logs (
@@ -71,6 +149,18 @@ class DatabaseManager:
             )
         ''')
         
+        # Rows logged with pandas' NaN for missing cells are not valid JSON; store those cells as null.
+        # Only done once per database (the flag row is only inserted the first time), as it scans the whole table
+        cursor.execute('''
+            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description)
+            VALUES ('migration_nan_json_repaired', '1', 'NaN cells in extraction_history rewritten as null')
+        ''')
+        if cursor.rowcount == 1:
+            cursor.execute('''
+                UPDATE extraction_history SET extracted_data = REPLACE(extracted_data, ': NaN', ': null')
+                WHERE NOT json_valid(extracted_data) AND extracted_data LIKE '%: NaN%'
+            ''')
+        
         conn.commit()
         conn.close()
         
@@ -192,8 +282,9 @@ class DatabaseManager:
     
     def log_extraction(self, user_id: int, filename: str, file_size: int,
                       document_type: str, extracted_data: Dict, 
-                      processing_time: float, status: str = "completed") -> int:
-        """Log document extraction"""
+                      processing_time: float, status: str = "completed",
+                      file_hash: Optional[str] = None) -> int:
+        """Log document extraction (file_hash links the original PDF in the blob store)"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
@@ -201,10 +292,10 @@ class DatabaseManager:
             cursor.execute('''
                 INSERT INTO extraction_history 
                 (user_id, filename, file_size, document_type, extraction_status, 
-                 extracted_data, processing_time)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                 extracted_data, processing_time, file_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (user_id, filename, file_size, document_type, status,
-                  json.dumps(extracted_data), processing_time))
+                  json.dumps(extracted_data), processing_time, file_hash))
             
             extraction_id = cursor.lastrowid
             conn.commit()
@@ -223,7 +314,9 @@ class DatabaseManager:
             
             if user_id:
                 cursor.execute('''
-                    SELECT eh.*, u.username 
+                    SELECT eh.id, eh.user_id, eh.filename, eh.file_size, eh.document_type,
+                           eh.extraction_status, eh.extracted_data, eh.processing_time,
+                           eh.created_at, eh.updated_at, u.username, eh.file_hash
                     FROM extraction_history eh
                     JOIN users u ON eh.user_id = u.id
                     WHERE eh.user_id = ?
@@ -232,7 +325,9 @@ class DatabaseManager:
                 ''', (user_id, limit))
             else:
                 cursor.execute('''
-                    SELECT eh.*, u.username 
+                    SELECT eh.id, eh.user_id, eh.filename, eh.file_size, eh.document_type,
+                           eh.extraction_status, eh.extracted_data, eh.processing_time,
+                           eh.created_at, eh.updated_at, u.username, eh.file_hash
                     FROM extraction_history eh
                     JOIN users u ON eh.user_id = u.id
                     ORDER BY eh.created_at DESC
@@ -253,12 +348,489 @@ class DatabaseManager:
                 'processing_time': row[7],
                 'created_at': row[8],
                 'updated_at': row[9],
-                'username': row[10]
+                'username': row[10],
+                'file_hash': row[11]
             } for row in history]
         except Exception as e:
             print(f"Error getting extraction history: {e}")
             return []
     
+    def get_cached_extraction(self, file_hash: str, document_type: str,
+                              extractor_version: str) -> Optional[Dict]:
+        """Look up a cached extraction result and record the hit or miss"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id, extracted_data FROM extraction_cache
+                WHERE file_hash = ? AND document_type = ? AND extractor_version = ?
+            ''', (file_hash, document_type, extractor_version))
+            
+            row = cursor.fetchone()
+            
+            if row:
+                cursor.execute('''
+                    UPDATE extraction_cache
+                    SET hit_count = hit_count + 1,
+                        last_accessed = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                    WHERE id = ?
+                ''', (row[0],))
+            self._increment_counter(cursor, 'extraction_cache_hits' if row else 'extraction_cache_misses')
+            
+            conn.commit()
+            conn.close()
+            return json.loads(row[1]) if row else None
+        except Exception as e:
+            print(f"Error reading extraction cache: {e}")
+            return None
+    
+    def has_cached_extraction(self, file_hash: str, extractor_version: str,
+                              document_type: Optional[str] = None) -> bool:
+        """Check whether document_type (or, when None, any document type) has a cached result for this file"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT 1 FROM extraction_cache
+                WHERE file_hash = ? AND extractor_version = ? AND (? IS NULL OR document_type = ?)
+                LIMIT 1
+            ''', (file_hash, extractor_version, document_type, document_type))
+            
+            found = cursor.fetchone() is not None
+            conn.close()
+            return found
+        except Exception as e:
+            print(f"Error reading extraction cache: {e}")
+            return False
+    
+    def cache_extraction(self, file_hash: str, document_type: str, extractor_version: str,
+                         extracted_data: Dict, max_entries: int = 5000):
+        """Store an extraction result and evict least recently used entries"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO extraction_cache
+                (file_hash, document_type, extractor_version, extracted_data)
+                VALUES (?, ?, ?, ?)
+            ''', (file_hash, document_type, extractor_version, json.dumps(extracted_data)))
+            
+            cursor.execute('''
+                DELETE FROM extraction_cache WHERE id NOT IN (
+                    SELECT id FROM extraction_cache
+                    ORDER BY last_accessed DESC, id DESC
+                    LIMIT ?
+                )
+            ''', (max_entries,))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error writing extraction cache: {e}")
+    
+    def clear_extraction_cache(self):
+        """Remove all cached extraction results and reset the counters"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('DELETE FROM extraction_cache')
+            cursor.execute('''
+                DELETE FROM system_settings
+                WHERE setting_key IN ('extraction_cache_hits', 'extraction_cache_misses')
+            ''')
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error clearing extraction cache: {e}")
+    
+    def get_extraction_cache_stats(self) -> Dict:
+        """Get extraction cache size and hit/miss counters"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT COUNT(*) FROM extraction_cache')
+            entries = cursor.fetchone()[0]
+            
+            cursor.execute('''
+                SELECT setting_key, setting_value FROM system_settings
+                WHERE setting_key IN ('extraction_cache_hits', 'extraction_cache_misses')
+            ''')
+            counters = {key: int(value) for key, value in cursor.fetchall()}
+            conn.close()
+            
+            hits = counters.get('extraction_cache_hits', 0)
+            misses = counters.get('extraction_cache_misses', 0)
+            lookups = hits + misses
+            
+            return {
+                'entries': entries,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': (hits / lookups * 100) if lookups else 0.0
+            }
+        except Exception as e:
+            print(f"Error getting extraction cache stats: {e}")
+            return {}
+    
+    def get_processing_rates(self, document_type: str, limit: int = 500) -> Dict:
+        """Average seconds per file of recent completed extractions, by text layer"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT COALESCE(json_extract(extracted_data, '$."Lapisan Teks"'), 'digital') AS layer,
+                       AVG(processing_time), COUNT(*)
+                FROM (
+                    SELECT extracted_data, processing_time FROM extraction_history
+                    WHERE document_type = ? AND extraction_status = 'completed'
+                      AND processing_time > 0
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                )
+                GROUP BY layer
+            ''', (document_type, limit))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return {row[0]: {'seconds_per_file': row[1], 'samples': row[2]} for row in rows}
+        except Exception as e:
+            print(f"Error getting processing rates: {e}")
+            return {}
+    
+    def log_unknown_template(self, fingerprint: str, document_type: str,
+                             filename: str, labels: List[Dict]):
+        """Record a page layout that matched no registered template"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO template_fingerprints (fingerprint, document_type, sample_filename, labels)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (fingerprint, document_type) DO UPDATE SET
+                    seen_count = seen_count + 1,
+                    last_seen = CURRENT_TIMESTAMP
+            ''', (fingerprint, document_type, filename, json.dumps(labels)))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error logging unknown template: {e}")
+    
+    def get_unknown_templates(self, limit: int = 50) -> List[Dict]:
+        """Get unregistered page layouts, most frequently seen first"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT fingerprint, document_type, sample_filename, labels,
+                       seen_count, first_seen, last_seen
+                FROM template_fingerprints
+                ORDER BY seen_count DESC, last_seen DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return [{
+                'fingerprint': row[0],
+                'document_type': row[1],
+                'sample_filename': row[2],
+                'labels': json.loads(row[3]) if row[3] else [],
+                'seen_count': row[4],
+                'first_seen': row[5],
+                'last_seen': row[6]
+            } for row in rows]
+        except Exception as e:
+            print(f"Error getting unknown templates: {e}")
+            return []
+    
+    def record_retry(self, strategy: str, succeeded: bool):
+        """Count one retry attempt of a failed file and whether that strategy recovered it"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            self._increment_counter(cursor, f'retry_{strategy}_attempts')
+            if succeeded:
+                self._increment_counter(cursor, f'retry_{strategy}_successes')
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error recording retry: {e}")
+    
+    def get_retry_stats(self) -> Dict:
+        """Get attempts and successes per retry strategy"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT setting_key, setting_value FROM system_settings
+                WHERE setting_key LIKE 'retry_%'
+            ''')
+            rows = cursor.fetchall()
+            conn.close()
+            
+            stats = {}
+            for key, value in rows:
+                strategy, _, counter = key[len('retry_'):].rpartition('_')
+                stats.setdefault(strategy, {'attempts': 0, 'successes': 0})[counter] = int(value)
+            return stats
+        except Exception as e:
+            print(f"Error getting retry stats: {e}")
+            return {}
+    
+    def start_batch_checkpoint(self, batch_id: str, document_type: str, work_dir: str, total_files: int,
+                               lock_token: str, lease_seconds: int = 600) -> Optional[Dict[int, Dict]]:
+        """
+        Open a batch checkpoint for the run holding lock_token and return the
+        files already completed, by position
+        
+        Returns None when another run holds the batch and has updated it
+        within the last lease_seconds.
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            # Take the batch unless another run holds it and has touched it within the lease
+            cursor.execute('''
+                INSERT INTO batch_checkpoints (batch_id, document_type, work_dir, total_files, lock_token)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (batch_id) DO UPDATE SET
+                    work_dir = excluded.work_dir,
+                    total_files = excluded.total_files,
+                    lock_token = excluded.lock_token,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE batch_checkpoints.lock_token IS NULL
+                   OR batch_checkpoints.updated_at < datetime('now', ?)
+            ''', (batch_id, document_type, work_dir, total_files, lock_token, f'-{int(lease_seconds)} seconds'))
+            if cursor.rowcount == 0:
+                conn.close()
+                return None
+            
+            cursor.execute('''
+                SELECT position, original_name, new_name, extracted_data
+                FROM batch_checkpoint_files WHERE batch_id = ?
+            ''', (batch_id,))
+            rows = cursor.fetchall()
+            
+            conn.commit()
+            conn.close()
+            
+            return {row[0]: {
+                'original_name': row[1],
+                'new_name': row[2],
+                'extracted_data': json.loads(row[3]) if row[3] else None
+            } for row in rows}
+        except Exception as e:
+            print(f"Error starting batch checkpoint: {e}")
+            return {}
+    
+    def get_batch_checkpoint_progress(self, batch_id: str) -> int:
+        """Count the completed files recorded for a batch"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT COUNT(*) FROM batch_checkpoint_files WHERE batch_id = ?
+            ''', (batch_id,))
+            
+            completed = cursor.fetchone()[0]
+            conn.close()
+            return completed
+        except Exception as e:
+            print(f"Error reading batch checkpoint: {e}")
+            return 0
+    
+    def save_checkpoint_file(self, batch_id: str, position: int, original_name: str,
+                             new_name: str, extracted_data: Optional[Dict]):
+        """Record one completed file of a batch"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO batch_checkpoint_files
+                (batch_id, position, original_name, new_name, extracted_data)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (batch_id, position, original_name, new_name,
+                  json.dumps(extracted_data) if extracted_data is not None else None))
+            cursor.execute('''
+                UPDATE batch_checkpoints SET updated_at = CURRENT_TIMESTAMP WHERE batch_id = ?
+            ''', (batch_id,))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving batch checkpoint: {e}")
+    
+    def set_batch_checkpoint_total(self, batch_id: str, total_files: int):
+        """Update the number of documents in a batch (known once it has been split)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('UPDATE batch_checkpoints SET total_files = ? WHERE batch_id = ?',
+                           (total_files, batch_id))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error updating batch checkpoint: {e}")
+    
+    def release_batch_checkpoint(self, batch_id: str, lock_token: str):
+        """Give up a run's lock on a batch so another run can resume it"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE batch_checkpoints SET lock_token = NULL WHERE batch_id = ? AND lock_token = ?
+            ''', (batch_id, lock_token))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error releasing batch checkpoint: {e}")
+    
+    def delete_batch_checkpoint(self, batch_id: str):
+        """Forget a batch checkpoint and its completed files"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('DELETE FROM batch_checkpoint_files WHERE batch_id = ?', (batch_id,))
+            cursor.execute('DELETE FROM batch_checkpoints WHERE batch_id = ?', (batch_id,))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error deleting batch checkpoint: {e}")
+    
+    def get_stale_batch_checkpoints(self, max_age_days: int) -> List[Dict]:
+        """List batch checkpoints not touched for more than max_age_days"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT batch_id, work_dir FROM batch_checkpoints
+                WHERE updated_at < datetime('now', ?)
+            ''', (f'-{int(max_age_days)} days',))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            return [{'batch_id': row[0], 'work_dir': row[1]} for row in rows]
+        except Exception as e:
+            print(f"Error listing batch checkpoints: {e}")
+            return []
+    
+    def record_blob(self, file_hash: str, file_size: int):
+        """Register a PDF stored in the blob store, or mark an existing one as just used"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO blobs (file_hash, file_size) VALUES (?, ?)
+                ON CONFLICT (file_hash) DO UPDATE SET
+                    last_accessed = strftime('%Y-%m-%d %H:%M:%f', 'now')
+            ''', (file_hash, file_size))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error recording blob: {e}")
+    
+    def touch_blob(self, file_hash: str) -> bool:
+        """Mark a stored PDF as just used; False if the blob store does not have it"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE blobs SET last_accessed = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE file_hash = ?
+            ''', (file_hash,))
+            
+            found = cursor.rowcount > 0
+            conn.commit()
+            conn.close()
+            return found
+        except Exception as e:
+            print(f"Error touching blob: {e}")
+            return False
+    
+    def get_blob_usage(self) -> Dict:
+        """Number and total size of the PDFs in the blob store"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM blobs')
+            count, total = cursor.fetchone()
+            conn.close()
+            return {'blobs': count, 'bytes': total}
+        except Exception as e:
+            print(f"Error getting blob usage: {e}")
+            return {'blobs': 0, 'bytes': 0}
+    
+    def get_lru_blobs(self, limit: int = 100) -> List[Dict]:
+        """Least recently used PDFs in the blob store, oldest first"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT file_hash, file_size FROM blobs
+                ORDER BY last_accessed ASC
+                LIMIT ?
+            ''', (limit,))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            return [{'file_hash': row[0], 'file_size': row[1]} for row in rows]
+        except Exception as e:
+            print(f"Error listing blobs: {e}")
+            return []
+    
+    def delete_blob(self, file_hash: str):
+        """Forget a PDF evicted from the blob store"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('DELETE FROM blobs WHERE file_hash = ?', (file_hash,))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error deleting blob: {e}")
+    
+    def _increment_counter(self, cursor, setting_key: str):
+        """Increment an integer counter stored in system_settings"""
+        cursor.execute('''
+            INSERT INTO system_settings (setting_key, setting_value)
+            VALUES (?, '1')
+            ON CONFLICT(setting_key) DO UPDATE SET
+                setting_value = CAST(setting_value AS INTEGER) + 1,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (setting_key,))
+    
     def log_activity(self, user_id: Optional[int], action: str, 
                     details: str = "", ip_address: str = "", 
                     user_agent: str = ""):
@@ -342,6 +914,23 @@ class DatabaseManager:
                 cursor.execute('SELECT COUNT(*) FROM extraction_history WHERE extraction_status = "completed"')
             stats['successful_extractions'] = cursor.fetchone()[0]
             
+            # Extractions aborted for breaching the per-file time or memory limit
+            if user_id:
+                cursor.execute('''SELECT COUNT(*) FROM extraction_history 
+                                WHERE user_id = ? AND extraction_status IN ("timeout", "memory")''', (user_id,))
+            else:
+                cursor.execute('SELECT COUNT(*) FROM extraction_history WHERE extraction_status IN ("timeout", "memory")')
+            stats['aborted_extractions'] = cursor.fetchone()[0]
+            
+            # Extractions of scanned or mixed PDFs, i.e. the volume that needs OCR
+            text_layer = '''json_extract(extracted_data, '$."Lapisan Teks"')'''
+            if user_id:
+                cursor.execute(f'''SELECT COUNT(*) FROM extraction_history 
+                                WHERE user_id = ? AND {text_layer} IN ("scanned", "mixed")''', (user_id,))
+            else:
+                cursor.execute(f'SELECT COUNT(*) FROM extraction_history WHERE {text_layer} IN ("scanned", "mixed")')
+            stats['ocr_extractions'] = cursor.fetchone()[0]
+            
             # Total users (admin only)
             if not user_id:
                 cursor.execute('SELECT COUNT(*) FROM users WHERE is_active = 1')
@@ -1,8 +1,243 @@
 import re
 import pdfplumber
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from helpers import clean_text, format_date, split_birth_place_date
 
+# Bump whenever extraction output changes so cached results are invalidated
+EXTRACTOR_VERSION = "2"
+
+# Fields that must be present for an extraction to count as complete
+REQUIRED_FIELDS = {
+    "SKTT": ["NIK", "Name", "Date Issue"],
+    "EVLN": ["Name", "Passport No"],
+    "ITAS": ["Name", "Permit Number", "Passport Number"],
+    "ITK": ["Name", "Permit Number", "Passport Number"],
+    "NOTIFIKASI": ["Nomor Keputusan", "Nama TKA", "Nomor Paspor"],
+    "DKPTKA": [
+        "Nama Pemberi Kerja",
+        "Nama TKA",
+        "Nomor Paspor",
+        "Kewarganegaraan",
+        "Jabatan",
+        "DKPTKA"
+    ],
+}
+
+def get_required_fields(document_type: str) -> list:
+    """Return the required field names for a document type"""
+    type_key = document_type.upper()
+    if type_key == "NOTIFICATION":
+        type_key = "NOTIFIKASI"
+    return REQUIRED_FIELDS.get(type_key, [])
+
+def missing_required_fields(extracted_data: Dict, document_type: str) -> list:
+    """Return the required fields that are empty in the extracted data"""
+    return [field for field in get_required_fields(document_type) if not extracted_data.get(field)]
+
+class IncrementalExtractor:
+    """
+    Consume document text page by page and report when the required fields
+    for the document type have all been found, so the caller can stop
+    parsing further pages
+    
+    Each page is extracted on its own (together with the page before it, for
+    values that straddle a page break) and fills the fields that are still
+    empty, so feeding n pages costs O(n). When the required fields are never
+    all found, result runs the extractor once over the full text instead.
+    """
+    
+    def __init__(self, document_type: str, extract=None):
+        self.document_type = document_type
+        self.extract = extract or (lambda text: extract_document_data(text, document_type))
+        self.required_fields = get_required_fields(document_type)
+        self.pages = []
+        self._data = None
+        self._full = None  # (page count, result) of the last full-text extraction
+    
+    def feed(self, page_text: str) -> bool:
+        """Add the next page's text; return True once all required fields are present"""
+        previous = self.pages[-1] if self.pages else ""
+        self.pages.append(page_text or "")
+        if not self.required_fields:
+            # Nothing to check against, so completion can only be known at the end
+            return False
+        if not page_text:
+            return self.is_complete
+        
+        data = self.extract("\n".join(page for page in (previous, page_text) if page))
+        if self._data is None:
+            self._data = dict(data)
+        else:
+            for key, value in data.items():
+                if value and not self._data.get(key):
+                    self._data[key] = value
+        return self.is_complete
+    
+    @property
+    def text(self) -> str:
+        return "\n".join(page for page in self.pages if page)
+    
+    @property
+    def is_complete(self) -> bool:
+        return (
+            bool(self.required_fields)
+            and self._data is not None
+            and not missing_required_fields(self._data, self.document_type)
+        )
+    
+    @property
+    def result(self) -> Dict:
+        """Extraction result for the pages consumed so far"""
+        if self.is_complete:
+            return self._data
+        if self._full is None or self._full[0] != len(self.pages):
+            self._full = (len(self.pages), self.extract(self.text))
+        return self._full[1]
+
+class WordIndex:
+    """
+    Words of one page indexed by position for label/value lookups
+    
+    Built from pdfplumber's extract_words(). Words are bucketed into a grid
+    of cell x cell points and into a dict keyed by their lowercased text, so
+    finding a label and the words beside it only touches a few grid cells
+    instead of scanning the whole page text.
+    """
+    
+    def __init__(self, words, cell: float = 20.0):
+        self.cell = cell
+        self.words = [
+            {'text': w['text'], 'x0': w['x0'], 'x1': w['x1'], 'top': w['top'], 'bottom': w['bottom']}
+            for w in words
+        ]
+        self.right = max((w['x1'] for w in self.words), default=0)
+        self.grid = {}
+        self.by_text = {}
+        for i, word in enumerate(self.words):
+            for key in self._cells(word['x0'], word['top'], word['x1'], word['bottom']):
+                self.grid.setdefault(key, []).append(i)
+            self.by_text.setdefault(self._token(word['text']), []).append(i)
+    
+    @staticmethod
+    def _token(text):
+        return text.strip(':').lower()
+    
+    def _cells(self, x0, top, x1, bottom):
+        for row in range(int(top // self.cell), int(bottom // self.cell) + 1):
+            for col in range(int(x0 // self.cell), int(x1 // self.cell) + 1):
+                yield col, row
+    
+    def _in_box(self, x0, top, x1, bottom):
+        """Indices of words overlapping a box, looked up through the grid"""
+        found = set()
+        for key in self._cells(max(x0, 0), max(top, 0), x1, bottom):
+            found.update(self.grid.get(key, ()))
+        return found
+    
+    def find_label(self, label: str) -> Optional[Dict]:
+        """Bounding box of the first occurrence of a (possibly multi-word) label"""
+        tokens = [self._token(t) for t in label.split()]
+        for start in self.by_text.get(tokens[0], ()):
+            box = dict(self.words[start])
+            for token in tokens[1:]:
+                following = self._line_after(box, gap=box['bottom'] - box['top'])
+                if not following or self._token(self.words[following[0]]['text']) != token:
+                    break
+                box['x1'] = self.words[following[0]]['x1']
+            else:
+                return box
+        return None
+    
+    def _line_after(self, box, gap: float = None):
+        """Word indices on the same line as box and to its right (within gap points), in reading order"""
+        middle = (box['top'] + box['bottom']) / 2
+        right_edge = min(self.right, box['x1'] + gap) if gap is not None else self.right
+        candidates = [
+            i for i in self._in_box(box['x1'], middle, right_edge, middle)
+            if self.words[i]['x0'] >= box['x1'] - 1 and self.words[i]['top'] <= middle <= self.words[i]['bottom']
+        ]
+        return sorted(candidates, key=lambda i: self.words[i]['x0'])
+    
+    def label_anchors(self) -> List[Dict]:
+        """
+        The words that end a label (the word before each ':') with their boxes
+        
+        Labels are printed by the form rather than filled in, so their
+        positions identify the layout a page was made from.
+        """
+        anchors = []
+        for word in self.words:
+            if word['text'].endswith(':') and word['text'] != ':':
+                label = word
+            elif word['text'].startswith(':'):
+                # Separate colon (or ':value'): the label ends at the nearest word to its left
+                middle = (word['top'] + word['bottom']) / 2
+                before = [
+                    i for i in self._in_box(0, middle, word['x0'], middle)
+                    if self.words[i]['x1'] <= word['x0'] + 1 and self.words[i]['top'] <= middle <= self.words[i]['bottom']
+                ]
+                if not before:
+                    continue
+                label = self.words[max(before, key=lambda i: self.words[i]['x1'])]
+            else:
+                continue
+            anchors.append({
+                'label': self._token(label['text']),
+                'x0': label['x0'], 'x1': label['x1'], 'top': label['top'], 'bottom': label['bottom'],
+            })
+        return anchors
+    
+    def right_of(self, label: str, max_gap: float = 20.0) -> Optional[str]:
+        """
+        Text to the right of a label on the same line
+        
+        A ':' separator is skipped; the value ends at the first horizontal gap
+        wider than max_gap points.
+        """
+        box = self.find_label(label)
+        if box is None:
+            return None
+        parts = []
+        last_x1 = None
+        for i in self._line_after(box):
+            word = self.words[i]
+            text = word['text'] if parts else word['text'].lstrip(':').strip()
+            if not text:
+                continue  # the separator
+            if last_x1 is not None and word['x0'] - last_x1 > max_gap:
+                break
+            parts.append(text)
+            last_x1 = word['x1']
+        return " ".join(parts) or None
+    
+    def line_above(self, label: str, max_distance: float = None) -> Optional[str]:
+        """Text of the nearest line above a label, from the label's column rightwards"""
+        box = self.find_label(label)
+        if box is None:
+            return None
+        height = box['bottom'] - box['top']
+        max_distance = max_distance if max_distance is not None else height * 3
+        above = [
+            i for i in self._in_box(box['x0'], box['top'] - max_distance, self.right, box['top'])
+            if self.words[i]['bottom'] <= box['top'] + 1 and self.words[i]['x1'] > box['x0']
+        ]
+        if not above:
+            return None
+        nearest = max(self.words[i]['bottom'] for i in above)
+        line = [i for i in above if self.words[i]['top'] <= nearest - height / 2 <= self.words[i]['bottom']]
+        return " ".join(self.words[i]['text'] for i in sorted(line, key=lambda i: self.words[i]['x0']))
+    
+    @property
+    def text(self) -> str:
+        """Page text rebuilt line by line from the word positions"""
+        lines = []
+        for word in sorted(self.words, key=lambda w: (round(w['top']), w['x0'])):
+            if lines and abs(word['top'] - lines[-1][0]) <= (word['bottom'] - word['top']) / 2:
+                lines[-1][1].append(word['text'])
+            else:
+                lines.append((word['top'], [word['text']]))
+        return "\n".join(" ".join(words) for _, words in lines)
+
 # ========================= Ekstraksi SKTT =========================
 def extract_sktt(text):
     import re
@@ -132,6 +367,28 @@ def extract_evln(text):
     
     return data
     
+def extract_permit_issue_date(text):
+    """Date Issue of an ITAS/ITK: the "City, DD Month YYYY" line near the signature"""
+    date_issue_match = re.search(r"([A-Za-z]+),\s*(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})", text)
+    if date_issue_match:
+        day = date_issue_match.group(2)
+        month = date_issue_match.group(3)
+        year = date_issue_match.group(4)
+        # Convert month name to number
+        month_dict = {
+            'January': '01', 'February': '02', 'March': '03', 'April': '04',
+            'May': '05', 'June': '06', 'July': '07', 'August': '08',
+            'September': '09', 'October': '10', 'November': '11', 'December': '12'
+        }
+        month_num = month_dict.get(month, month)
+        date_str = f"{day.zfill(2)}/{month_num}/{year}"
+        return format_date(date_str)
+    # Fallback: cari pattern tanggal lain di dokumen
+    fallback_date_match = re.search(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})", text)
+    if fallback_date_match:
+        return format_date(fallback_date_match.group(0))
+    return None
+
 # ========================= Ekstraksi ITAS =========================
 def extract_itas(text):
     data = {}
@@ -186,27 +443,7 @@ def extract_itas(text):
     data["Guarantor"] = guarantor_match.group(1).strip() if guarantor_match else None
     
     # Extract Date Issue - mencari tanggal di bagian bawah dokumen
-    date_issue_match = re.search(r"([A-Za-z]+),\s*(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})", text)
-    if date_issue_match:
-        day = date_issue_match.group(2)
-        month = date_issue_match.group(3)
-        year = date_issue_match.group(4)
-        # Convert month name to number
-        month_dict = {
-            'January': '01', 'February': '02', 'March': '03', 'April': '04',
-            'May': '05', 'June': '06', 'July': '07', 'August': '08',
-            'September': '09', 'October': '10', 'November': '11', 'December': '12'
-        }
-        month_num = month_dict.get(month, month)
-        date_str = f"{day.zfill(2)}/{month_num}/{year}"
-        data["Date Issue"] = format_date(date_str)
-    else:
-        # Fallback: cari pattern tanggal lain di dokumen
-        fallback_date_match = re.search(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})", text)
-        if fallback_date_match:
-            data["Date Issue"] = format_date(fallback_date_match.group(0))
-        else:
-            data["Date Issue"] = None
+    data["Date Issue"] = extract_permit_issue_date(text)
     
     data["Jenis Dokumen"] = "ITAS"
     return data
@@ -265,31 +502,64 @@ def extract_itk(text):
     data["Guarantor"] = guarantor_match.group(1).strip() if guarantor_match else None
     
     # Extract Date Issue - mencari tanggal di bagian bawah dokumen
-    date_issue_match = re.search(r"([A-Za-z]+),\s*(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})", text)
-    if date_issue_match:
-        day = date_issue_match.group(2)
-        month = date_issue_match.group(3)
-        year = date_issue_match.group(4)
-        # Convert month name to number
-        month_dict = {
-            'January': '01', 'February': '02', 'March': '03', 'April': '04',
-            'May': '05', 'June': '06', 'July': '07', 'August': '08',
-            'September': '09', 'October': '10', 'November': '11', 'December': '12'
-        }
-        month_num = month_dict.get(month, month)
-        date_str = f"{day.zfill(2)}/{month_num}/{year}"
-        data["Date Issue"] = format_date(date_str)
-    else:
-        # Fallback: cari pattern tanggal lain di dokumen
-        fallback_date_match = re.search(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})", text)
-        if fallback_date_match:
-            data["Date Issue"] = format_date(fallback_date_match.group(0))
-        else:
-            data["Date Issue"] = None
+    data["Date Issue"] = extract_permit_issue_date(text)
     
     data["Jenis Dokumen"] = "ITK"
     return data
 
+# ========================= Ekstraksi ITAS/ITK berbasis posisi =========================
+def _extract_permit_layout(indexes, document_type):
+    """Pair ITAS/ITK labels with the value printed to their right (one WordIndex per page)"""
+    def value(label, first_word=False):
+        for index in indexes:
+            found = index.right_of(label)
+            if found:
+                return found.split()[0] if first_word else found
+        return None
+    
+    data = {}
+    
+    # The holder's name is the line printed above PERMIT NUMBER
+    data["Name"] = next((name for name in (index.line_above("PERMIT NUMBER") for index in indexes) if name), None)
+    data["Permit Number"] = value("PERMIT NUMBER", first_word=True)
+    
+    expiry = value("STAY PERMIT EXPIRY", first_word=True)
+    data["Stay Permit Expiry"] = format_date(expiry) if expiry else None
+    
+    place_date_birth = value("Place / Date of Birth")
+    if place_date_birth and "/" in place_date_birth:
+        place, date = place_date_birth.rsplit("/", 1)
+        data["Place & Date of Birth"] = f"{place.strip()}, {format_date(date.strip())}"
+    else:
+        data["Place & Date of Birth"] = None
+    
+    data["Passport Number"] = value("Passport Number", first_word=True)
+    passport_expiry = value("Passport Expiry", first_word=True)
+    data["Passport Expiry"] = format_date(passport_expiry) if passport_expiry else None
+    data["Nationality"] = value("Nationality", first_word=True)
+    data["Gender"] = value("Gender", first_word=True)
+    data["Address"] = value("Address")
+    data["Occupation"] = value("Occupation")
+    data["Guarantor"] = value("Guarantor")
+    
+    # The issue date has no label, so it is still found in the text
+    data["Date Issue"] = extract_permit_issue_date("\n".join(index.text for index in indexes))
+    
+    data["Jenis Dokumen"] = document_type
+    return data
+
+def extract_itas_layout(indexes):
+    return _extract_permit_layout(indexes, "ITAS")
+
+def extract_itk_layout(indexes):
+    return _extract_permit_layout(indexes, "ITK")
+
+# Extractors that read WordIndex pages instead of flattened text
+LAYOUT_EXTRACTORS = {
+    "ITAS": extract_itas_layout,
+    "ITK": extract_itk_layout,
+}
+
 # ========================= Ekstraksi Notifikasi =========================
 def extract_notifikasi(text):
     data = {
@@ -709,19 +979,7 @@ def validate_dkptka_data(extracted_data: Dict) -> Dict[str, str]:
     }
     
     # Required fields for DKPTKA
-    required_fields = [
-        "Nama Pemberi Kerja",
-        "Nama TKA",
-        "Nomor Paspor",
-        "Kewarganegaraan",
-        "Jabatan",
-        "DKPTKA"
-    ]
-    
-    missing_fields = []
-    for field in required_fields:
-        if not extracted_data.get(field):
-            missing_fields.append(field)
+    missing_fields = missing_required_fields(extracted_data, "DKPTKA")
     
     if missing_fields:
         validation_result["status"] = "incomplete"
@@ -758,6 +1016,7 @@ def extract_document_data(text: str, document_type: str) -> Dict:
         "ITAS": extract_itas,
         "ITK": extract_itk,
         "NOTIFIKASI": extract_notifikasi,
+        "NOTIFICATION": extract_notifikasi,
         "DKPTKA": extract_dkptka_info
     }
     
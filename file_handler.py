@@ -4,22 +4,66 @@ Handles PDF processing, extraction, and file management
 """
 
 import os
+import re
+import csv
 import tempfile
 import shutil
 import zipfile
 import io
+import mmap
+import time
+import hashlib
+import heapq
+import statistics
+import threading
+import queue
+import signal
+import weakref
+import uuid
+import multiprocessing
+import multiprocessing.connection
 import pdfplumber
 import pandas as pd
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import LTChar
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
 from pathlib import Path
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:
+    resource = None  # not available on Windows; memory limits are then not enforced
+
+try:
+    from PyPDF2 import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None  # scanned PDFs cannot be read without it
 
 # Import extractors with fallback
 try:
     from extractors import (
         extract_sktt, extract_evln, extract_itas, extract_itk, 
-        extract_notifikasi, extract_dkptka_info, extract_document_data
+        extract_notifikasi, extract_dkptka_info, extract_document_data,
+        missing_required_fields, IncrementalExtractor, EXTRACTOR_VERSION,
+        WordIndex, LAYOUT_EXTRACTORS
     )
 except ImportError as e:
     print(f"Warning: Could not import extractors: {e}")
+    EXTRACTOR_VERSION = "0"
+    IncrementalExtractor = None
+    WordIndex = None
+    LAYOUT_EXTRACTORS = {}
+    def missing_required_fields(extracted_data, document_type): return []
     # Fallback functions
     def extract_sktt(text): return {"Error": "Extractor not available"}
     def extract_evln(text): return {"Error": "Extractor not available"}
@@ -29,196 +73,2615 @@ except ImportError as e:
     def extract_dkptka_info(text): return {"Error": "Extractor not available"}
     def extract_document_data(text, doc_type): return {"Error": "Extractor not available"}
 
-# Import helpers with fallback
-try:
-    from helpers import generate_new_filename
-except ImportError:
-    def generate_new_filename(extracted_data, use_name=True, use_passport=True):
-        """Fallback filename generator"""
-        name = extracted_data.get('Name') or extracted_data.get('Nama TKA') or 'Unknown'
-        passport = extracted_data.get('Passport Number') or extracted_data.get('Nomor Paspor') or 'NoPassport'
-        doc_type = extracted_data.get('Jenis Dokumen', 'DOC')
-        
-        parts = [doc_type]
-        if use_name and name != 'Unknown':
-            parts.append(name.replace(' ', '_'))
-        if use_passport and passport != 'NoPassport':
-            parts.append(passport)
+# Import processing configuration with fallback
+try:
+    from config import APP_CONFIG, PROCESSING_CONFIG, CACHE_CONFIG, DOCUMENT_TYPES, DOCUMENT_TEMPLATES
+except ImportError:
+    APP_CONFIG = {'max_file_size': 500 * 1024 * 1024}
+    DOCUMENT_TYPES = {}
+    DOCUMENT_TEMPLATES = {}
+    PROCESSING_CONFIG = {
+        'parallel': True,
+        'max_workers': None,
+        'parallel_min_files': 4,
+        'auto_backends': ['pypdf2', 'pdfplumber'],
+        'spool_dir': None,
+        'file_timeout': 120,
+        'warm_stop_timeout': 5,
+        'worker_start_method': 'forkserver',
+        'file_memory_limit': 1024 * 1024 * 1024,
+        'early_exit': False,
+        'page_shard_threshold': 50,
+        'pages_per_shard': 10,
+        'ocr_language': 'ind+eng',
+        'ocr_resolution': 300,
+        'split_documents': False,
+        'template_matching': True,
+        'template_onboarding': False,
+        'template_grid': 5,
+        'writer_queue_size': 16,
+        'chunk_size': 200,
+        'chunk_threshold': 500,
+        'stream_refresh_rows': 25,
+        'stream_refresh_seconds': 1.0,
+        'shortest_first': True,
+        'background_parsing': True,
+        'retry_failed': True,
+        'checkpoint_batches': True,
+        'checkpoint_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'checkpoints'),
+        'checkpoint_max_age_days': 7,
+        'checkpoint_lease_seconds': 600,
+    }
+    CACHE_CONFIG = {
+        'enabled': True,
+        'max_entries': 5000,
+    }
+
+# Import helpers with fallback
+try:
+    from helpers import generate_new_filename, format_date
+except ImportError:
+    def format_date(date_str): return date_str
+
+    def generate_new_filename(extracted_data, use_name=True, use_passport=True):
+        """Fallback filename generator"""
+        name = extracted_data.get('Name') or extracted_data.get('Nama TKA') or 'Unknown'
+        passport = extracted_data.get('Passport Number') or extracted_data.get('Nomor Paspor') or 'NoPassport'
+        doc_type = extracted_data.get('Jenis Dokumen', 'DOC')
+        
+        parts = [doc_type]
+        if use_name and name != 'Unknown':
+            parts.append(name.replace(' ', '_'))
+        if use_passport and passport != 'NoPassport':
+            parts.append(passport)
+        
+        return '_'.join(parts) + '.pdf'
+
+# Number of times a PDF has been opened by a parser (pdfplumber, PyPDF2 or pdfminer),
+# in this process or in its worker processes
+_parse_count = 0
+_parse_count_lock = threading.Lock()
+
+def get_parse_count():
+    """Return how many times a PDF has been opened by a parser since the last reset"""
+    return _parse_count
+
+def reset_parse_count():
+    """Reset the PDF parse counter"""
+    global _parse_count
+    with _parse_count_lock:
+        _parse_count = 0
+
+# Attempts and successes per retry strategy since the last reset
+_retry_counts = {}
+
+def get_retry_stats():
+    """Return {strategy: {'attempts': n, 'successes': n}} since the last reset"""
+    return {strategy: dict(counts) for strategy, counts in _retry_counts.items()}
+
+def reset_retry_stats():
+    """Reset the retry counters"""
+    _retry_counts.clear()
+
+def _increment_parse_count(opens=1):
+    global _parse_count
+    with _parse_count_lock:
+        _parse_count += opens
+
+# ========================= Text extraction backends =========================
+class TextBackend:
+    """
+    Interface for a page text extraction engine.
+
+    A backend opens a PDF stream into a handle and extracts the text of
+    individual pages from it. Backends are listed in TEXT_BACKENDS and chosen
+    per document type via DOCUMENT_TYPES[...]['text_backend'].
+    """
+    name = None
+
+    def open(self, stream):
+        """Open a seekable binary stream positioned anywhere"""
+        raise NotImplementedError
+
+    def page_count(self, handle) -> int:
+        raise NotImplementedError
+
+    def metadata(self, handle) -> Dict:
+        return {}
+
+    def extract_page(self, handle, index: int) -> str:
+        raise NotImplementedError
+
+    def page_layers(self, handle):
+        """Per-page 'text', 'image' or 'blank' from the page resources, or None if unknown"""
+        return None
+
+    def close(self, handle):
+        pass
+
+class PdfplumberBackend(TextBackend):
+    """pdfplumber with full layout analysis (slowest, most faithful line order)"""
+    name = 'pdfplumber'
+
+    def open(self, stream):
+        _increment_parse_count()
+        return pdfplumber.open(stream)
+
+    def page_count(self, handle):
+        return len(handle.pages)
+
+    def metadata(self, handle):
+        return dict(handle.metadata or {})
+
+    def extract_page(self, handle, index):
+        page = handle.pages[index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            # pdfplumber keeps a page's layout objects until the PDF is closed;
+            # drop them now so memory stays flat across long documents
+            page.close()
+
+    def page_layers(self, handle):
+        # Only the resource dictionaries are read, no content stream is parsed
+        return [_resources_layer(page.page_obj.resources) for page in handle.pages]
+
+    def close(self, handle):
+        handle.close()
+
+def _resources_layer(resources, depth=0):
+    """Classify a page (or form XObject) by its resources: fonts mean a text layer"""
+    resources = resolve1(resources) or {}
+    if resolve1(resources.get('Font')):
+        return 'text'
+    layer = 'blank'
+    for xobject in (resolve1(resources.get('XObject')) or {}).values():
+        xobject = resolve1(xobject)
+        attrs = getattr(xobject, 'attrs', {})
+        subtype = getattr(resolve1(attrs.get('Subtype')), 'name', None)
+        if subtype == 'Image':
+            layer = 'image'
+        elif subtype == 'Form' and depth < 3:
+            nested = _resources_layer(attrs.get('Resources'), depth + 1)
+            if nested == 'text':
+                return 'text'
+            if nested == 'image':
+                layer = 'image'
+    return layer
+
+class OcrBackend(PdfplumberBackend):
+    """Tesseract OCR over page images rendered by pdfplumber (for pages without a text layer)"""
+    name = 'ocr'
+
+    def open(self, stream):
+        if pytesseract is None:
+            raise ImportError("pytesseract is not installed")
+        return super().open(stream)
+
+    def extract_page(self, handle, index):
+        page = handle.pages[index]
+        try:
+            image = page.to_image(resolution=PROCESSING_CONFIG.get('ocr_resolution', 300)).original
+            return pytesseract.image_to_string(image, lang=PROCESSING_CONFIG.get('ocr_language', 'ind+eng'))
+        finally:
+            page.close()
+
+class PyPDF2Backend(TextBackend):
+    """PyPDF2 content-stream text extraction (fast, no layout analysis)"""
+    name = 'pypdf2'
+
+    def open(self, stream):
+        if PdfReader is None:
+            raise ImportError("PyPDF2 is not installed")
+        _increment_parse_count()
+        return PdfReader(stream)
+
+    def page_count(self, handle):
+        return len(handle.pages)
+
+    def metadata(self, handle):
+        return {key.lstrip('/'): str(value) for key, value in (handle.metadata or {}).items()}
+
+    def extract_page(self, handle, index):
+        return handle.pages[index].extract_text() or ""
+
+class _RawTextDevice(PDFLayoutAnalyzer):
+    """Collects characters in content-stream order without layout analysis"""
+
+    def __init__(self, rsrcmgr):
+        super().__init__(rsrcmgr, laparams=None)
+        self.text = ""
+
+    def receive_layout(self, ltpage):
+        parts = []
+        last = None
+        for item in ltpage:
+            if not isinstance(item, LTChar):
+                continue
+            if last is not None:
+                # Break lines on a baseline change, add a space for a wide gap
+                if abs(item.y0 - last.y0) > last.height / 2:
+                    parts.append("\n")
+                elif item.x0 - last.x1 > last.width * 0.3 and last.get_text() != " ":
+                    parts.append(" ")
+            parts.append(item.get_text())
+            last = item
+        self.text = "".join(parts)
+
+class PdfminerRawBackend(TextBackend):
+    """pdfminer.six with layout analysis disabled (lines rebuilt from glyph baselines)"""
+    name = 'pdfminer'
+
+    def open(self, stream):
+        _increment_parse_count()
+        document = PDFDocument(PDFParser(stream))
+        return {
+            'document': document,
+            'pages': list(PDFPage.create_pages(document)),
+            'resources': PDFResourceManager(),
+        }
+
+    def page_count(self, handle):
+        return len(handle['pages'])
+
+    def metadata(self, handle):
+        info = handle['document'].info[0] if handle['document'].info else {}
+        return {
+            key: value.decode('latin-1', 'ignore') if isinstance(value, bytes) else str(value)
+            for key, value in info.items()
+        }
+
+    def extract_page(self, handle, index):
+        device = _RawTextDevice(handle['resources'])
+        try:
+            PDFPageInterpreter(handle['resources'], device).process_page(handle['pages'][index])
+        finally:
+            device.close()
+        return device.text
+
+TEXT_BACKENDS = {
+    backend.name: backend
+    for backend in (PdfplumberBackend(), PyPDF2Backend(), PdfminerRawBackend(), OcrBackend())
+}
+DEFAULT_BACKEND = 'pdfplumber'
+
+def get_text_backend(name):
+    """Return a registered TextBackend by name"""
+    if name not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown text backend: {name}")
+    return TEXT_BACKENDS[name]
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Error values reported for files whose worker was killed for breaching a limit
+ABORT_STATUSES = ('timeout', 'memory')
+# Result keys describing how a file was read rather than what it contains
+ROUTING_FIELDS = ('Lapisan Teks', 'Mesin Ekstraksi', 'Versi Template', 'Percobaan Ulang')
+# Retry ladder for failed or empty results, cheapest first (see retry_extraction)
+RETRY_STRATEGIES = ('alternate_backend', 'all_pages', 'ocr')
+
+# Column naming the earlier file of the batch a duplicate upload repeats
+DUPLICATE_FIELD = 'Duplikat Dari'
+
+def _new_spool_path():
+    """Create an empty spool file for an upload and return its path"""
+    fd, path = tempfile.mkstemp(prefix='ldb_upload_', suffix='.pdf', dir=PROCESSING_CONFIG.get('spool_dir'))
+    os.close(fd)
+    return path
+
+def _remove_spool_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class ParsedDocument:
+    """
+    A single uploaded PDF, read once and parsed at most once.
+
+    The same instance is shared by validation, extraction, renaming and
+    database logging so a batch opens each file twice: once for its
+    structure (page count, metadata) and once for its page text. Page
+    text is extracted on demand and each page is extracted at most once per
+    text backend, so validation is cheap and extractors can target just the
+    pages they need.
+
+    Uploads are spooled once to a temporary file. Parsers read that file
+    through the OS page cache, hashing runs over an mmap and renamed copies
+    are made file-to-file, so no further in-memory copies of the PDF exist.
+    Documents built from bytes (e.g. in scripts) keep the bytes instead.
+    """
+
+    def __init__(self, name: str, data: bytes = None, file_type: str = "application/pdf",
+                 path: str = None, owns_path: bool = False):
+        self.name = name
+        self.source_name = name  # the uploaded file this document was split from
+        self.path = path
+        self._data = data
+        self.size = os.path.getsize(path) if path else len(data)
+        self.type = file_type
+        self.error = None
+        self.known_valid = False  # set when the content is in the extraction cache under some document type
+        self._page_count = None
+        self._page_texts = {}  # backend name -> one entry per page, None until extracted
+        self._metadata = {}
+        self._page_layers = None  # per page 'text', 'image' or 'blank'
+        self._text_parsed = False
+        self._sha256 = None
+        self.peak_memory = None  # bytes above the worker's baseline, when parsed in a worker process
+        self.processing_time = None  # seconds spent extracting, in-process or in its worker(s)
+        self.duplicate_of = None  # name of the earlier file in the batch with the same content
+        self._finalizer = weakref.finalize(self, _remove_spool_file, path) if owns_path else None
+
+    @classmethod
+    def from_upload(cls, uploaded_file):
+        """Build a document by spooling a Streamlit UploadedFile (or any file-like object) to disk"""
+        path = _new_spool_path()
+        with open(path, 'wb') as f:
+            if hasattr(uploaded_file, 'getbuffer'):
+                # Write straight from the upload's buffer without an intermediate copy
+                f.write(uploaded_file.getbuffer())
+            else:
+                uploaded_file.seek(0)
+                shutil.copyfileobj(uploaded_file, f, SPOOL_CHUNK_SIZE)
+                uploaded_file.seek(0)
+        return cls(
+            name=getattr(uploaded_file, 'name', 'unknown.pdf'),
+            file_type=getattr(uploaded_file, 'type', None) or "application/pdf",
+            path=path,
+            owns_path=True
+        )
+
+    def spool(self):
+        """Move in-memory bytes to a spool file so other processes can open it by path"""
+        if self.path is None:
+            path = _new_spool_path()
+            with open(path, 'wb') as f:
+                f.write(self._data)
+            self.path = path
+            self._data = None
+            self._finalizer = weakref.finalize(self, _remove_spool_file, path)
+        return self.path
+
+    def close(self):
+        """Delete the spool file owned by this document"""
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def release(self):
+        """Drop cached page text; pages are extracted again if needed"""
+        self._page_texts = {}
+        self._text_parsed = False
+
+    def fresh_copy(self):
+        """A new, unparsed document sharing this one's content"""
+        return ParsedDocument(self.name, self._data, self.type, path=self.path)
+
+    def open_stream(self):
+        """Open a seekable binary stream over the document content"""
+        if self.path is not None:
+            return open(self.path, 'rb')
+        return io.BytesIO(self._data)
+
+    def save_as(self, target_path):
+        """Write the document content to target_path"""
+        if self.path is not None:
+            shutil.copyfile(self.path, target_path)
+        else:
+            with open(target_path, 'wb') as f:
+                f.write(self._data)
+
+    @property
+    def data(self) -> bytes:
+        """Full document content as bytes (prefer open_stream/save_as, which do not copy)"""
+        if self.path is not None:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        return self._data
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 digest of the file content"""
+        if self._sha256 is None:
+            if self.path is not None and self.size > 0:
+                with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self._sha256 = hashlib.sha256(mm).hexdigest()
+            else:
+                self._sha256 = hashlib.sha256(self._data or b"").hexdigest()
+        return self._sha256
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether any page text has been extracted yet"""
+        return self._text_parsed
+
+    def _get_state(self):
+        """Parse state to hand back from a pool worker"""
+        return self._page_count, self._page_texts, self._metadata, self._page_layers, self.error
+
+    def _set_parsed(self, state):
+        """Attach parse results produced elsewhere (e.g. by a pool worker)"""
+        page_count, page_texts, metadata, page_layers, error = state
+        if self._text_parsed:
+            # Warmed here and finished in a worker: keep the worker's (superset of) page text
+            self._page_texts = page_texts
+            return
+        if any(t is not None for texts in page_texts.values() for t in texts):
+            self._text_parsed = True
+        self._page_count = page_count
+        self._page_texts = page_texts
+        self._metadata = metadata
+        self._page_layers = page_layers
+        self.error = error
+
+    def _adopt(self, other):
+        """Take over the parse state of a copy parsed on another thread (already counted there)"""
+        self._page_count, self._page_texts, self._metadata, self._page_layers, self.error = other._get_state()
+        self._text_parsed = other._text_parsed
+
+    def _set_page_texts(self, backend, indices, texts):
+        """Attach the text of some pages extracted elsewhere (e.g. by a page shard worker)"""
+        self._load()
+        page_texts = self._page_texts.setdefault(backend, [None] * self._page_count)
+        for i, text in zip(indices, texts):
+            page_texts[i] = text
+        self._text_parsed = True
+
+    def _load(self):
+        """Open the PDF once to read its structure (page count, metadata)"""
+        if self.error or self._page_count is not None:
+            return
+        text_backend = get_text_backend(DEFAULT_BACKEND)
+        try:
+            with self.open_stream() as stream:
+                handle = text_backend.open(stream)
+                try:
+                    self._page_count = text_backend.page_count(handle)
+                    self._metadata = text_backend.metadata(handle)
+                    self._page_layers = text_backend.page_layers(handle)
+                finally:
+                    text_backend.close(handle)
+        except Exception as e:
+            self.error = str(e)
+            self._page_count = 0
+
+    def iter_page_texts(self, strategy='all', limit=None, backend=DEFAULT_BACKEND):
+        """
+        Yield the text of the pages selected by strategy one page at a time
+        
+        The PDF is opened at most once per call and only when a page has not
+        been extracted before, so a consumer that stops early never pays for
+        the remaining pages.
+        """
+        self._load()
+        if self.error:
+            return
+        texts = self._page_texts.setdefault(backend, [None] * self._page_count)
+        text_backend = get_text_backend(backend)
+        stream = None
+        handle = None
+        try:
+            for i in select_page_indices(self._page_count, strategy, limit):
+                if texts[i] is None:
+                    try:
+                        if handle is None:
+                            stream = self.open_stream()
+                            handle = text_backend.open(stream)
+                        self._text_parsed = True
+                        texts[i] = text_backend.extract_page(handle, i)
+                    except Exception as e:
+                        # Only the default backend decides whether the file itself is broken
+                        if backend != DEFAULT_BACKEND:
+                            raise
+                        self.error = str(e)
+                        return
+                yield texts[i]
+        finally:
+            if handle is not None:
+                text_backend.close(handle)
+            if stream is not None:
+                stream.close()
+
+    def iter_page_words(self, strategy='all', limit=None):
+        """Yield pdfplumber's positioned words for the selected pages, one page at a time"""
+        self._load()
+        if self.error:
+            return
+        _increment_parse_count()
+        with self.open_stream() as stream, pdfplumber.open(stream) as pdf:
+            self._text_parsed = True
+            for i in select_page_indices(self._page_count, strategy, limit):
+                page = pdf.pages[i]
+                try:
+                    yield page.extract_words()
+                finally:
+                    page.close()
+
+    def pages_text(self, strategy='all', limit=None, backend=DEFAULT_BACKEND) -> str:
+        """Text of the pages selected by strategy ('first', 'last' or 'all'), empty pages skipped"""
+        return "\n".join(t for t in self.iter_page_texts(strategy, limit, backend) if t)
+
+    @property
+    def page_texts(self) -> List[str]:
+        """Text of every page, in page order (empty string for pages without text)"""
+        return list(self.iter_page_texts('all'))
+
+    @property
+    def page_count(self) -> int:
+        self._load()
+        return self._page_count
+
+    @property
+    def metadata(self) -> Dict:
+        self._load()
+        return self._metadata
+
+    @property
+    def text_layer(self) -> str:
+        """
+        'digital', 'scanned' or 'mixed', judged from font and image resources
+        
+        Pages with fonts have a text layer, pages with only images need OCR;
+        blank pages do not count. None when the PDF could not be opened.
+        """
+        self._load()
+        if self.error:
+            return None
+        layers = set(self._page_layers or ()) - {'blank'}
+        if layers == {'image'}:
+            return 'scanned'
+        if layers == {'text', 'image'}:
+            return 'mixed'
+        return 'digital'
+
+    @property
+    def text(self) -> str:
+        """Full document text with empty pages skipped"""
+        return self.pages_text('all')
+
+def select_page_indices(page_count, strategy='all', limit=None):
+    """Return the page indices selected by a page strategy ('first', 'last' or 'all')"""
+    if strategy == 'first' and limit:
+        return list(range(min(limit, page_count)))
+    if strategy == 'last' and limit:
+        return list(range(max(page_count - limit, 0), page_count))
+    return list(range(page_count))
+
+# Optional DatabaseManager used as a persistent extraction cache
+_extraction_cache = None
+
+_template_log = None
+_retry_log = None
+_checkpoint_store = None
+_blob_store = None
+
+def set_blob_store(blob_store):
+    """Register the BlobStore that keeps the original PDF of every processed file (None disables it)"""
+    global _blob_store
+    _blob_store = blob_store
+
+def set_checkpoint_store(db_manager):
+    """Register the DatabaseManager that records batch checkpoints (None disables resuming)"""
+    global _checkpoint_store
+    _checkpoint_store = db_manager
+
+def set_retry_log(db_manager):
+    """Register the DatabaseManager that keeps the retry strategy counters (None disables them)"""
+    global _retry_log
+    _retry_log = db_manager
+
+def set_template_log(db_manager):
+    """Register the DatabaseManager that records unknown page layouts (None disables logging)"""
+    global _template_log
+    _template_log = db_manager
+
+def set_extraction_cache(db_manager):
+    """Register the DatabaseManager used to cache extraction results (None disables caching)"""
+    global _extraction_cache
+    _extraction_cache = db_manager
+
+def _cache_enabled():
+    return _extraction_cache is not None and CACHE_CONFIG.get('enabled', True)
+
+def _get_cached_extraction(document, doc_type):
+    """Return a cached extraction result for this content and type, or None"""
+    if not _cache_enabled():
+        return None
+    cached = _extraction_cache.get_cached_extraction(document.sha256, doc_type, EXTRACTOR_VERSION)
+    if cached is not None:
+        cached['filename'] = document.name
+    return cached
+
+def _is_cached(document, doc_type):
+    """Whether extracting this document as doc_type will be answered from the extraction cache"""
+    # known_valid only says some type has a result, which is enough to skip validation
+    return (document.known_valid and _cache_enabled()
+            and _extraction_cache.has_cached_extraction(document.sha256, EXTRACTOR_VERSION, doc_type))
+
+def _store_cached_extraction(document, doc_type, extracted_data):
+    """Cache a successful extraction result (the filename is not part of the cached data)"""
+    if not _cache_enabled() or 'Error' in extracted_data:
+        return
+    data = {key: value for key, value in extracted_data.items() if key != 'filename'}
+    _extraction_cache.cache_extraction(
+        document.sha256, doc_type, EXTRACTOR_VERSION, data,
+        max_entries=CACHE_CONFIG.get('max_entries', 5000)
+    )
+
+def parse_document(uploaded_file):
+    """Return a ParsedDocument for an upload, reusing it if already parsed"""
+    if isinstance(uploaded_file, ParsedDocument):
+        return uploaded_file
+    return ParsedDocument.from_upload(uploaded_file)
+
+def extract_pdf_text(uploaded_file):
+    """Extract text from uploaded PDF file"""
+    document = parse_document(uploaded_file)
+    if document.page_count == 0 and document.error:
+        print(f"Error extracting PDF text: {document.error}")
+        return None
+    return document.text.strip()
+
+def _type_key(doc_type):
+    """Key of a document type in DOCUMENT_TYPES (the UI calls NOTIFICATION 'Notifikasi')"""
+    return "NOTIFICATION" if doc_type == "Notifikasi" else doc_type
+
+def _type_config(doc_type):
+    """DOCUMENT_TYPES entry for a document type"""
+    return DOCUMENT_TYPES.get(_type_key(doc_type), {})
+
+def get_page_strategy(doc_type):
+    """Return the (strategy, limit) page targeting declared for a document type"""
+    type_config = _type_config(doc_type)
+    return type_config.get('page_strategy', 'all'), type_config.get('page_limit')
+
+def get_backend_chain(doc_type):
+    """
+    Return the text backends to try for a document type, cheapest first
+    
+    'auto' tries PROCESSING_CONFIG['auto_backends'] in order and escalates
+    when an extraction misses required fields.
+    """
+    backend = _type_config(doc_type).get('text_backend', DEFAULT_BACKEND)
+    if backend == 'auto':
+        return list(PROCESSING_CONFIG.get('auto_backends', ['pypdf2', DEFAULT_BACKEND]))
+    return [backend]
+
+def route_backends(document, doc_type):
+    """
+    Return the text backends to try for one document, routed by its text layer
+    
+    Digital PDFs use the document type's backend chain, scanned PDFs go
+    straight to OCR and mixed PDFs fall back to OCR when the text layer
+    misses required fields. Without pytesseract a scanned PDF gets no backend.
+    """
+    backends = get_backend_chain(doc_type)
+    text_layer = document.text_layer
+    if text_layer == 'scanned':
+        return ['ocr'] if pytesseract is not None else []
+    if text_layer == 'mixed' and pytesseract is not None:
+        return backends + ['ocr']
+    return backends
+
+def get_extraction_mode(doc_type):
+    """
+    Return 'layout' when a document type pairs labels and values by position
+    
+    Layout mode needs a LAYOUT_EXTRACTORS entry for the type; otherwise the
+    text extractors are used.
+    """
+    mode = _type_config(doc_type).get('extraction_mode', 'text')
+    if mode == 'layout' and doc_type in LAYOUT_EXTRACTORS:
+        return 'layout'
+    return 'text'
+
+def _extract_layout(document, doc_type, strategy, limit):
+    """Run the type's layout extractor over a WordIndex of each selected page"""
+    indexes = [WordIndex(words) for words in document.iter_page_words(strategy, limit)]
+    return LAYOUT_EXTRACTORS[doc_type](indexes)
+
+def template_fingerprint(anchors):
+    """
+    Identify a page layout from its label words and their positions
+    
+    Positions are rounded to PROCESSING_CONFIG['template_grid'] points so
+    small rendering shifts map to the same fingerprint. Pages with fewer
+    than three labels are not forms and get None.
+    """
+    grid = PROCESSING_CONFIG.get('template_grid', 5)
+    keys = sorted({(a['label'], round(a['x1'] / grid), round(a['top'] / grid)) for a in anchors})
+    if len(keys) < 3:
+        return None
+    return hashlib.sha1(repr(keys).encode()).hexdigest()[:16]
+
+def _templates_enabled(doc_type):
+    """Fingerprint page 1 for types with registered templates, or for all types while onboarding"""
+    if not PROCESSING_CONFIG.get('template_matching', True) or WordIndex is None:
+        return False
+    return bool(DOCUMENT_TEMPLATES.get(_type_key(doc_type))) or PROCESSING_CONFIG.get('template_onboarding', False)
+
+_reported_templates = set()  # fingerprints already printed when no template log is registered
+
+def _log_unknown_template(document, doc_type, fingerprint, anchors, page_width):
+    if _template_log is None:
+        if (doc_type, fingerprint) not in _reported_templates:
+            _reported_templates.add((doc_type, fingerprint))
+            print(f"Info: unknown {doc_type} template {fingerprint} ({document.name})")
+        return
+    # Suggest a crop box to the right of every label as a starting point for onboarding
+    labels = [
+        {'label': a['label'], 'box': [round(a['x1'], 1), round(a['top'] - 2, 1),
+                                      round(page_width, 1), round(a['bottom'] + 2, 1)]}
+        for a in anchors
+    ]
+    _template_log.log_unknown_template(fingerprint, doc_type, document.name, labels)
+
+def _match_template(document, doc_type):
+    """
+    Fingerprint page 1 and read a registered template's fields from their crop boxes
+    
+    Returns:
+        tuple: (fingerprint, template name, extracted data); name and data are
+        None when the layout is not registered
+    """
+    templates = DOCUMENT_TEMPLATES.get(_type_key(doc_type), {})
+    _increment_parse_count()
+    with document.open_stream() as stream, pdfplumber.open(stream) as pdf:
+        if not pdf.pages:
+            return None, None, None
+        document._text_parsed = True
+        page = pdf.pages[0]
+        try:
+            anchors = WordIndex(page.extract_words()).label_anchors()
+            fingerprint = template_fingerprint(anchors)
+            template = templates.get(fingerprint)
+            if template is None:
+                if fingerprint:
+                    _log_unknown_template(document, doc_type, fingerprint, anchors, page.width)
+                return fingerprint, None, None
+            
+            x0, top, x1, bottom = page.bbox
+            extracted_data = {}
+            for field, spec in template['fields'].items():
+                spec = spec if isinstance(spec, dict) else {'box': spec}
+                box = spec['box']
+                box = (max(box[0], x0), max(box[1], top), min(box[2], x1), min(box[3], bottom))
+                value = " ".join((page.crop(box).extract_text() or "").split()).lstrip(':').strip()
+                if value and spec.get('format') == 'first_word':
+                    value = value.split()[0]
+                elif value and spec.get('format') == 'date':
+                    value = format_date(value)
+                extracted_data[field] = value or None
+            extracted_data['Jenis Dokumen'] = doc_type
+            return fingerprint, template.get('name', fingerprint), extracted_data
+        finally:
+            page.close()
+
+def run_extractor(full_text, doc_type):
+    """Run the extractor for a document type over already extracted text"""
+    if doc_type == "SKTT":
+        return extract_sktt(full_text)
+    elif doc_type == "EVLN":
+        return extract_evln(full_text)
+    elif doc_type == "ITAS":
+        return extract_itas(full_text)
+    elif doc_type == "ITK":
+        return extract_itk(full_text)
+    elif doc_type == "Notifikasi" or doc_type == "NOTIFICATION":
+        return extract_notifikasi(full_text)
+    elif doc_type == "DKPTKA":
+        return extract_dkptka_info(full_text)
+    else:
+        # Use generic extractor if available
+        try:
+            return extract_document_data(full_text, doc_type)
+        except:
+            return {"Error": f"Unsupported document type: {doc_type}"}
+
+def _extract_pages(document, doc_type, backend, strategy, limit):
+    """
+    Run the extractor over the selected pages
+    
+    With PROCESSING_CONFIG['early_exit'] pages are fed to the extractor one at
+    a time and parsing stops as soon as the required fields are all found.
+    The 'layout' pseudo-backend runs the type's layout extractor instead.
+    """
+    if backend == 'layout':
+        return _extract_layout(document, doc_type, strategy, limit)
+    if not PROCESSING_CONFIG.get('early_exit', False) or IncrementalExtractor is None:
+        return run_extractor(document.pages_text(strategy, limit, backend), doc_type)
+    
+    extractor = IncrementalExtractor(doc_type, extract=lambda text: run_extractor(text, doc_type))
+    pages = document.iter_page_texts(strategy, limit, backend)
+    try:
+        for page_text in pages:
+            if extractor.feed(page_text):
+                break
+    finally:
+        pages.close()
+    return extractor.result
+
+def process_single_pdf(uploaded_file, doc_type, use_cache=True):
+    """Process a single PDF file and extract data"""
+    document = parse_document(uploaded_file)
+    
+    if use_cache:
+        cached = _get_cached_extraction(document, doc_type)
+        if cached is not None:
+            return cached
+    
+    try:
+        if document.page_count == 0 and document.error:
+            raise Exception(document.error)
+        
+        backends = route_backends(document, doc_type)
+        if not backends:
+            raise Exception("Scanned PDF without a text layer and OCR (pytesseract) is not installed")
+        
+        # Only parse the pages this document type needs, with the cheapest
+        # backend first; escalate to all pages, then to the next backend,
+        # while required fields are still missing
+        strategy, limit = get_page_strategy(doc_type)
+        targeted_pages = len(select_page_indices(document.page_count, strategy, limit))
+        attempts = []
+        if get_extraction_mode(doc_type) == 'layout' and document.text_layer != 'scanned':
+            # Falls back to the text extractors when labels are not found
+            attempts.append(('layout', strategy, limit))
+        for backend in backends:
+            attempts.append((backend, strategy, limit))
+            if targeted_pages < document.page_count:
+                attempts.append((backend, 'all', None))
+        
+        extracted_data = None
+        engine = None
+        text_layer = document.text_layer
+        template_name = None
+        if text_layer != 'scanned' and _templates_enabled(doc_type):
+            try:
+                _, template_name, template_data = _match_template(document, doc_type)
+            except Exception as e:
+                print(f"Warning: template matching failed on {document.name}: {e}")
+            else:
+                if template_data is not None and not missing_required_fields(template_data, doc_type):
+                    # Known layout: its crop boxes already gave every required field
+                    extracted_data, engine = template_data, 'template'
+                    attempts = []
+        
+        while attempts:
+            backend, page_strategy, page_limit = attempts.pop(0)
+            try:
+                extracted_data = _extract_pages(document, doc_type, backend, page_strategy, page_limit)
+                engine = backend
+            except MemoryError:
+                raise
+            except Exception as e:
+                print(f"Warning: {backend} failed on {document.name}: {e}")
+            else:
+                if document.error:
+                    raise Exception(document.error)
+                if not missing_required_fields(extracted_data, doc_type):
+                    break
+            
+            if (not attempts and 'ocr' not in backends and pytesseract is not None
+                    and not any(t and t.strip() for texts in document._page_texts.values() for t in texts)):
+                # Fonts are declared but not a single character came out: it is a scan after all
+                text_layer = 'scanned'
+                backends.append('ocr')
+                attempts.append(('ocr', strategy, limit))
+        
+        if extracted_data is None:
+            raise Exception("No text backend could read this PDF")
+        
+        # Record the routing so OCR volume can be measured
+        extracted_data['Lapisan Teks'] = text_layer
+        extracted_data['Mesin Ekstraksi'] = engine
+        if template_name:
+            extracted_data['Versi Template'] = template_name
+        
+        if use_cache:
+            _store_cached_extraction(document, doc_type, extracted_data)
+        
+        # Add filename to extracted data
+        extracted_data['filename'] = document.name
+        
+        return extracted_data
+    
+    except MemoryError:
+        # Let the worker report a memory limit breach
+        raise
+    except Exception as e:
+        error_data = {
+            'filename': document.name,
+            'Error': f"Failed to process PDF: {str(e)}",
+            'Jenis Dokumen': doc_type
+        }
+        if document.text_layer:
+            error_data['Lapisan Teks'] = document.text_layer
+        return error_data
+
+def _needs_retry(extracted_data):
+    """Whether a result failed (not by a time/memory limit) or came back with every field empty"""
+    error = extracted_data.get('Error')
+    if error is not None:
+        return error not in ABORT_STATUSES
+    skip = {'filename', 'Jenis Dokumen', *ROUTING_FIELDS}
+    return not any(value not in (None, '') for key, value in extracted_data.items() if key not in skip)
+
+def _extract_with_backend(document, doc_type, backend, strategy, limit):
+    """
+    Run the extractor over pages read by one backend on its own
+    
+    Bypasses the document's page cache and structure, which come from the
+    default backend, so a file pdfplumber cannot open can still be read.
+    """
+    text_backend = get_text_backend(backend)
+    with document.open_stream() as stream:
+        handle = text_backend.open(stream)
+        try:
+            indices = select_page_indices(text_backend.page_count(handle), strategy, limit)
+            text = "\n".join(t for t in (text_backend.extract_page(handle, i) for i in indices) if t)
+        finally:
+            text_backend.close(handle)
+    return run_extractor(text, doc_type)
+
+def retry_extraction(uploaded_file, doc_type):
+    """
+    Re-run a failed or empty extraction with progressively more expensive strategies
+    
+    'alternate_backend' tries the text backends outside the type's chain on
+    the targeted pages, 'all_pages' reads every page with them and 'ocr'
+    runs tesseract when it is installed. Stops at the first usable result.
+    
+    Returns:
+        tuple: (extracted data or None, [(strategy, succeeded), ...])
+    """
+    document = parse_document(uploaded_file)
+    strategy, limit = get_page_strategy(doc_type)
+    alternates = [name for name in TEXT_BACKENDS if name not in get_backend_chain(doc_type) and name != 'ocr']
+    ladder = [('alternate_backend', backend, strategy, limit) for backend in alternates]
+    if strategy != 'all':
+        ladder += [('all_pages', backend, 'all', None) for backend in alternates]
+    if pytesseract is not None:
+        ladder.append(('ocr', 'ocr', strategy, limit))
+    
+    attempts = []
+    for name, backend, page_strategy, page_limit in ladder:
+        try:
+            extracted_data = _extract_with_backend(document, doc_type, backend, page_strategy, page_limit)
+        except MemoryError:
+            raise
+        except Exception as e:
+            print(f"Warning: retry with {backend} failed on {document.name}: {e}")
+            attempts.append((name, False))
+            continue
+        succeeded = not _needs_retry(extracted_data)
+        attempts.append((name, succeeded))
+        if succeeded:
+            extracted_data['Lapisan Teks'] = document.text_layer
+            extracted_data['Mesin Ekstraksi'] = backend
+            extracted_data['Percobaan Ulang'] = name
+            extracted_data['filename'] = document.name
+            return extracted_data, attempts
+    return None, attempts
+
+def _record_retries(attempts):
+    for strategy, succeeded in attempts:
+        counts = _retry_counts.setdefault(strategy, {'attempts': 0, 'successes': 0})
+        counts['attempts'] += 1
+        counts['successes'] += int(succeeded)
+        if _retry_log is not None:
+            _retry_log.record_retry(strategy, succeeded)
+
+def _retry_spooled_pdf(path, name, doc_type):
+    """Worker: run the retry ladder on one PDF from its spool file"""
+    return retry_extraction(ParsedDocument(name, path=path), doc_type)
+
+def _process_spooled_pdf(path, name, doc_type, state=None):
+    """
+    Worker: parse and extract one PDF from its spool file.
+
+    state is the parent's parse state when it already read the document's
+    structure (validation) or page text (warming, splitting), so neither is
+    read again. Returns the parse results
+    alongside the extracted data so the parent can attach them to its
+    ParsedDocument without parsing again.
+    """
+    document = ParsedDocument(name, path=path)
+    if state is not None:
+        document._set_parsed(state)
+    # The parent process owns the extraction cache
+    extracted_data = process_single_pdf(document, doc_type, use_cache=False)
+    return document._get_state(), extracted_data
+
+def _extract_spooled_pages(path, backend, indices):
+    """Worker: extract the text of some pages of one PDF from its spool file"""
+    text_backend = get_text_backend(backend)
+    with open(path, 'rb') as stream:
+        handle = text_backend.open(stream)
+        try:
+            return [text_backend.extract_page(handle, i) for i in indices]
+        finally:
+            text_backend.close(handle)
+
+def _plan_shards(document, doc_type):
+    """
+    Split a long document's targeted pages into shards for the worker pool
+    
+    Returns (backend, [page indices, ...]) when the pages this document type
+    needs reach PROCESSING_CONFIG['page_shard_threshold'], else None.
+    """
+    threshold = PROCESSING_CONFIG.get('page_shard_threshold')
+    if not threshold or document.error or document.page_count < threshold:
+        return None
+    strategy, limit = get_page_strategy(doc_type)
+    indices = select_page_indices(document.page_count, strategy, limit)
+    if len(indices) < threshold:
+        return None
+    backends = route_backends(document, doc_type)
+    if not backends:
+        return None
+    size = max(1, PROCESSING_CONFIG.get('pages_per_shard', 10))
+    return backends[0], [indices[i:i + size] for i in range(0, len(indices), size)]
+
+def _count_work_units(documents, doc_type):
+    """Number of worker jobs a batch turns into (one per file, one per shard of long files)"""
+    if not PROCESSING_CONFIG.get('page_shard_threshold'):
+        return len(documents)
+    units = 0
+    for document in documents:
+        plan = None if document.is_parsed else _plan_shards(document, doc_type)
+        units += len(plan[1]) if plan else 1
+    return units
+
+def _resident_memory():
+    """Current resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _peak_memory_since(baseline):
+    """Peak resident memory of this process above baseline bytes, or None if unavailable"""
+    if resource is None or not baseline:
+        return None
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return max(0, peak - baseline)
+
+_worker_context = None
+
+def _get_worker_context():
+    """
+    Start method for worker processes (PROCESSING_CONFIG['worker_start_method'])
+    
+    The app forks workers while Streamlit and background threads are
+    running, and a plain fork copies whatever locks those threads hold. The
+    default 'forkserver' forks workers from a clean server process instead,
+    which imports this module once up front so each worker starts warm.
+    """
+    global _worker_context
+    if _worker_context is None:
+        method = PROCESSING_CONFIG.get('worker_start_method', 'forkserver')
+        if method not in multiprocessing.get_all_start_methods():
+            method = 'spawn'
+        _worker_context = multiprocessing.get_context(method)
+        if method == 'forkserver':
+            _worker_context.set_forkserver_preload([__name__])
+            _start_forkserver()
+    return _worker_context
+
+def _start_forkserver():
+    """Start the fork server with this module's directory on its import path"""
+    from multiprocessing import forkserver
+    # The server does not inherit sys.path, so the preload only finds this
+    # module through PYTHONPATH (or when started from its directory)
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    saved = os.environ.get('PYTHONPATH')
+    os.environ['PYTHONPATH'] = os.pathsep.join(p for p in (module_dir, saved) if p)
+    try:
+        forkserver.ensure_running()
+    finally:
+        if saved is None:
+            del os.environ['PYTHONPATH']
+        else:
+            os.environ['PYTHONPATH'] = saved
+
+def _apply_memory_limit(memory_limit):
+    """Cap this process's address space at its current size plus memory_limit bytes"""
+    if resource is None:
+        return
+    try:
+        # A worker inherits the address space of the process it was forked from, so the cap is relative
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        current = 0
+    limit = current + memory_limit
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _limited_worker(conn, func, args, memory_limit, settings):
+    """
+    Child process entry point: run one job under a memory ceiling and report
+    back (status, payload, peak memory in bytes, PDF opens)
+    
+    settings carries the parent's PROCESSING_CONFIG and template log, which
+    a worker that was not forked from the parent would not see otherwise.
+    """
+    global _template_log
+    config, _template_log = settings
+    PROCESSING_CONFIG.update(config)
+    reset_parse_count()
+    baseline = _resident_memory()
+    if memory_limit:
+        _apply_memory_limit(memory_limit)
+    try:
+        status, payload = 'ok', func(*args)
+    except MemoryError:
+        status, payload = 'memory', None
+    except Exception as e:
+        status, payload = 'error', str(e)
+    conn.send((status, payload, _peak_memory_since(baseline), get_parse_count()))
+    conn.close()
+
+def _run_supervised(jobs, max_workers, timeout=None, memory_limit=None, cancelled=None):
+    """
+    Run each ((index, part), func, args) job in its own child process
+    
+    At most max_workers children run at once. A child that passes its
+    wall-clock timeout is killed; a child that breaches its memory ceiling
+    reports a MemoryError (or is killed by the OS). Yields
+    ((index, part), status, payload, peak_memory, elapsed) as jobs finish,
+    where status is 'ok', 'error', 'timeout' or 'memory', peak_memory is the
+    child's peak resident memory in bytes (None when it did not report) and
+    elapsed is the child's wall-clock time in seconds. The PDF opens a child
+    reports are added to this process's parse count.
+    
+    The caller may add an index to the cancelled set between results; jobs
+    for that index still queued are dropped and running ones are killed.
+    """
+    context = _get_worker_context()
+    settings = (dict(PROCESSING_CONFIG), _template_log)
+    queue = list(jobs)
+    running = {}  # connection -> (key, process, deadline, started)
+    cancelled = cancelled if cancelled is not None else set()
+    
+    def finish(conn):
+        key, process, _, started = running.pop(conn)
+        conn.close()
+        process.join()
+        return key, process, time.monotonic() - started
+    
+    def drop_cancelled():
+        queue[:] = [job for job in queue if job[0][0] not in cancelled]
+        for conn, (key, process, _, _) in list(running.items()):
+            if key[0] in cancelled:
+                process.kill()
+                finish(conn)
+    
+    try:
+        while queue or running:
+            while queue and len(running) < max_workers:
+                key, func, args = queue.pop(0)
+                parent_conn, child_conn = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_limited_worker,
+                    args=(child_conn, func, args, memory_limit, settings),
+                    daemon=True
+                )
+                process.start()
+                child_conn.close()
+                started = time.monotonic()
+                deadline = started + timeout if timeout else None
+                running[parent_conn] = (key, process, deadline, started)
+            
+            deadlines = [deadline for _, _, deadline, _ in running.values() if deadline]
+            wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            
+            for conn in multiprocessing.connection.wait(list(running), timeout=wait_for):
+                if conn not in running:
+                    continue  # killed after an earlier result cancelled its document
+                try:
+                    status, payload, peak_memory, opens = conn.recv()
+                    _increment_parse_count(opens)
+                except EOFError:
+                    status, payload, peak_memory = None, None, None
+                key, process, elapsed = finish(conn)
+                if status is None:
+                    # Died without reporting: killed by the OS for memory, or crashed
+                    if memory_limit and process.exitcode in (-signal.SIGKILL, -signal.SIGSEGV):
+                        status = 'memory'
+                    else:
+                        status, payload = 'error', f"worker exited with code {process.exitcode}"
+                yield key, status, payload, peak_memory, elapsed
+                drop_cancelled()
+            
+            now = time.monotonic()
+            for conn, (key, process, deadline, _) in list(running.items()):
+                if conn in running and deadline and now >= deadline:
+                    process.kill()
+                    _, _, elapsed = finish(conn)
+                    yield key, 'timeout', None, None, elapsed
+                    drop_cancelled()
+    finally:
+        # Generator closed early (e.g. the caller raised): do not leave workers behind
+        for conn, (key, process, deadline, _) in list(running.items()):
+            process.kill()
+            finish(conn)
+
+def _limits_enabled():
+    return bool(PROCESSING_CONFIG.get('file_timeout') or PROCESSING_CONFIG.get('file_memory_limit'))
+
+def _resolve_parallel(parallel, max_workers, file_count):
+    """Decide whether to use the process pool and with how many workers"""
+    if parallel is None:
+        parallel = PROCESSING_CONFIG.get('parallel', True)
+    if max_workers is None:
+        max_workers = PROCESSING_CONFIG.get('max_workers') or os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, file_count))
+    use_pool = (
+        parallel
+        and max_workers > 1
+        and file_count >= PROCESSING_CONFIG.get('parallel_min_files', 4)
+    )
+    return use_pool, max_workers
+
+def _aborted_result(document, doc_type, status):
+    print(f"Warning: aborted {document.name} ({status})")
+    return {
+        'filename': document.name,
+        'Error': status,
+        'Jenis Dokumen': doc_type
+    }
+
+def _collect_shard(document, doc_type, plan, part, status, payload):
+    """
+    Record one finished page shard of a long document
+    
+    Finished shards are fed to the extractor in page order, so once the
+    required fields are found the remaining shards can be cancelled. Returns
+    the document's extracted data when it is final, else None.
+    """
+    if status in ABORT_STATUSES:
+        return _aborted_result(document, doc_type, status)
+    plan['done'] += 1
+    if status == 'ok':
+        document._set_page_texts(plan['backend'], plan['shards'][part], payload)
+        plan['ok'].add(part)
+    else:
+        # The parent re-reads this shard's pages itself when finalising
+        print(f"Warning: page shard {part} of {document.name} failed: {payload}")
+    
+    complete = False
+    extractor = plan['extractor']
+    while extractor is not None and not complete and plan['fed'] in plan['ok']:
+        page_texts = document._page_texts[plan['backend']]
+        for i in plan['shards'][plan['fed']]:
+            if extractor.feed(page_texts[i]):
+                complete = True
+                break
+        plan['fed'] += 1
+    
+    if not complete and plan['done'] < len(plan['shards']):
+        return None
+    # Page text is cached on the document now, so this only runs the extractor
+    # (and the usual escalation if required fields are still missing)
+    extracted_data = process_single_pdf(document, doc_type, use_cache=False)
+    _store_cached_extraction(document, doc_type, extracted_data)
+    return extracted_data
+
+def iter_documents_parallel(documents, doc_type, max_workers=None, progress_callback=None,
+                             timeout=None, memory_limit=None):
+    """
+    Run process_single_pdf for every document in isolated worker processes,
+    yielding results in completion order
+    
+    Workers open each document's spool file by path, so PDF bytes are never
+    pickled to the workers and the OS page cache is shared between processes.
+    Documents whose result is in the extraction cache are answered
+    in-process. Documents that were already parsed (warmed in the background
+    or split from a bulk scan) still run on a worker under the same limits;
+    their page text is sent along so it is not extracted again.
+    
+    Each file gets its own worker so a pathological PDF can be killed when it
+    exceeds the timeout or memory ceiling; it is then reported with
+    Error 'timeout' or 'memory' while the rest of the batch completes.
+    The worker's peak memory is recorded on each document as peak_memory.
+    
+    Long documents (see _plan_shards) are split into page shards that run
+    on separate workers, each under the same limits; their page text is
+    reassembled in page order before extraction.
+    
+    Jobs are started shortest first (see _schedule), so small files are not
+    held up behind large scans.
+    
+    Args:
+        documents: List of ParsedDocument instances
+        doc_type: Document type
+        max_workers: Number of worker processes (defaults to CPU count)
+        progress_callback: Function called with (fraction, message) as files complete
+        timeout: Per-file wall-clock limit in seconds (defaults to PROCESSING_CONFIG['file_timeout'])
+        memory_limit: Per-file memory ceiling in bytes (defaults to PROCESSING_CONFIG['file_memory_limit'])
+    
+    Yields:
+        tuple: (index in documents, extracted data) as each document finishes
+    """
+    total_files = len(documents)
+    completed = 0
+    
+    def report(document):
+        if progress_callback:
+            progress_callback(completed / total_files, f"Processed {document.name}")
+    
+    pending = []
+    for index, document in enumerate(documents):
+        extracted_data = _get_cached_extraction(document, doc_type)
+        if extracted_data is None:
+            pending.append(index)
+            continue
+        completed += 1
+        report(document)
+        yield index, extracted_data
+    
+    if not pending:
+        return
+    
+    if timeout is None:
+        timeout = PROCESSING_CONFIG.get('file_timeout')
+    if memory_limit is None:
+        memory_limit = PROCESSING_CONFIG.get('file_memory_limit')
+    max_workers = max_workers or os.cpu_count() or 1
+    
+    jobs = []
+    shard_plans = {}
+    order = _schedule([documents[index] for index in pending], doc_type)
+    for index in [pending[i] for i in order]:
+        document = documents[index]
+        # Structure read at validation and warm page text are sent along so the
+        # worker does not open the PDF again for them; the extraction is still isolated
+        state = document._get_state() if document._page_count is not None else None
+        plan = _plan_shards(document, doc_type) if max_workers > 1 and not document.is_parsed else None
+        if plan is None:
+            jobs.append(((index, None), _process_spooled_pdf, (document.spool(), document.name, doc_type, state)))
+            continue
+        backend, shards = plan
+        use_extractor = PROCESSING_CONFIG.get('early_exit', False) and IncrementalExtractor is not None
+        shard_plans[index] = {
+            'backend': backend,
+            'shards': shards,
+            'done': 0,
+            'ok': set(),
+            'fed': 0,
+            'extractor': IncrementalExtractor(doc_type, extract=lambda text: run_extractor(text, doc_type))
+                         if use_extractor else None,
+        }
+        for part, indices in enumerate(shards):
+            jobs.append(((index, part), _extract_spooled_pages, (document.spool(), backend, indices)))
+    
+    cancelled = set()
+    supervised = _run_supervised(jobs, min(max_workers, len(jobs)), timeout, memory_limit, cancelled)
+    try:
+        for (index, part), status, payload, peak_memory, elapsed in supervised:
+            if index in cancelled:
+                continue
+            document = documents[index]
+            if peak_memory is not None:
+                # Shards of one document run side by side; report the largest
+                document.peak_memory = max(document.peak_memory or 0, peak_memory)
+            document.processing_time = (document.processing_time or 0) + elapsed
+            if part is not None:
+                extracted_data = _collect_shard(document, doc_type, shard_plans[index], part, status, payload)
+                if extracted_data is None:
+                    continue
+                cancelled.add(index)
+            elif status == 'ok':
+                state, extracted_data = payload
+                document._set_parsed(state)
+                _store_cached_extraction(document, doc_type, extracted_data)
+            elif status in ABORT_STATUSES:
+                extracted_data = _aborted_result(document, doc_type, status)
+            else:
+                extracted_data = {
+                    'filename': document.name,
+                    'Error': f"Failed to process PDF: {payload}",
+                    'Jenis Dokumen': doc_type
+                }
+            completed += 1
+            report(document)
+            yield index, extracted_data
+    finally:
+        supervised.close()
+
+def process_documents_parallel(documents, doc_type, max_workers=None, progress_callback=None,
+                               timeout=None, memory_limit=None):
+    """
+    Run process_single_pdf for every document in isolated worker processes
+    
+    See iter_documents_parallel; returns the extracted data dicts in the same
+    order as documents.
+    """
+    results = [None] * len(documents)
+    for index, extracted_data in iter_documents_parallel(documents, doc_type, max_workers, progress_callback,
+                                                          timeout, memory_limit):
+        results[index] = extracted_data
+    return results
+
+def get_extraction_status(extracted_data):
+    """Classify an extraction result as 'completed', 'failed', 'timeout' or 'memory'"""
+    error = extracted_data.get('Error')
+    if error is None or (not isinstance(error, str) and pd.isna(error)):
+        return 'completed'
+    if error in ABORT_STATUSES:
+        return error
+    return 'failed'
+
+def _prefetch_pages(document, backend, parallel=None, max_workers=None):
+    """
+    Extract every page of a document into its page cache in page shards
+    
+    Shards run on the worker pool under the per-file limits. Returns False
+    if a shard breached the time or memory limit.
+    """
+    size = max(1, PROCESSING_CONFIG.get('pages_per_shard', 10))
+    indices = list(range(document.page_count))
+    shards = [indices[i:i + size] for i in range(0, len(indices), size)]
+    use_pool, max_workers = _resolve_parallel(parallel, max_workers, len(shards))
+    if not use_pool and not _limits_enabled():
+        return True  # pages are read in-process by the caller
+    
+    jobs = [((0, part), _extract_spooled_pages, (document.spool(), backend, shard))
+            for part, shard in enumerate(shards)]
+    supervised = _run_supervised(jobs, max_workers if use_pool else 1,
+                                 PROCESSING_CONFIG.get('file_timeout'), PROCESSING_CONFIG.get('file_memory_limit'))
+    try:
+        for (_, part), status, payload, _, _ in supervised:
+            if status in ABORT_STATUSES:
+                print(f"Warning: aborted reading {document.name} ({status})")
+                return False
+            if status == 'ok':
+                document._set_page_texts(backend, shards[part], payload)
+    finally:
+        supervised.close()
+    return True
+
+def find_segments(document, doc_type, parallel=None, max_workers=None):
+    """
+    Find the documents inside a bulk scan
+    
+    A page whose text matches the type's segment_marker starts a new
+    document; pages before the first marker belong to the first one.
+    
+    Returns:
+        list: (start, stop) page ranges, or None when the file holds a single document
+    """
+    marker = _type_config(doc_type).get('segment_marker')
+    if not marker:
+        return None
+    if document.error or document.page_count < 2:
+        return None
+    strategy, limit = get_page_strategy(doc_type)
+    if strategy == 'first' and limit and document.page_count <= limit:
+        return None  # fits in one document of this type
+    
+    backends = route_backends(document, doc_type)
+    if not backends:
+        return None
+    try:
+        if not _prefetch_pages(document, backends[0], parallel, max_workers):
+            return None
+        texts = list(document.iter_page_texts('all', None, backends[0]))
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"Warning: could not look for documents inside {document.name}: {e}")
+        return None
+    
+    pattern = re.compile(marker)
+    starts = [i for i, text in enumerate(texts) if text and pattern.search(text)]
+    if len(starts) < 2:
+        return None
+    starts[0] = 0
+    return list(zip(starts, starts[1:] + [document.page_count]))
+
+def split_document(document, doc_type, parallel=None, max_workers=None):
+    """
+    Split a bulk scan into one ParsedDocument per document it contains
+    
+    Page ranges are copied into new PDFs (no re-rendering) and the page text
+    already read while looking for boundaries is carried over.
+    """
+    segments = find_segments(document, doc_type, parallel, max_workers)
+    if not segments:
+        return [document]
+    if PdfWriter is None:
+        print(f"Warning: {document.name} holds {len(segments)} documents but PyPDF2 is not installed to split it")
+        return [document]
+    
+    stem = os.path.splitext(document.name)[0]
+    parts = []
+    with document.open_stream() as stream:
+        _increment_parse_count()
+        reader = PdfReader(stream)
+        for start, stop in segments:
+            writer = PdfWriter()
+            for i in range(start, stop):
+                writer.add_page(reader.pages[i])
+            path = _new_spool_path()
+            with open(path, 'wb') as f:
+                writer.write(f)
+            
+            pages = f"{start + 1}" if stop - start == 1 else f"{start + 1}-{stop}"
+            part = ParsedDocument(f"{stem}_hal{pages}.pdf", path=path, owns_path=True)
+            part.source_name = document.source_name
+            for backend, texts in document._page_texts.items():
+                known = [i for i in range(start, stop) if texts[i] is not None]
+                if known:
+                    part._set_page_texts(backend, [i - start for i in known], [texts[i] for i in known])
+            parts.append(part)
+    return parts
+
+def _split_enabled(split_bulk=None):
+    return PROCESSING_CONFIG.get('split_documents', False) if split_bulk is None else split_bulk
+
+def split_documents(documents, doc_type, parallel=None, max_workers=None, split_bulk=None):
+    """
+    Replace every bulk scan in a batch by the documents it contains, keeping batch order
+    
+    Looking for document boundaries reads every page of every multi-page
+    file, so it only runs for batches explicitly marked as bulk scans
+    (split_bulk, defaulting to PROCESSING_CONFIG['split_documents']).
+    
+    A duplicate (see mark_duplicates) is not split again; it gets aliases of
+    its original's parts instead.
+    """
+    if not _type_config(doc_type).get('segment_marker') or not _split_enabled(split_bulk):
+        return documents
+    has_duplicates = any(document.duplicate_of for document in documents)
+    split = []
+    parts_by_hash = {}
+    for document in documents:
+        if document.duplicate_of and document.sha256 in parts_by_hash:
+            split.extend(_duplicate_parts(document, parts_by_hash[document.sha256]))
+            continue
+        parts = split_document(document, doc_type, parallel, max_workers)
+        if document.duplicate_of and len(parts) > 1:
+            # Original split in an earlier chunk: name the parts it repeats
+            stem = os.path.splitext(document.name)[0]
+            original_stem = os.path.splitext(document.duplicate_of)[0]
+            for part in parts:
+                part.duplicate_of = original_stem + part.name[len(stem):]
+        if has_duplicates:
+            parts_by_hash.setdefault(document.sha256, parts)
+        split.extend(parts)
+    return split
+
+def _duplicate_parts(document, parts):
+    """The parts of a duplicate's original, renamed after the duplicate and sharing their spool files"""
+    if len(parts) == 1:
+        return [document]
+    stem = os.path.splitext(document.name)[0]
+    original_stem = os.path.splitext(parts[0].source_name)[0]
+    aliases = []
+    for part in parts:
+        alias = ParsedDocument(stem + part.name[len(original_stem):], part._data, part.type, path=part.path)
+        alias.source_name = document.source_name
+        alias.duplicate_of = part.name
+        aliases.append(alias)
+    return aliases
+
+def mark_duplicates(documents, earlier=()):
+    """
+    Flag every document whose content already appeared earlier in the batch,
+    or in earlier (documents processed before, e.g. by a previous run in the
+    same session)
+    
+    Sets duplicate_of to the name of the first document with the same
+    SHA-256. Duplicates are not extracted; they share their original's
+    result (see _iter_extractions). Returns the number of duplicates.
+    """
+    first = {}
+    for document in earlier:
+        first.setdefault(document.sha256, document)
+    duplicates = 0
+    for document in documents:
+        original = first.setdefault(document.sha256, document)
+        document.duplicate_of = original.name if original is not document else None
+        duplicates += document.duplicate_of is not None
+    return duplicates
+
+def parse_documents(uploaded_files):
+    """
+    Wrap uploads as ParsedDocument instances for validation and extraction
+    
+    Files whose content is already in the extraction cache are marked as
+    known valid so validation does not need to open them at all.
+    """
+    documents = [parse_document(f) for f in uploaded_files]
+    if _cache_enabled():
+        for document in documents:
+            if not document.is_parsed:
+                document.known_valid = _extraction_cache.has_cached_extraction(document.sha256, EXTRACTOR_VERSION)
+    return documents
+
+def warm_document(document, doc_type, stop=None):
+    """
+    Extract the pages doc_type's first text attempt reads into the document's page cache
+    
+    Stops between pages once the stop event is set. Returns False if it did.
+    """
+    if document.error or _is_cached(document, doc_type):
+        return True  # unreadable anyway, or answered from the extraction cache
+    backends = route_backends(document, doc_type)
+    if not backends:
+        return True
+    strategy, limit = get_page_strategy(doc_type)
+    for _ in document.iter_page_texts(strategy, limit, backends[0]):
+        if stop is not None and stop.is_set():
+            return False
+    return True
+
+class BackgroundParser:
+    """
+    Speculatively extracts page text for uploaded documents on a background thread
+    
+    Started while the user is still choosing options, so that by the time
+    extraction starts only the regex extractors are left for warmed files.
+    Each file is warmed on a private copy whose page text is handed over
+    once it is done, so stop() can give up on a page that hangs: the thread
+    is abandoned and never touches the documents again.
+    """
+    
+    def __init__(self, documents, doc_type):
+        self.doc_type = doc_type
+        self.documents = list(documents)
+        self.total = len(documents)
+        self.done = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self._thread = threading.Thread(target=self._run, name="background-parser", daemon=True)
+        self._thread.start()
+    
+    @property
+    def finished(self):
+        return not self._thread.is_alive()
+    
+    def stop(self, timeout=None):
+        """
+        Stop after the page being read, waiting at most timeout seconds
+        (PROCESSING_CONFIG['warm_stop_timeout'] by default) for the thread
         
-        return '_'.join(parts) + '.pdf'
+        Returns False if the thread was still busy and has been abandoned.
+        """
+        if timeout is None:
+            timeout = PROCESSING_CONFIG.get('warm_stop_timeout', 5)
+        self._stop.set()
+        self._thread.join(timeout)
+        with self._lock:
+            self._abandoned = self._thread.is_alive()
+        if self._abandoned:
+            print(f"Warning: background parsing did not stop within {timeout}s; abandoning it")
+        return not self._abandoned
+    
+    def _run(self):
+        for document in self.documents:
+            if self._stop.is_set():
+                return
+            try:
+                if document.error or document.is_parsed or _is_cached(document, self.doc_type):
+                    self.done += 1
+                    continue
+                scratch = document.fresh_copy()
+                finished = warm_document(scratch, self.doc_type, self._stop)
+                with self._lock:
+                    if self._abandoned:
+                        return
+                    document._adopt(scratch)
+                if not finished:
+                    return
+            except Exception as e:
+                print(f"Warning: background parsing of {document.name} failed: {e}")
+            self.done += 1
 
-def extract_pdf_text(uploaded_file):
-    """Extract text from uploaded PDF file"""
+def _iter_extractions(documents, doc_type, parallel=None, max_workers=None, progress_callback=None):
+    """
+    Yield (index, extracted data) for every document as it finishes, serially or on worker processes
+    
+    Failed or empty results are held back and yielded after the retry stage
+    (PROCESSING_CONFIG['retry_failed']) has had a go at them.
+    
+    Duplicates (see mark_duplicates) are yielded with a copy of their
+    original's result as soon as it finishes; one whose original is not in
+    documents is extracted itself. Either way it is flagged in DUPLICATE_FIELD.
+    """
+    if not any(document.duplicate_of for document in documents):
+        yield from _iter_with_retry(documents, doc_type, parallel, max_workers, progress_callback)
+        return
+    
+    # Only the first document with each content is extracted
+    first = {}
+    copies = {}
+    for i, document in enumerate(documents):
+        if document.sha256 in first:
+            copies.setdefault(first[document.sha256], []).append(i)
+        else:
+            first[document.sha256] = i
+    extract = list(first.values())
+    
+    for position, extracted_data in _iter_with_retry([documents[i] for i in extract], doc_type, parallel,
+                                                     max_workers, progress_callback):
+        index = extract[position]
+        yield index, _flag_duplicate(extracted_data, documents[index])
+        for i in copies.get(index, ()):
+            yield i, _flag_duplicate(extracted_data, documents[i])
+
+def _iter_with_retry(documents, doc_type, parallel=None, max_workers=None, progress_callback=None):
+    retry = PROCESSING_CONFIG.get('retry_failed', True)
+    failed = []
+    for index, extracted_data in _iter_first_pass(documents, doc_type, parallel, max_workers, progress_callback):
+        if retry and _needs_retry(extracted_data):
+            failed.append((index, extracted_data))
+            continue
+        yield index, extracted_data
+    if failed:
+        yield from _retry_failed(documents, doc_type, failed, parallel, max_workers)
+
+def _flag_duplicate(extracted_data, document):
+    """A duplicate's own copy of a result, naming it and the file it repeats"""
+    if not document.duplicate_of:
+        return extracted_data
+    data = dict(extracted_data)
+    data['filename'] = document.name
+    data[DUPLICATE_FIELD] = document.duplicate_of
+    return data
+
+def _iter_first_pass(documents, doc_type, parallel=None, max_workers=None, progress_callback=None):
+    # Long documents are split into page shards, so even one file can fill the pool
+    use_pool, max_workers = _resolve_parallel(parallel, max_workers, _count_work_units(documents, doc_type))
+    if use_pool:
+        yield from iter_documents_parallel(documents, doc_type, max_workers, progress_callback)
+        return
+    if _limits_enabled():
+        # Limits can only be enforced in a separate process, so isolate even serial runs
+        yield from iter_documents_parallel(documents, doc_type, 1, progress_callback)
+        return
+    
+    for done, i in enumerate(_schedule(documents, doc_type)):
+        document = documents[i]
+        if progress_callback:
+            progress_callback(done / len(documents), f"Processing {document.name}")
+        yield i, _timed_extraction(document, doc_type)
+
+def _retry_failed(documents, doc_type, failed, parallel=None, max_workers=None):
+    """
+    Retry stage: run retry_extraction on the failed results only
+    
+    Runs on workers under the per-file limits like the first pass. Yields
+    (index, extracted data), keeping the original failure when no strategy
+    recovers the file.
+    """
+    originals = dict(failed)
+    
+    def finish(index, payload):
+        extracted_data, attempts = payload
+        _record_retries(attempts)
+        if extracted_data is None:
+            return originals[index]
+        _store_cached_extraction(documents[index], doc_type, extracted_data)
+        return extracted_data
+    
+    use_pool, max_workers = _resolve_parallel(parallel, max_workers, len(failed))
+    if not use_pool and not _limits_enabled():
+        for index, _ in failed:
+            yield index, finish(index, retry_extraction(documents[index], doc_type))
+        return
+    
+    jobs = [((index, None), _retry_spooled_pdf, (documents[index].spool(), documents[index].name, doc_type))
+            for index, _ in failed]
+    supervised = _run_supervised(jobs, max_workers if use_pool else 1,
+                                 PROCESSING_CONFIG.get('file_timeout'), PROCESSING_CONFIG.get('file_memory_limit'))
     try:
-        pdf_text = ""
-        with pdfplumber.open(io.BytesIO(uploaded_file.read())) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    pdf_text += page_text + "\n"
-        return pdf_text.strip()
-    except Exception as e:
-        print(f"Error extracting PDF text: {str(e)}")
-        return None
+        for (index, _), status, payload, _, _ in supervised:
+            if status == 'ok':
+                yield index, finish(index, payload)
+            else:
+                print(f"Warning: retry of {documents[index].name} ended with {status}")
+                yield index, originals[index]
+    finally:
+        supervised.close()
 
-def process_single_pdf(uploaded_file, doc_type):
-    """Process a single PDF file and extract data"""
+def _timed_extraction(document, doc_type):
+    """process_single_pdf in this process, recording the time taken on the document"""
+    started = time.monotonic()
+    extracted_data = process_single_pdf(document, doc_type)
+    document.processing_time = time.monotonic() - started
+    return extracted_data
+
+def _trailer_page_count(document):
+    """Page count from the catalog's /Pages /Count, without opening any page (None if unreadable)"""
     try:
-        # Extract text from PDF
-        with pdfplumber.open(io.BytesIO(uploaded_file.read())) as pdf:
-            texts = [page.extract_text() for page in pdf.pages if page.extract_text()]
-            full_text = "\n".join(texts)
-        
-        # Extract data based on document type
-        if doc_type == "SKTT":
-            extracted_data = extract_sktt(full_text)
-        elif doc_type == "EVLN":
-            extracted_data = extract_evln(full_text)
-        elif doc_type == "ITAS":
-            extracted_data = extract_itas(full_text)
-        elif doc_type == "ITK":
-            extracted_data = extract_itk(full_text)
-        elif doc_type == "Notifikasi" or doc_type == "NOTIFICATION":
-            extracted_data = extract_notifikasi(full_text)
-        elif doc_type == "DKPTKA":
-            extracted_data = extract_dkptka_info(full_text)
-        else:
-            # Use generic extractor if available
+        _increment_parse_count()
+        with document.open_stream() as stream:
+            catalog = PDFDocument(PDFParser(stream)).catalog
+            return int(resolve1(resolve1(catalog['Pages'])['Count']))
+    except Exception:
+        return None
+
+def _estimate_cost(document, doc_type):
+    """Sort key estimating a document's extraction cost: (targeted pages, bytes)"""
+    if _is_cached(document, doc_type):
+        return 0, 0  # answered from the extraction cache
+    page_count = document._page_count if document._page_count is not None else _trailer_page_count(document)
+    strategy, limit = get_page_strategy(doc_type)
+    return len(select_page_indices(page_count or 1, strategy, limit)), document.size
+
+def _schedule(documents, doc_type):
+    """
+    Order to extract documents in: shortest job first (see _estimate_cost)
+    when PROCESSING_CONFIG['shortest_first'] is set, else upload order
+    """
+    order = list(range(len(documents)))
+    if PROCESSING_CONFIG.get('shortest_first', True) and len(documents) > 1:
+        costs = [_estimate_cost(document, doc_type) for document in documents]
+        order.sort(key=lambda i: costs[i])
+    return order
+
+def _median_latency(durations, workers):
+    """Median time until each job finishes when run in the given order on `workers` workers"""
+    free_at = [0.0] * max(1, workers)
+    finished = []
+    for duration in durations:
+        start = heapq.heappop(free_at)
+        heapq.heappush(free_at, start + duration)
+        finished.append(start + duration)
+    return statistics.median(finished) if finished else 0.0
+
+def _extract_all(documents, doc_type, parallel=None, max_workers=None, progress_callback=None):
+    """Extract data for every document, serially or on worker processes, in batch order"""
+    results = [None] * len(documents)
+    for index, extracted_data in _iter_extractions(documents, doc_type, parallel, max_workers, progress_callback):
+        results[index] = extracted_data
+    return results
+
+def _iter_resumable(documents, doc_type, checkpoint=None, offset=0, parallel=None, max_workers=None,
+                    progress_callback=None):
+    """
+    _iter_extractions for a checkpointed batch: documents the checkpoint already
+    has come first, straight from it, and only the rest are extracted
+    
+    offset is the batch position of documents[0].
+    """
+    if checkpoint is None:
+        yield from _iter_extractions(documents, doc_type, parallel, max_workers, progress_callback)
+        return
+    
+    pending = []
+    for i, document in enumerate(documents):
+        extracted_data = checkpoint.get(offset + i)
+        if extracted_data is None:
+            pending.append(i)
+            continue
+        extracted_data['filename'] = document.name
+        yield i, extracted_data
+    remaining = [documents[i] for i in pending]
+    for position, extracted_data in _iter_extractions(remaining, doc_type, parallel, max_workers, progress_callback):
+        yield pending[position], extracted_data
+
+def _upload_digest(uploaded_file):
+    """SHA-256 of an upload or ParsedDocument without spooling it"""
+    if isinstance(uploaded_file, ParsedDocument):
+        return uploaded_file.sha256
+    if hasattr(uploaded_file, 'getbuffer'):
+        return hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(SPOOL_CHUNK_SIZE), b''):
+        digest.update(block)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+def batch_fingerprint(uploaded_files, doc_type, use_name=True, use_passport=True, split_bulk=None, owner=None):
+    """
+    Identity of a batch: its owner (e.g. the user id), the content of its
+    files in upload order, the document type, the rename and split options
+    and the extractor version
+    
+    The same owner re-uploading the same files with the same options gets
+    the same fingerprint, which is how an interrupted batch is found again;
+    other users' batches never share it.
+    """
+    digest = hashlib.sha256()
+    for part in [EXTRACTOR_VERSION, str(owner), doc_type, str(use_name), str(use_passport),
+                 str(_split_enabled(split_bulk))]:
+        digest.update(part.encode('utf-8') + b'\0')
+    for uploaded_file in uploaded_files:
+        digest.update(_upload_digest(uploaded_file).encode('ascii'))
+    return digest.hexdigest()
+
+def _checkpoints_enabled():
+    return _checkpoint_store is not None and PROCESSING_CONFIG.get('checkpoint_batches', True)
+
+def get_checkpoint_progress(uploaded_files, doc_type, use_name=True, use_passport=True, split_bulk=None,
+                            owner=None):
+    """Number of documents an interrupted run of this batch already finished (0 if none)"""
+    if not _checkpoints_enabled() or not uploaded_files:
+        return 0
+    return _checkpoint_store.get_batch_checkpoint_progress(
+        batch_fingerprint(uploaded_files, doc_type, use_name, use_passport, split_bulk, owner)
+    )
+
+def _start_checkpoint(uploaded_files, doc_type, use_name, use_passport, split_bulk, owner, total_files):
+    """
+    A _BatchCheckpoint for this batch, or None when checkpoints are off or
+    another run (e.g. the same user in a second tab) is processing it
+    """
+    if not _checkpoints_enabled():
+        return None
+    checkpoint = _BatchCheckpoint(uploaded_files, doc_type, use_name, use_passport, split_bulk, owner, total_files)
+    if checkpoint.completed is None:
+        print(f"Warning: batch {checkpoint.batch_id[:12]} is already being processed; running it without a checkpoint")
+        return None
+    return checkpoint
+
+class _BatchCheckpoint:
+    """
+    Durable record of a batch in progress, so a re-opened batch resumes from
+    the last finished file
+    
+    Each document the writer has finished is stored by batch position
+    (after splitting, which is deterministic) with its extracted data. The
+    batch's outputs are built in a work dir under
+    PROCESSING_CONFIG['checkpoint_dir'] that outlives the session; it is
+    left in place when a run is interrupted and removed by the caller's
+    cleanup_temp_directory once the outputs have been read.
+    
+    Only one run holds a batch at a time. completed is None when another
+    run's lock on it is younger than PROCESSING_CONFIG['checkpoint_lease_seconds']
+    (a run that died without release() loses the lock after that).
+    """
+    
+    def __init__(self, uploaded_files, doc_type, use_name=True, use_passport=True, split_bulk=None,
+                 owner=None, total_files=None):
+        self.batch_id = batch_fingerprint(uploaded_files, doc_type, use_name, use_passport, split_bulk, owner)
+        self.token = uuid.uuid4().hex
+        root = str(PROCESSING_CONFIG.get('checkpoint_dir') or os.path.join(tempfile.gettempdir(), 'ldb_checkpoints'))
+        self.work_dir = os.path.join(root, self.batch_id)
+        self._prune()
+        self.completed = _checkpoint_store.start_batch_checkpoint(
+            self.batch_id, doc_type, self.work_dir,
+            len(uploaded_files) if total_files is None else total_files,
+            self.token, PROCESSING_CONFIG.get('checkpoint_lease_seconds', 600)
+        )
+        if self.completed is not None:
+            os.makedirs(self.work_dir, exist_ok=True)
+    
+    def set_total(self, total_files):
+        """Record the batch's document count once splitting has settled it"""
+        _checkpoint_store.set_batch_checkpoint_total(self.batch_id, total_files)
+    
+    def get(self, position):
+        """Extracted data finished by an earlier run, or None"""
+        entry = self.completed.get(position)
+        return dict(entry['extracted_data']) if entry and entry['extracted_data'] is not None else None
+    
+    def save(self, position, result):
+        """Record a finished document, unless it came from the checkpoint already"""
+        if position in self.completed:
+            return
+        _checkpoint_store.save_checkpoint_file(
+            self.batch_id, position, result['original_name'], result['new_name'], result['extracted_data']
+        )
+    
+    def finish(self):
+        """Forget the checkpoint once the whole batch is written"""
+        _checkpoint_store.delete_batch_checkpoint(self.batch_id)
+    
+    def release(self):
+        """Let another run resume the batch after this one stopped early"""
+        _checkpoint_store.release_batch_checkpoint(self.batch_id, self.token)
+    
+    def _prune(self):
+        """Discard batches nobody resumed within PROCESSING_CONFIG['checkpoint_max_age_days']"""
+        max_age = PROCESSING_CONFIG.get('checkpoint_max_age_days', 7)
+        for stale in _checkpoint_store.get_stale_batch_checkpoints(max_age):
+            if stale['batch_id'] == self.batch_id:
+                continue
+            _checkpoint_store.delete_batch_checkpoint(stale['batch_id'])
+            shutil.rmtree(stale['work_dir'], ignore_errors=True)
+
+class _BatchWriter:
+    """
+    Writer stage of a batch: saves renamed copies, appends them to the ZIP and
+    adds spreadsheet rows on a background thread while extraction continues
+    
+    Results arrive through a bounded queue, so a slow disk holds extraction
+    back instead of letting finished results pile up. Copies and ZIP entries
+    are written as soon as a result arrives; spreadsheet rows and the
+    returned results keep batch order.
+    
+    With keep_results=False nothing grows with the batch: files go straight
+    into the ZIP without a renamed copy, rows are only written to csv_path
+    and status_counts is kept instead of the results list.
+    
+    With a checkpoint, each document is recorded there once its copy and
+    ZIP entry are written. With a blob store registered (set_blob_store),
+    the original PDF is also stored there and each result has its file_hash.
+    """
+    
+    def __init__(self, temp_dir, use_name=True, use_passport=True, excel_path=None, zip_path=None,
+                 csv_path=None, keep_results=True, checkpoint=None):
+        self.temp_dir = temp_dir
+        self.checkpoint = checkpoint
+        self.use_name = use_name
+        self.use_passport = use_passport
+        self.excel_path = excel_path
+        self.csv_path = csv_path
+        self.keep_results = keep_results
+        self.results = []
+        self.status_counts = {}
+        self._queue = queue.Queue(maxsize=PROCESSING_CONFIG.get('writer_queue_size', 16))
+        self._ready = {}  # index -> result waiting for earlier documents
+        self._next_index = 0
+        self._error = None
+        self._zip = zipfile.ZipFile(zip_path, 'w') if zip_path else None
+        self._workbook = None
+        self._sheet = None
+        self._columns = []
+        self._csv_file = None
+        self._csv = None
+        self._csv_header = []  # columns in the CSV header written so far
+        self._csv_columns = []  # every column seen, in first-seen order
+        if csv_path:
+            self._csv_file = open(csv_path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._csv_file)
+        if excel_path:
+            from openpyxl import Workbook
+            self._workbook = Workbook()
+            self._sheet = self._workbook.active
+            self._sheet.title = "Sheet1"
+        self._thread = threading.Thread(target=self._run, name="batch-writer", daemon=True)
+        self._thread.start()
+    
+    def put(self, index, document, extracted_data, new_filename=None):
+        """Hand over one finished document; blocks while the queue is full"""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((index, document, extracted_data, new_filename))
+    
+    def flush(self):
+        """Wait until every document handed over so far has been written"""
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+    
+    def close(self, save=True):
+        """Wait for the queued writes, then finish the spreadsheet and ZIP"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._zip is not None:
+            self._zip.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+        if self._error is not None:
+            raise self._error
+        if save and self._csv is not None and len(self._csv_header) < len(self._csv_columns):
+            self._rewrite_csv_header()
+        if save and self._workbook is not None:
+            self._workbook.save(self.excel_path)
+        return self.results
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
             try:
-                extracted_data = extract_document_data(full_text, doc_type)
-            except:
-                extracted_data = {"Error": f"Unsupported document type: {doc_type}"}
-        
-        # Add filename to extracted data
-        extracted_data['filename'] = uploaded_file.name
+                if item is None:
+                    return
+                if self._error is not None:
+                    continue  # keep draining so put() never blocks forever
+                self._write(*item)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+    
+    def _write(self, index, document, extracted_data, new_filename=None):
+        if new_filename is None:
+            new_filename = generate_new_filename(extracted_data, self.use_name, self.use_passport)
+        if DUPLICATE_FIELD in extracted_data:
+            # Same content as an earlier file: its renamed copy and ZIP entry already cover this one
+            file_path = os.path.join(self.temp_dir, new_filename) if self.keep_results else None
+        elif self.keep_results:
+            file_path = os.path.join(self.temp_dir, new_filename)
+            document.save_as(file_path)
+            if self._zip is not None:
+                self._zip.write(file_path, arcname=new_filename)
+        else:
+            # No renamed copy: the ZIP member is written from the spooled upload
+            file_path = None
+            if self._zip is not None:
+                if document.path:
+                    self._zip.write(document.path, arcname=new_filename)
+                else:
+                    self._zip.writestr(new_filename, document.data)
+        if _blob_store is not None and DUPLICATE_FIELD not in extracted_data:
+            _blob_store.put(document)
         
-        return extracted_data
+        self._ready[index] = {
+            'original_name': document.name,
+            'source_name': document.source_name,
+            'new_name': new_filename,
+            'file_path': file_path,
+            'extracted_data': extracted_data,
+            'file_size': document.size,
+            'file_hash': document.sha256 if _blob_store is not None else None
+        }
+        if self.checkpoint is not None:
+            self.checkpoint.save(index, self._ready[index])
+        while self._next_index in self._ready:
+            result = self._ready.pop(self._next_index)
+            status = get_extraction_status(result['extracted_data'])
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            if self.keep_results:
+                self.results.append(result)
+            if self._sheet is not None:
+                self._append_row(result['extracted_data'])
+            if self._csv is not None:
+                self._append_csv_row(result['extracted_data'])
+            self._next_index += 1
     
-    except Exception as e:
-        return {
-            'filename': uploaded_file.name,
-            'Error': f"Failed to process PDF: {str(e)}",
-            'Jenis Dokumen': doc_type
+    def _append_csv_row(self, extracted_data):
+        """Append a CSV row; keys not in the header yet are added to it when the writer closes"""
+        if not self._csv_header:
+            self._csv_header = list(extracted_data)
+            self._csv.writerow(self._csv_header)
+        for key in extracted_data:
+            if key not in self._csv_columns:
+                self._csv_columns.append(key)
+        self._csv.writerow([_cell_value(extracted_data.get(key)) for key in self._csv_columns])
+    
+    def _rewrite_csv_header(self):
+        """Replace the CSV header with the full column list, streaming the rows through a new file"""
+        partial_path = self.csv_path + '.partial'
+        os.replace(self.csv_path, partial_path)
+        with open(partial_path, newline='', encoding='utf-8') as source, \
+                open(self.csv_path, 'w', newline='', encoding='utf-8') as target:
+            reader = csv.reader(source)
+            writer = csv.writer(target)
+            next(reader)
+            writer.writerow(self._csv_columns)
+            for row in reader:
+                writer.writerow(row + [''] * (len(self._csv_columns) - len(row)))
+        os.remove(partial_path)
+    
+    def _append_row(self, extracted_data):
+        """Append a row, adding a header cell for every key not seen before (as DataFrame.to_excel would)"""
+        from openpyxl.styles import Alignment, Border, Font, Side
+        for key in extracted_data:
+            if key not in self._columns:
+                self._columns.append(key)
+                cell = self._sheet.cell(row=1, column=len(self._columns), value=key)
+                side = Side(style='thin')
+                cell.font = Font(bold=True)
+                cell.border = Border(left=side, right=side, top=side, bottom=side)
+                cell.alignment = Alignment(horizontal='center', vertical='top')
+        self._sheet.append([_cell_value(extracted_data.get(key)) for key in self._columns])
+
+def _cell_value(value):
+    """A spreadsheet/CSV cell for an extracted value"""
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        value = str(value)
+    return value
+
+def plan_batch(uploaded_files, doc_type, rates=None, parallel=None, max_workers=None):
+    """
+    Cheap pre-flight look at a batch before anything is extracted
+    
+    Page counts come from the PDF catalog, or from the structure validation
+    already loaded; no page text is read. rates are historical seconds per
+    file by text layer (DatabaseManager.get_processing_rates); without any,
+    eta is None.
+    
+    Duplicates (same content as an earlier file) count towards files and
+    pages but cost nothing.
+    
+    Returns:
+        dict: files, pages, targeted_pages, cached, scanned, duplicates, ocr_available,
+              mode ('serial', 'parallel' or 'chunked'), workers and eta (seconds)
+    """
+    documents = [parse_document(f) for f in uploaded_files]
+    seen = set()
+    strategy, limit = get_page_strategy(doc_type)
+    shard_threshold = PROCESSING_CONFIG.get('page_shard_threshold')
+    pages_per_shard = max(1, PROCESSING_CONFIG.get('pages_per_shard', 10))
+    rates = rates or {}
+    fallback = rates.get('digital') or next(iter(rates.values()), None)
+    
+    pages = targeted_pages = cached = scanned = duplicates = work_units = 0
+    eta = 0.0 if fallback else None
+    for document in documents:
+        page_count = document._page_count if document._page_count is not None else _trailer_page_count(document)
+        targeted = len(select_page_indices(page_count or 0, strategy, limit))
+        pages += page_count or 0
+        targeted_pages += targeted
+        if document.sha256 in seen:
+            duplicates += 1
+            continue
+        seen.add(document.sha256)
+        if _is_cached(document, doc_type):
+            cached += 1
+            work_units += 1
+            continue
+        # Long documents run as page shards (see _plan_shards)
+        if shard_threshold and targeted >= shard_threshold:
+            work_units += -(-targeted // pages_per_shard)
+        else:
+            work_units += 1
+        # The text layer is only known for files validation has already opened
+        layer = document.text_layer if document._page_count is not None else None
+        if layer in ('scanned', 'mixed'):
+            scanned += 1
+        if eta is not None:
+            eta += (rates.get(layer or 'digital') or fallback)['seconds_per_file']
+    
+    use_pool, workers = _resolve_parallel(parallel, max_workers, max(1, work_units))
+    if len(documents) > PROCESSING_CONFIG.get('chunk_threshold', 500):
+        mode = 'chunked'
+    else:
+        mode = 'parallel' if use_pool else 'serial'
+    
+    return {
+        'files': len(documents),
+        'pages': pages,
+        'targeted_pages': targeted_pages,
+        'cached': cached,
+        'scanned': scanned,
+        'duplicates': duplicates,
+        'ocr_available': pytesseract is not None,
+        'mode': mode,
+        'workers': workers if use_pool else 1,
+        'eta': eta,
+    }
+
+def iter_pdfs(uploaded_files, doc_type, use_name=True, use_passport=True,
+              parallel=None, max_workers=None, split_bulk=None, owner=None, earlier=()):
+    """
+    Generator variant of process_pdfs that yields each file as soon as it is extracted
+    
+    Yields (original_name, new_name, extracted_data) in completion order, so a
+    caller can show the first rows while the rest of the batch is still running.
+    Renamed copies, the ZIP and the spreadsheet are written along the way; the
+    generator's return value (StopIteration.value) is the same tuple
+    process_pdfs returns. Closing the generator early removes the temp dir.
+    
+    With a checkpoint store registered (set_checkpoint_store), the batch is
+    built in a durable work dir instead and every finished file is recorded;
+    the same owner running the same files with the same options again
+    yields the recorded files first and only extracts the rest. An
+    interrupted run keeps its work dir for that. A batch another run is
+    still processing is run without a checkpoint.
+    
+    Files with identical content are extracted once; every later copy gets
+    the same row with DUPLICATE_FIELD naming the first one, and no renamed
+    copy or ZIP entry of its own. The same goes for a file repeating one of
+    earlier, files the caller already processed in a previous batch.
+    """
+    temp_dir = None
+    writer = None
+    extractions = None
+    checkpoint = None
+    finished = False
+    
+    try:
+        uploads = [parse_document(f) for f in uploaded_files]
+        mark_duplicates(uploads, earlier)
+        documents = split_documents(uploads, doc_type, parallel, max_workers, split_bulk)
+        checkpoint = _start_checkpoint(uploads, doc_type, use_name, use_passport, split_bulk, owner, len(documents))
+        temp_dir = checkpoint.work_dir if checkpoint is not None else tempfile.mkdtemp()
+        
+        # Renamed copies, ZIP entries and spreadsheet rows are written while
+        # the remaining files are still being extracted
+        excel_path = os.path.join(temp_dir, "Hasil_Ekstraksi.xlsx")
+        zip_path = os.path.join(temp_dir, "Renamed_Files.zip")
+        writer = _BatchWriter(temp_dir, use_name, use_passport, excel_path=excel_path, zip_path=zip_path,
+                              checkpoint=checkpoint)
+        extractions = _iter_resumable(documents, doc_type, checkpoint, 0, parallel, max_workers)
+        for index, extracted_data in extractions:
+            document = documents[index]
+            new_filename = generate_new_filename(extracted_data, use_name, use_passport)
+            writer.put(index, document, extracted_data, new_filename)
+            yield document.name, new_filename, extracted_data
+        results = writer.close()
+        writer = None
+        if checkpoint is not None:
+            checkpoint.finish()
+        
+        # Create DataFrame
+        df = pd.DataFrame([result['extracted_data'] for result in results])
+        
+        renamed_files = {
+            result['original_name']: {
+                'new_name': result['new_name'],
+                'path': result['file_path'],
+                'extracted_data': result['extracted_data'],
+                'file_hash': result['file_hash']
+            }
+            for result in results
         }
+        
+        finished = True
+        return df, excel_path, renamed_files, zip_path, temp_dir
+    
+    finally:
+        if not finished:
+            # Clean up on error or when the caller stops early
+            if extractions is not None:
+                extractions.close()
+            if writer is not None:
+                try:
+                    writer.close(save=False)
+                except Exception:
+                    pass
+            # A checkpointed batch keeps its work dir so it can be resumed
+            if checkpoint is not None:
+                checkpoint.release()
+            elif temp_dir and os.path.exists(temp_dir):
+                shutil.rmtree(temp_dir)
 
-def process_pdfs(uploaded_files, doc_type, use_name=True, use_passport=True):
+def process_pdfs(uploaded_files, doc_type, use_name=True, use_passport=True,
+                 parallel=None, max_workers=None, split_bulk=None, owner=None, earlier=()):
     """
     Process multiple PDF files and return extracted data with renamed files
     
     Args:
-        uploaded_files: List of uploaded file objects
+        uploaded_files: List of uploaded file objects or ParsedDocument instances
         doc_type: Document type (SKTT, EVLN, ITAS, ITK, Notifikasi, DKPTKA)
         use_name: Whether to use name in filename
         use_passport: Whether to use passport number in filename
+        parallel: Use a process pool (defaults to PROCESSING_CONFIG['parallel'])
+        max_workers: Number of worker processes (defaults to CPU count)
+        split_bulk: Split bulk scans into their documents (defaults to PROCESSING_CONFIG['split_documents'])
+        owner: Who runs the batch (e.g. the user id); checkpoints are kept per owner
+        earlier: Documents processed before; files repeating one are flagged as duplicates
     
     Returns:
         tuple: (dataframe, excel_path, renamed_files_dict, zip_path, temp_dir)
     """
-    all_data = []
-    renamed_files = {}
+    stream = iter_pdfs(uploaded_files, doc_type, use_name, use_passport, parallel, max_workers, split_bulk, owner,
+                       earlier)
+    while True:
+        try:
+            next(stream)
+        except StopIteration as done:
+            return done.value
+
+def process_pdfs_batch(uploaded_files, doc_type, use_name=True, use_passport=True, progress_callback=None,
+                       parallel=None, max_workers=None, split_bulk=None):
+    """
+    Process multiple PDF files with progress tracking
+    
+    Files are extracted shortest job first (see _schedule); results keep
+    the original order. Each result's 'latency' is the seconds from batch
+    start until it finished, and the final progress message compares the
+    median with upload order (see get_latency_stats).
+    
+    Args:
+        uploaded_files: List of uploaded file objects or ParsedDocument instances
+        doc_type: Document type
+        use_name: Whether to use name in filename
+        use_passport: Whether to use passport number in filename
+        progress_callback: Function to call with progress updates
+        parallel: Use a process pool (defaults to PROCESSING_CONFIG['parallel'])
+        max_workers: Number of worker processes (defaults to CPU count)
+        split_bulk: Split bulk scans into their documents (defaults to PROCESSING_CONFIG['split_documents'])
+    
+    Returns:
+        tuple: (results_list, temp_dir)
+    """
     temp_dir = tempfile.mkdtemp()
+    writer = None
     
     try:
-        for uploaded_file in uploaded_files:
-            # Process single PDF
-            extracted_data = process_single_pdf(uploaded_file, doc_type)
-            all_data.append(extracted_data)
-            
-            # Generate new filename
-            new_filename = generate_new_filename(extracted_data, use_name, use_passport)
-            
-            # Save renamed file to temp directory
-            temp_file_path = os.path.join(temp_dir, new_filename)
-            with open(temp_file_path, 'wb') as f:
-                uploaded_file.seek(0)  # Reset file pointer
-                f.write(uploaded_file.read())
-            
-            renamed_files[uploaded_file.name] = {
-                'new_name': new_filename, 
-                'path': temp_file_path,
-                'extracted_data': extracted_data
-            }
-        
-        # Create DataFrame
-        df = pd.DataFrame(all_data)
+        documents = [parse_document(f) for f in uploaded_files]
+        mark_duplicates(documents)
+        documents = split_documents(documents, doc_type, parallel, max_workers, split_bulk)
         
-        # Create Excel file
-        excel_path = os.path.join(temp_dir, "Hasil_Ekstraksi.xlsx")
-        df.to_excel(excel_path, index=False, engine='openpyxl')
+        # Renamed copies are saved while the remaining files are still being extracted
+        writer = _BatchWriter(temp_dir, use_name, use_passport)
+        started = time.monotonic()
+        latencies = {}
+        for index, extracted_data in _iter_extractions(documents, doc_type, parallel, max_workers,
+                                                       progress_callback):
+            latencies[index] = time.monotonic() - started
+            writer.put(index, documents[index], extracted_data)
+        all_results = writer.close()
+        for index, result in enumerate(all_results):
+            result['latency'] = latencies[index]
         
-        # Create ZIP file with renamed PDFs
-        zip_path = os.path.join(temp_dir, "Renamed_Files.zip")
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for file_info in renamed_files.values():
-                zipf.write(file_info['path'], arcname=file_info['new_name'])
+        # Final progress update
+        if progress_callback:
+            progress_callback(1.0, "Processing complete" + _latency_summary(documents, doc_type, parallel, max_workers))
         
-        return df, excel_path, renamed_files, zip_path, temp_dir
+        return all_results, temp_dir
     
     except Exception as e:
         # Clean up on error
+        if writer is not None:
+            try:
+                writer.close(save=False)
+            except Exception:
+                pass
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
         raise e
 
-def process_pdfs_batch(uploaded_files, doc_type, use_name=True, use_passport=True, progress_callback=None):
+def get_latency_stats(documents, doc_type, parallel=None, max_workers=None):
     """
-    Process multiple PDF files with progress tracking
+    Median per-file latency of the extraction order (see _schedule) against upload order
     
-    Args:
-        uploaded_files: List of uploaded file objects
-        doc_type: Document type
-        use_name: Whether to use name in filename
-        use_passport: Whether to use passport number in filename
-        progress_callback: Function to call with progress updates
+    Both are replayed from each extracted document's processing_time on the
+    same number of workers, so the difference is down to ordering alone.
     
     Returns:
-        tuple: (results_list, temp_dir)
+        dict: {'scheduled': seconds, 'upload_order': seconds}, or None for fewer than two files
     """
-    all_results = []
-    temp_dir = tempfile.mkdtemp()
+    documents = [document for document in documents if document.processing_time is not None]
+    if len(documents) < 2:
+        return None
+    durations = [document.processing_time for document in documents]
+    use_pool, workers = _resolve_parallel(parallel, max_workers, _count_work_units(documents, doc_type))
+    workers = workers if use_pool else 1
+    order = _schedule(documents, doc_type)
+    return {
+        'scheduled': _median_latency([durations[i] for i in order], workers),
+        'upload_order': _median_latency(durations, workers),
+    }
+
+def _latency_summary(documents, doc_type, parallel=None, max_workers=None):
+    stats = get_latency_stats(documents, doc_type, parallel, max_workers)
+    if stats is None:
+        return ""
+    return f": median latency {stats['scheduled']:.2f}s ({stats['upload_order']:.2f}s in upload order)"
+
+def process_pdfs_chunked(uploaded_files, doc_type, use_name=True, use_passport=True, chunk_size=None,
+                         progress_callback=None, parallel=None, max_workers=None, split_bulk=None, owner=None):
+    """
+    Process a very large batch in chunks with memory that stays flat as the batch grows
+    
+    chunk_size files (PROCESSING_CONFIG['chunk_size']) are extracted at a
+    time. Rows go to a CSV and files into the ZIP as they finish, and each
+    chunk's page text is released before the next one starts, so neither
+    results nor renamed copies are held for the whole batch.
+    
+    Batches are checkpointed and resumed as in iter_pdfs. Uploads are hashed
+    up front; a duplicate of a file in an earlier chunk is extracted again
+    but, like every duplicate, flagged and left out of the ZIP.
+    
+    Returns:
+        tuple: (csv_path, zip_path, status_counts, temp_dir)
+    """
+    chunk_size = chunk_size or PROCESSING_CONFIG.get('chunk_size', 200)
+    uploaded_files = list(uploaded_files)
+    temp_dir = None
+    writer = None
+    checkpoint = None
     
     try:
-        total_files = len(uploaded_files)
+        checkpoint = _start_checkpoint(uploaded_files, doc_type, use_name, use_passport, split_bulk, owner,
+                                       len(uploaded_files))
+        temp_dir = checkpoint.work_dir if checkpoint is not None else tempfile.mkdtemp()
+        csv_path = os.path.join(temp_dir, "Hasil_Ekstraksi.csv")
+        zip_path = os.path.join(temp_dir, "Renamed_Files.zip")
+        writer = _BatchWriter(temp_dir, use_name, use_passport, zip_path=zip_path, csv_path=csv_path,
+                              keep_results=False, checkpoint=checkpoint)
         
-        for i, uploaded_file in enumerate(uploaded_files):
-            # Update progress
+        # Uploads are hashed up front so duplicates are found across chunks
+        digests = [_upload_digest(f) for f in uploaded_files]
+        first_name = {}
+        for uploaded_file, digest in zip(uploaded_files, digests):
+            first_name.setdefault(digest, getattr(uploaded_file, 'name', 'unknown.pdf'))
+        seen = set()
+        
+        next_index = 0
+        for start in range(0, len(uploaded_files), chunk_size):
             if progress_callback:
-                progress_callback(i / total_files, f"Processing {uploaded_file.name}")
-            
-            # Process single PDF
-            extracted_data = process_single_pdf(uploaded_file, doc_type)
-            
-            # Generate new filename
-            new_filename = generate_new_filename(extracted_data, use_name, use_passport)
-            
-            # Save renamed file
-            temp_file_path = os.path.join(temp_dir, new_filename)
-            with open(temp_file_path, 'wb') as f:
-                uploaded_file.seek(0)
-                f.write(uploaded_file.read())
+                progress_callback(start / len(uploaded_files),
+                                  f"Processing files {start + 1}-{min(start + chunk_size, len(uploaded_files))}"
+                                  f" of {len(uploaded_files)}")
+            documents = [parse_document(f) for f in uploaded_files[start:start + chunk_size]]
+            for document, digest in zip(documents, digests[start:start + chunk_size]):
+                document.duplicate_of = first_name[digest] if digest in seen else None
+                seen.add(digest)
+            segments = split_documents(documents, doc_type, parallel, max_workers, split_bulk)
+            for index, extracted_data in _iter_resumable(segments, doc_type, checkpoint, next_index,
+                                                         parallel, max_workers):
+                writer.put(next_index + index, segments[index], extracted_data)
+            next_index += len(segments)
+            if checkpoint is not None and len(segments) != len(documents):
+                # Later chunks are not split yet; count them as one document per file for now
+                checkpoint.set_total(next_index + len(uploaded_files) - start - len(documents))
             
-            result = {
-                'original_name': uploaded_file.name,
-                'new_name': new_filename,
-                'file_path': temp_file_path,
-                'extracted_data': extracted_data,
-                'file_size': uploaded_file.size
-            }
-            
-            all_results.append(result)
+            # Segments must be in the ZIP before their spool files go away
+            writer.flush()
+            for document in segments:
+                if document not in documents:
+                    document.close()
+            for document in documents:
+                document.release()
+        writer.close()
+        if checkpoint is not None:
+            checkpoint.finish()
         
-        # Final progress update
         if progress_callback:
             progress_callback(1.0, "Processing complete")
         
-        return all_results, temp_dir
+        return csv_path, zip_path, writer.status_counts, temp_dir
     
     except Exception as e:
-        # Clean up on error
-        if os.path.exists(temp_dir):
+        # Clean up on error; a checkpointed batch keeps its work dir so it can be resumed
+        if writer is not None:
+            try:
+                writer.close(save=False)
+            except Exception:
+                pass
+        if checkpoint is not None:
+            checkpoint.release()
+        elif temp_dir and os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
         raise e
 
+def append_batch_outputs(excel_data, zip_data, df, zip_path):
+    """
+    Add a later batch to an earlier batch's Excel and ZIP without rebuilding them
+    
+    Rows of df are appended to the workbook (new columns get a header cell)
+    and the members of the ZIP at zip_path are copied into the earlier ZIP,
+    so files that were already processed are not read or compressed again.
+    
+    Returns:
+        tuple: (excel_data, zip_data) as bytes
+    """
+    from openpyxl import load_workbook
+    from openpyxl.styles import Alignment, Border, Font, Side
+    
+    workbook = load_workbook(io.BytesIO(excel_data))
+    sheet = workbook.active
+    columns = [cell.value for cell in sheet[1] if cell.value is not None]
+    for key in df.columns:
+        if key not in columns:
+            columns.append(key)
+            cell = sheet.cell(row=1, column=len(columns), value=key)
+            side = Side(style='thin')
+            cell.font = Font(bold=True)
+            cell.border = Border(left=side, right=side, top=side, bottom=side)
+            cell.alignment = Alignment(horizontal='center', vertical='top')
+    for row in df.to_dict('records'):
+        sheet.append([None if key not in row or _is_missing(row[key]) else _cell_value(row[key])
+                      for key in columns])
+    excel_buffer = io.BytesIO()
+    workbook.save(excel_buffer)
+    
+    zip_buffer = io.BytesIO(zip_data)
+    with zipfile.ZipFile(zip_buffer, 'a') as target, zipfile.ZipFile(zip_path) as source:
+        for info in source.infolist():
+            target.writestr(info, source.read(info))
+    
+    return excel_buffer.getvalue(), zip_buffer.getvalue()
+
+def _is_missing(value):
+    """True for the NaN pandas puts in columns a row does not have"""
+    return value is None or (isinstance(value, float) and pd.isna(value))
+
+def row_data(row):
+    """
+    A result DataFrame row as a JSON-safe dict for logging
+    
+    pandas fills columns a row does not have with NaN, which json.dumps
+    writes as an invalid NaN token; those cells become None, and numpy
+    scalars become plain Python values.
+    """
+    return {key: None if _is_missing(value) else (value.item() if hasattr(value, 'item') else value)
+            for key, value in row.items()}
+
 def create_excel_from_results(results, output_path=None):
     """Create Excel file from extraction results"""
     try:
@@ -278,23 +2741,87 @@ def validate_pdf_file(uploaded_file):
         if not uploaded_file.name.lower().endswith('.pdf'):
             return False, "File must be a PDF"
         
-        # Check file size (50MB limit)
-        max_size = 50 * 1024 * 1024  # 50MB
+        # Check file size
+        max_size = APP_CONFIG.get('max_file_size', 500 * 1024 * 1024)
         if uploaded_file.size > max_size:
-            return False, f"File size exceeds 50MB limit (current: {uploaded_file.size / (1024*1024):.1f}MB)"
+            return False, f"File size exceeds {max_size // (1024*1024)}MB limit (current: {uploaded_file.size / (1024*1024):.1f}MB)"
         
-        # Try to open with pdfplumber
-        uploaded_file.seek(0)
-        with pdfplumber.open(io.BytesIO(uploaded_file.read())) as pdf:
-            if len(pdf.pages) == 0:
-                return False, "PDF file appears to be empty"
+        # Parse once; the result is reused by extraction when a ParsedDocument is passed
+        document = parse_document(uploaded_file)
+        if document.known_valid:
+            return True, "Valid PDF file"
+        if document.error:
+            return False, f"Invalid PDF file: {document.error}"
+        if document.page_count == 0:
+            return False, "PDF file appears to be empty"
         
-        uploaded_file.seek(0)  # Reset file pointer
         return True, "Valid PDF file"
     
     except Exception as e:
         return False, f"Invalid PDF file: {str(e)}"
 
+def benchmark_backends(sample_files, doc_type, backends=None):
+    """
+    Measure each text backend on a sample corpus for one document type
+    
+    Every sample is extracted from scratch (all pages) with each backend.
+    Field matches are counted against the pdfplumber result, which is the
+    output the extractors were written for, so a backend is a safe choice
+    for a document type when its field match rate stays at 100%.
+    
+    Args:
+        sample_files: List of uploaded file objects or ParsedDocument instances
+        doc_type: Document type whose extractor is run on the text
+        backends: Backend names to measure (defaults to all registered backends)
+    
+    Returns:
+        list: One dict per backend with throughput and accuracy figures
+    """
+    samples = [parse_document(f) for f in sample_files]
+    backends = backends or list(TEXT_BACKENDS)
+    reference = [run_extractor(s.fresh_copy().text, doc_type) for s in samples]
+    
+    report = []
+    for backend in backends:
+        pages = 0
+        elapsed = 0.0
+        compared = 0
+        matched = 0
+        complete = 0
+        failed = 0
+        
+        for sample, expected in zip(samples, reference):
+            document = sample.fresh_copy()
+            start = time.perf_counter()
+            try:
+                text = document.pages_text('all', None, backend)
+            except Exception:
+                failed += 1
+                continue
+            elapsed += time.perf_counter() - start
+            pages += document.page_count
+            
+            extracted = run_extractor(text, doc_type)
+            for key, value in expected.items():
+                if value and key != 'Jenis Dokumen':
+                    compared += 1
+                    matched += extracted.get(key) == value
+            if not missing_required_fields(extracted, doc_type):
+                complete += 1
+        
+        report.append({
+            'backend': backend,
+            'files': len(samples),
+            'failed': failed,
+            'pages': pages,
+            'seconds': round(elapsed, 3),
+            'pages_per_sec': round(pages / elapsed, 1) if elapsed else 0.0,
+            'field_match_rate': round(matched / compared * 100, 1) if compared else 0.0,
+            'required_fields_rate': round(complete / len(samples) * 100, 1) if samples else 0.0,
+        })
+    
+    return report
+
 # Legacy compatibility functions
 def extract_text_from_pdf(uploaded_file):
     """Legacy function for backward compatibility"""
@@ -303,3 +2830,35 @@ def extract_text_from_pdf(uploaded_file):
 def process_documents(uploaded_files, document_type, use_name_in_filename=True, use_passport_in_filename=True):
     """Legacy function for backward compatibility"""
     return process_pdfs(uploaded_files, document_type, use_name_in_filename, use_passport_in_filename)
+
+if __name__ == "__main__":
+    # Benchmark mode: python file_handler.py ITAS samples/*.pdf
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark text extraction backends on sample PDFs")
+    parser.add_argument("doc_type", help="Document type (SKTT, EVLN, ITAS, ITK, Notifikasi, DKPTKA)")
+    parser.add_argument("files", nargs="+", help="Sample PDF files")
+    parser.add_argument("--backend", action="append", dest="backends", help="Backend to measure (repeatable)")
+    parser.add_argument("--memory", action="store_true", help="Report each file's peak memory instead")
+    parser.add_argument("--budget", type=float, help="With --memory, flag files above this many MB")
+    args = parser.parse_args()
+    
+    samples = [ParsedDocument(os.path.basename(path), path=path) for path in args.files]
+    
+    if args.memory:
+        # One isolated worker per file so each peak is measured on its own
+        results = process_documents_parallel(samples, args.doc_type, max_workers=1)
+        print(f"{'File':<40}{'Pages':>8}{'Peak MB':>10}  Status")
+        for document, extracted_data in zip(samples, results):
+            peak = document.peak_memory
+            peak_mb = f"{peak / (1024 * 1024):.1f}" if peak is not None else "-"
+            status = get_extraction_status(extracted_data)
+            if args.budget and peak is not None and peak > args.budget * 1024 * 1024:
+                status += " (over budget)"
+            print(f"{document.name:<40}{document.page_count:>8}{peak_mb:>10}  {status}")
+        raise SystemExit(0)
+    
+    print(f"{'Backend':<12}{'Pages/s':>10}{'Field match':>14}{'Required OK':>14}{'Failed':>8}")
+    for row in benchmark_backends(samples, args.doc_type, args.backends):
+        print(f"{row['backend']:<12}{row['pages_per_sec']:>10}{row['field_match_rate']:>13}%"
+              f"{row['required_fields_rate']:>13}%{row['failed']:>8}")
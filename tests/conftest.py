@@ -0,0 +1,108 @@
+"""
+Shared fixtures for the LDB test suite
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ITAS_LINES = [
+    "REPUBLIC OF INDONESIA",
+    "PERSON {letter}",
+    "PERMIT NUMBER : 2C11AB{n:04d}-X",
+    "STAY PERMIT EXPIRY : 01/02/2026",
+    "Place / Date of Birth : LONDON / 01-01-1980",
+    "Passport Number : P{n:07d}",
+    "Passport Expiry : 01-01-2030",
+    "Nationality : BRITISH",
+    "Gender : MALE",
+    "Address : JL MERDEKA 1",
+    "Occupation : ENGINEER",
+    "Guarantor : PT ABC",
+    "Jakarta, 12 March 2024",
+]
+
+NOTIFIKASI_PAGES = [
+    [
+        "KEPUTUSAN MENTERI",
+        "NOMOR KEP.123/2024",
+        "Nama TKA : JANE ROE",
+        "Kewarganegaraan : BRITISH",
+        "Nomor Paspor : X9988776",
+        "Jabatan : ENGINEER",
+    ],
+    [
+        "Berlaku : 01-01-2024 s.d. 31-12-2024",
+        "Ditetapkan di Jakarta",
+        "Pada tanggal : 05 Januari 2024",
+    ],
+]
+
+class Upload(io.BytesIO):
+    """Stand-in for a Streamlit UploadedFile"""
+    
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.type = "application/pdf"
+
+@pytest.fixture
+def make_pdf():
+    """Build a PDF with one page per list of text lines"""
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    
+    def build(pages):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer)
+        for lines in pages:
+            y = 800
+            for line in lines:
+                pdf.drawString(50, y, line)
+                y -= 15
+            pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+    
+    return build
+
+@pytest.fixture
+def itas_uploads(make_pdf):
+    """n single-page ITAS uploads with distinct names and passport numbers"""
+    def build(n, pages=1):
+        uploads = []
+        for i in range(n):
+            lines = [line.format(letter=chr(65 + i % 26), n=i) for line in ITAS_LINES]
+            uploads.append(Upload(make_pdf([lines] * pages), f"itas_{i}.pdf"))
+        return uploads
+    
+    return build
+
+@pytest.fixture(autouse=True)
+def isolated_file_handler(monkeypatch, tmp_path):
+    """Keep database hooks off and spool files in a per-test directory"""
+    import file_handler
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'spool_dir', str(tmp_path))
+    for hook in ('_extraction_cache', '_template_log', '_retry_log', '_checkpoint_store', '_blob_store'):
+        monkeypatch.setattr(file_handler, hook, None)
+    file_handler.reset_parse_count()
+    file_handler.reset_retry_stats()
+    return file_handler
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", default=False, help="also run the long-running batch tests")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long-running batch tests (skipped unless --runslow is given)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test; pass --runslow to run it")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
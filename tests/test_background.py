@@ -0,0 +1,40 @@
+"""
+Tests for background parsing of uploads while options are chosen
+"""
+
+import threading
+
+import file_handler
+from file_handler import BackgroundParser, iter_documents_parallel, parse_documents, get_parse_count
+
+def test_warmed_documents_are_extracted_on_workers(itas_uploads):
+    documents = parse_documents(itas_uploads(2))
+    parser = BackgroundParser(documents, 'ITAS')
+    parser._thread.join(30)
+    assert parser.finished and parser.stop()
+    assert all(document.is_parsed for document in documents)
+    
+    results = dict(iter_documents_parallel(documents, 'ITAS', max_workers=1))
+    
+    assert [results[i]['Passport Number'] for i in range(2)] == ["P0000000", "P0000001"]
+    # Only a worker reports peak memory; with the warm structure and text it
+    # opens nothing, so the two opens per file are both the background parser's
+    assert all(document.peak_memory is not None for document in documents)
+    assert get_parse_count() == 4
+
+def test_stop_abandons_a_hung_page(monkeypatch, itas_uploads):
+    release = threading.Event()
+    
+    def hang(document, doc_type, stop=None):
+        release.wait(10)
+        return True
+    
+    monkeypatch.setattr(file_handler, 'warm_document', hang)
+    documents = parse_documents(itas_uploads(1))
+    parser = BackgroundParser(documents, 'ITAS')
+    
+    assert parser.stop(timeout=0.1) is False
+    release.set()
+    parser._thread.join(10)
+    # The abandoned thread never hands its copy over
+    assert not documents[0].is_parsed
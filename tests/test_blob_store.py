@@ -0,0 +1,49 @@
+"""
+Tests for the content-addressed store of original PDFs
+"""
+
+import os
+import time
+
+from blob_store import BlobStore
+from database.models import DatabaseManager
+from file_handler import parse_documents
+
+def test_files_are_stored_once_by_content(tmp_path, itas_uploads):
+    store = BlobStore(DatabaseManager(str(tmp_path / "ldb.db")), root=tmp_path / "blobs")
+    [upload] = itas_uploads(1)
+    first, again = parse_documents([upload, upload])
+    
+    file_hash = store.put(first)
+    
+    assert store.put(again) == file_hash == first.sha256
+    path = store.get_path(file_hash)
+    assert path == os.path.join(str(tmp_path / "blobs"), file_hash[:2], file_hash[2:4], f"{file_hash}.pdf")
+    assert store.read(file_hash) == upload.getvalue()
+    assert store.get_stats() == {'blobs': 1, 'bytes': first.size, 'max_bytes': store.max_bytes}
+
+def test_least_recently_used_files_are_evicted(tmp_path, itas_uploads):
+    a, b, c = parse_documents(itas_uploads(3))
+    store = BlobStore(DatabaseManager(str(tmp_path / "ldb.db")), root=tmp_path / "blobs",
+                      max_bytes=a.size + b.size + c.size - 1)
+    for document in (a, b):
+        store.put(document)
+        time.sleep(0.01)
+    store.get_path(a.sha256)
+    time.sleep(0.01)
+    
+    store.put(c)
+    
+    # b was used least recently, since a was read after it was stored
+    assert store.get_path(b.sha256) is None
+    assert not os.path.exists(store.path_for(b.sha256))
+    assert store.read(a.sha256) == a.data and store.read(c.sha256) == c.data
+    assert store.get_stats()['blobs'] == 2
+
+def test_a_file_larger_than_the_quota_is_not_stored(tmp_path, itas_uploads):
+    [document] = parse_documents(itas_uploads(1))
+    store = BlobStore(DatabaseManager(str(tmp_path / "ldb.db")), root=tmp_path / "blobs",
+                      max_bytes=document.size - 1)
+    
+    assert store.put(document) is None
+    assert store.get_path(document.sha256) is None
@@ -0,0 +1,49 @@
+"""
+Tests for the extraction cache (DatabaseManager) and how batches use it
+"""
+
+import time
+
+import file_handler
+from database.models import DatabaseManager
+from file_handler import parse_documents, plan_batch, warm_document, EXTRACTOR_VERSION
+
+def test_cache_is_keyed_by_content_type_and_version(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ldb.db"))
+    db.cache_extraction("abc", 'ITAS', "1", {'Name': 'JANE ROE'})
+    
+    assert db.get_cached_extraction("abc", 'ITAS', "1") == {'Name': 'JANE ROE'}
+    assert db.get_cached_extraction("abc", 'ITK', "1") is None
+    assert db.get_cached_extraction("abc", 'ITAS', "2") is None
+    assert db.get_cached_extraction("abd", 'ITAS', "1") is None
+    assert db.has_cached_extraction("abc", "1") and db.has_cached_extraction("abc", "1", 'ITAS')
+    assert not db.has_cached_extraction("abc", "1", 'ITK')
+    assert not db.has_cached_extraction("abc", "2")
+    assert db.get_extraction_cache_stats()['hits'] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ldb.db"))
+    for file_hash in ("a", "b"):
+        db.cache_extraction(file_hash, 'ITAS', "1", {'Name': file_hash}, max_entries=2)
+        time.sleep(0.01)
+    db.get_cached_extraction("a", 'ITAS', "1")
+    time.sleep(0.01)
+    
+    db.cache_extraction("c", 'ITAS', "1", {'Name': "c"}, max_entries=2)
+    
+    # "b" was used least recently, since "a" was read after it was written
+    assert [db.has_cached_extraction(file_hash, "1") for file_hash in ("a", "b", "c")] == [True, False, True]
+
+def test_a_file_cached_as_another_type_is_not_treated_as_cached(monkeypatch, tmp_path, itas_uploads):
+    db = DatabaseManager(str(tmp_path / "ldb.db"))
+    monkeypatch.setattr(file_handler, '_extraction_cache', db)
+    [document] = parse_documents(itas_uploads(1))
+    db.cache_extraction(document.sha256, 'ITAS', EXTRACTOR_VERSION, {'Name': 'PERSON A'})
+    
+    [document] = parse_documents([document])
+    
+    # Validation is skipped for any cached type, but planning and warming are per type
+    assert document.known_valid
+    assert plan_batch([document], 'ITAS')['cached'] == 1
+    assert plan_batch([document], 'ITK')['cached'] == 0
+    assert warm_document(document, 'ITK') and document.is_parsed
@@ -0,0 +1,57 @@
+"""
+Tests for resumable batch checkpoints
+"""
+
+import sqlite3
+
+import pytest
+
+import file_handler
+from conftest import ITAS_LINES
+from database.models import DatabaseManager
+from file_handler import ParsedDocument, iter_pdfs, process_pdfs, cleanup_temp_directory, get_checkpoint_progress
+
+@pytest.fixture
+def db_path(monkeypatch, tmp_path):
+    path = str(tmp_path / "ldb.db")
+    monkeypatch.setattr(file_handler, '_checkpoint_store', DatabaseManager(path))
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'checkpoint_dir', str(tmp_path / "checkpoints"))
+    return path
+
+def checkpoint_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT total_files, lock_token FROM batch_checkpoints').fetchall()
+
+def test_batches_are_kept_per_owner(db_path, itas_uploads):
+    uploads = itas_uploads(2)
+    stream = iter_pdfs(uploads, 'ITAS', parallel=False, owner=1)
+    next(stream)
+    stream.close()
+    
+    assert get_checkpoint_progress(uploads, 'ITAS', owner=1) == 1
+    assert get_checkpoint_progress(uploads, 'ITAS', owner=2) == 0
+
+def test_a_running_batch_is_not_shared(db_path, itas_uploads):
+    uploads = itas_uploads(2)
+    first = iter_pdfs(uploads, 'ITAS', parallel=False, owner=1)
+    next(first)
+    
+    # The same user in a second tab: runs on its own, without touching the first run's checkpoint
+    df, _, _, zip_path, temp_dir = process_pdfs(uploads, 'ITAS', parallel=False, owner=1)
+    cleanup_temp_directory(temp_dir)
+    assert len(df) == 2
+    assert not zip_path.startswith(file_handler.PROCESSING_CONFIG['checkpoint_dir'])
+    assert get_checkpoint_progress(uploads, 'ITAS', owner=1) == 1
+    
+    first.close()
+    assert checkpoint_rows(db_path)[0][1] is None  # released for a later resume
+
+def test_total_counts_split_documents(db_path, make_pdf):
+    pages = [[line.format(letter=letter, n=n) for line in ITAS_LINES] for n, letter in enumerate("ABC")]
+    stacked = ParsedDocument("stack.pdf", make_pdf(pages))
+    
+    stream = iter_pdfs([stacked], 'ITAS', parallel=False, split_bulk=True, owner=1)
+    next(stream)
+    stream.close()
+    
+    assert checkpoint_rows(db_path)[0][0] == 3
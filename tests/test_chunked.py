@@ -0,0 +1,30 @@
+"""
+Tests for chunked processing of very large batches
+"""
+
+import pytest
+
+import file_handler
+from file_handler import process_pdfs_chunked, cleanup_temp_directory
+
+@pytest.mark.parametrize("files", [
+    600,
+    pytest.param(5000, marks=pytest.mark.slow),
+])
+def test_memory_stays_flat_as_the_batch_grows(monkeypatch, itas_uploads, files):
+    # Extract in this process so its resident memory covers the whole pipeline
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'file_timeout', None)
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'file_memory_limit', None)
+    uploads = itas_uploads(files)
+    resident = []
+    
+    csv_path, zip_path, status_counts, temp_dir = process_pdfs_chunked(
+        uploads, 'ITAS', chunk_size=100, parallel=False,
+        progress_callback=lambda fraction, message: resident.append(file_handler._resident_memory())
+    )
+    cleanup_temp_directory(temp_dir)
+    
+    assert status_counts == {'completed': files}
+    # Measured from the end of the first chunk, once parsers and caches are warm
+    growth = resident[-1] - resident[1]
+    assert growth < 16 * 1024 * 1024
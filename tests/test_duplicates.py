@@ -0,0 +1,32 @@
+"""
+Tests for uploads that repeat the content of another file
+"""
+
+import zipfile
+
+from conftest import Upload
+from file_handler import DUPLICATE_FIELD, parse_documents, process_pdfs, cleanup_temp_directory
+
+def test_a_copy_in_the_batch_gets_its_own_row(itas_uploads):
+    original = itas_uploads(1)[0]
+    copy = Upload(original.getvalue(), "copy.pdf")
+    
+    df, _, _, zip_path, temp_dir = process_pdfs([original, copy], 'ITAS', parallel=False)
+    with zipfile.ZipFile(zip_path) as archive:
+        members = archive.namelist()
+    cleanup_temp_directory(temp_dir)
+    
+    assert list(df['filename']) == ["itas_0.pdf", "copy.pdf"]
+    assert df[DUPLICATE_FIELD].iloc[1] == "itas_0.pdf"
+    assert len(members) == 1
+
+def test_a_copy_of_an_earlier_batch_gets_a_duplicate_row(itas_uploads):
+    earlier = parse_documents(itas_uploads(1))
+    copy = parse_documents([Upload(earlier[0].data, "copy.pdf")])
+    
+    df, _, _, _, temp_dir = process_pdfs(copy, 'ITAS', parallel=False, earlier=earlier)
+    cleanup_temp_directory(temp_dir)
+    
+    assert df['filename'].tolist() == ["copy.pdf"]
+    assert df[DUPLICATE_FIELD].iloc[0] == "itas_0.pdf"
+    assert df['Passport Number'].iloc[0] == "P0000000"
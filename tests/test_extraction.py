@@ -0,0 +1,33 @@
+"""
+Tests for page-by-page extraction
+"""
+
+from conftest import NOTIFIKASI_PAGES
+from extractors import IncrementalExtractor, extract_document_data
+from file_handler import ParsedDocument, process_single_pdf
+
+def test_fields_on_later_pages_are_kept(make_pdf):
+    document = ParsedDocument("notifikasi.pdf", make_pdf(NOTIFIKASI_PAGES))
+    
+    data = process_single_pdf(document, 'NOTIFICATION', use_cache=False)
+    
+    assert data["Nama TKA"] == "JANE ROE"
+    assert data["Berlaku"] == "01/01/2024 - 31/12/2024"
+    assert data["Date Issue"] == "05/01/2024"
+
+def test_incremental_extractor_reads_each_page_once():
+    texts = []
+    
+    def extract(text):
+        texts.append(text)
+        return extract_document_data(text, 'NOTIFICATION')
+    
+    pages = ["\n".join(lines) for lines in NOTIFIKASI_PAGES] + ["Lampiran"] * 20
+    extractor = IncrementalExtractor('NOTIFICATION', extract=extract)
+    for page in pages:
+        extractor.feed(page)
+    
+    # One extraction per page over at most two pages, not the whole text so far
+    assert len(texts) == len(pages)
+    assert max(len(text) for text in texts) <= len(pages[0]) + len(pages[1]) + 1
+    assert extractor.result["Date Issue"] == "05/01/2024"
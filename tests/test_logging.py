@@ -0,0 +1,55 @@
+"""
+Tests for logging extraction results to the database
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from database.models import DatabaseManager
+from file_handler import row_data
+
+def test_rows_with_missing_cells_are_logged_as_valid_json(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ldb.db"))
+    df = pd.DataFrame([
+        {'filename': 'a.pdf', 'Name': 'JANE ROE', 'Lapisan Teks': 'scanned'},
+        {'filename': 'b.pdf', 'Error': 'Failed to process PDF: broken'},
+    ])
+    
+    for _, row in df.iterrows():
+        db.log_extraction(1, row['filename'], 100, 'ITAS', row_data(row), 2.0)
+    
+    history = {entry['filename']: entry['extracted_data'] for entry in db.get_extraction_history()}
+    assert history['a.pdf']['Error'] is None
+    assert db.get_processing_rates('ITAS') == {
+        'digital': {'seconds_per_file': 2.0, 'samples': 1},
+        'scanned': {'seconds_per_file': 2.0, 'samples': 1},
+    }
+    assert db.get_dashboard_stats()['ocr_extractions'] == 1
+
+def test_rows_logged_with_nan_are_repaired(tmp_path):
+    path = str(tmp_path / "ldb.db")
+    db = DatabaseManager(path)
+    db.log_extraction(1, 'a.pdf', 100, 'ITAS', {'filename': 'a.pdf', 'Lapisan Teks': 'mixed',
+                                                 'Error': float('nan')}, 2.0)
+    # As in a database from before the repair was recorded
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM system_settings WHERE setting_key = 'migration_nan_json_repaired'")
+    
+    DatabaseManager(path)
+    
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM extraction_history WHERE json_valid(extracted_data)').fetchone() == (1,)
+    assert db.get_dashboard_stats()['ocr_extractions'] == 1
+
+def test_nan_repair_runs_once_per_database(tmp_path):
+    path = str(tmp_path / "ldb.db")
+    DatabaseManager(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO extraction_history (user_id, filename, extracted_data) VALUES (1, 'a.pdf', '{\"Error\": NaN}')")
+    
+    DatabaseManager(path)
+    
+    # Rows written since are not rescanned on every construction
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('SELECT extracted_data FROM extraction_history').fetchone() == ('{"Error": NaN}',)
@@ -0,0 +1,31 @@
+"""
+Tests that a batch opens each uploaded PDF only as often as it needs to
+"""
+
+import zipfile
+
+import pytest
+
+from file_handler import (
+    parse_documents, validate_pdf_file, process_pdfs, cleanup_temp_directory, get_parse_count
+)
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_each_upload_is_parsed_once(itas_uploads, parallel):
+    uploads = itas_uploads(4)
+    
+    documents = parse_documents(uploads)
+    assert all(validate_pdf_file(document)[0] for document in documents)
+    df, excel_path, renamed_files, zip_path, temp_dir = process_pdfs(
+        documents, 'ITAS', parallel=parallel, max_workers=2
+    )
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            names = archive.namelist()
+    finally:
+        cleanup_temp_directory(temp_dir)
+    
+    assert len(df) == 4 and len(names) == 4
+    # Two PDF opens per file: validation reads the structure and extraction the
+    # page text, which renaming and zipping then share (workers report theirs)
+    assert get_parse_count() == 8
@@ -0,0 +1,55 @@
+"""
+Tests for the retry stage that re-runs failed or empty extractions
+"""
+
+import file_handler
+from file_handler import ParsedDocument, retry_extraction, process_pdfs, cleanup_temp_directory, get_retry_stats
+
+def fake_backends(monkeypatch, succeed_on=None):
+    """Replace the retry ladder's extractions; only the (backend, strategy) in succeed_on finds anything"""
+    calls = []
+    
+    def extract(document, doc_type, backend, strategy, limit):
+        calls.append((backend, strategy))
+        return {'Name': 'JANE ROE'} if (backend, strategy) == succeed_on else {'Name': None}
+    
+    monkeypatch.setattr(file_handler, '_extract_with_backend', extract)
+    monkeypatch.setattr(file_handler, 'pytesseract', None)
+    return calls
+
+def test_retries_escalate_from_other_backends_to_all_pages(monkeypatch, itas_uploads):
+    calls = fake_backends(monkeypatch)
+    [upload] = itas_uploads(1)
+    
+    extracted_data, attempts = retry_extraction(ParsedDocument(upload.name, upload.getvalue()), 'ITAS')
+    
+    # ITAS reads pdfplumber's first page; the ladder tries the other text backends first
+    assert extracted_data is None
+    assert calls == [('pypdf2', 'first'), ('pdfminer', 'first'), ('pypdf2', 'all'), ('pdfminer', 'all')]
+    assert attempts == [('alternate_backend', False)] * 2 + [('all_pages', False)] * 2
+
+def test_retries_stop_at_the_first_usable_result(monkeypatch, itas_uploads):
+    calls = fake_backends(monkeypatch, succeed_on=('pdfminer', 'first'))
+    [upload] = itas_uploads(1)
+    
+    extracted_data, attempts = retry_extraction(ParsedDocument(upload.name, upload.getvalue()), 'ITAS')
+    
+    assert len(calls) == 2
+    assert attempts == [('alternate_backend', False), ('alternate_backend', True)]
+    assert extracted_data['Mesin Ekstraksi'] == 'pdfminer'
+    assert extracted_data['Percobaan Ulang'] == 'alternate_backend'
+
+def test_empty_results_of_a_batch_are_retried(monkeypatch, make_pdf):
+    fake_backends(monkeypatch, succeed_on=('pypdf2', 'all'))
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'file_timeout', None)
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'file_memory_limit', None)
+    document = ParsedDocument("blank.pdf", make_pdf([["NOTHING TO SEE"]]))
+    
+    df, _, _, _, temp_dir = process_pdfs([document], 'ITAS', parallel=False)
+    cleanup_temp_directory(temp_dir)
+    
+    assert list(df['Name']) == ['JANE ROE']
+    assert get_retry_stats() == {
+        'alternate_backend': {'attempts': 2, 'successes': 0},
+        'all_pages': {'attempts': 1, 'successes': 1},
+    }
@@ -0,0 +1,21 @@
+"""
+Tests for the order files are extracted in
+"""
+
+import file_handler
+from conftest import Upload
+from file_handler import iter_pdfs, get_latency_stats, parse_documents
+
+def test_small_files_are_extracted_first(monkeypatch, itas_uploads):
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'file_timeout', None)
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'file_memory_limit', None)
+    large = itas_uploads(1, pages=9)[0]
+    small = itas_uploads(3)[1:]
+    documents = parse_documents([Upload(large.getvalue(), "large.pdf")] + small)
+    
+    stream = iter_pdfs(documents, 'ITAS', parallel=False)
+    names = [original_name for original_name, _, _ in stream]
+    
+    assert names[-1] == "large.pdf"
+    latency = get_latency_stats(documents, 'ITAS', parallel=False)
+    assert latency['scheduled'] <= latency['upload_order']
@@ -0,0 +1,59 @@
+"""
+Tests for extracting long documents as page shards on separate workers
+"""
+
+import file_handler
+from conftest import NOTIFIKASI_PAGES
+from extractors import IncrementalExtractor
+from file_handler import ParsedDocument, iter_documents_parallel, _collect_shard
+
+PAGES = NOTIFIKASI_PAGES + [["Lampiran"]] * 2
+
+def page_text(document, i):
+    return document._page_texts['pdfplumber'][i]
+
+def shard_plan(shards, extractor=None):
+    return {'backend': 'pdfplumber', 'shards': shards, 'done': 0, 'ok': set(), 'fed': 0, 'extractor': extractor}
+
+def test_shards_are_fed_to_the_extractor_in_page_order(make_pdf):
+    document = ParsedDocument("notifikasi.pdf", make_pdf(PAGES))
+    texts = ["\n".join(lines) for lines in PAGES]
+    # Never complete, so every page is fed
+    extractor = IncrementalExtractor('NOTIFICATION', extract=lambda text: {})
+    plan = shard_plan([[0, 1], [2, 3]], extractor)
+    
+    assert _collect_shard(document, 'NOTIFICATION', plan, 1, 'ok', texts[2:]) is None
+    assert extractor.pages == []
+    extracted_data = _collect_shard(document, 'NOTIFICATION', plan, 0, 'ok', texts[:2])
+    
+    assert extractor.pages == texts
+    assert [page_text(document, i) for i in range(4)] == texts
+    assert extracted_data["Nama TKA"] == "JANE ROE" and extracted_data["Date Issue"] == "05/01/2024"
+
+def test_a_failed_shard_is_read_by_the_parent(make_pdf):
+    document = ParsedDocument("notifikasi.pdf", make_pdf(PAGES))
+    plan = shard_plan([[0, 1], [2, 3]])
+    
+    assert _collect_shard(document, 'NOTIFICATION', plan, 1, 'ok', ["Lampiran"] * 2) is None
+    extracted_data = _collect_shard(document, 'NOTIFICATION', plan, 0, 'error', "broken")
+    
+    assert extracted_data["Nama TKA"] == "JANE ROE" and extracted_data["Date Issue"] == "05/01/2024"
+    assert "Berlaku" in page_text(document, 1)
+
+def test_an_aborted_shard_aborts_the_document(make_pdf):
+    document = ParsedDocument("notifikasi.pdf", make_pdf(PAGES))
+    plan = shard_plan([[0, 1], [2, 3]])
+    
+    extracted_data = _collect_shard(document, 'NOTIFICATION', plan, 1, 'timeout', None)
+    
+    assert extracted_data['Error'] == 'timeout'
+
+def test_long_documents_are_split_across_workers(monkeypatch, make_pdf):
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'page_shard_threshold', 4)
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'pages_per_shard', 2)
+    document = ParsedDocument("notifikasi.pdf", make_pdf(PAGES))
+    
+    [(index, extracted_data)] = list(iter_documents_parallel([document], 'NOTIFICATION', max_workers=2))
+    
+    assert extracted_data["Nama TKA"] == "JANE ROE" and extracted_data["Date Issue"] == "05/01/2024"
+    assert [page_text(document, i) for i in range(4)] == ["\n".join(lines) for lines in PAGES]
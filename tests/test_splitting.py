@@ -0,0 +1,28 @@
+"""
+Tests for splitting bulk scans into their documents
+"""
+
+from conftest import ITAS_LINES
+from file_handler import ParsedDocument, process_pdfs, cleanup_temp_directory
+
+def pages_read(document):
+    return max((sum(text is not None for text in texts) for texts in document._page_texts.values()), default=0)
+
+def test_page_targeting_is_kept_by_default(itas_uploads):
+    documents = [ParsedDocument(upload.name, upload.getvalue()) for upload in itas_uploads(4, pages=9)]
+    
+    df, _, _, _, temp_dir = process_pdfs(documents, 'ITAS', parallel=False)
+    cleanup_temp_directory(temp_dir)
+    
+    assert len(df) == 4
+    # ITAS reads only its first page; nothing looks for document boundaries
+    assert sum(pages_read(document) for document in documents) == 4
+
+def test_bulk_scans_are_split_when_asked(make_pdf):
+    pages = [[line.format(letter=letter, n=n) for line in ITAS_LINES] for n, letter in enumerate("ABC")]
+    stacked = ParsedDocument("stack.pdf", make_pdf(pages))
+    
+    df, _, _, _, temp_dir = process_pdfs([stacked], 'ITAS', parallel=False, split_bulk=True)
+    cleanup_temp_directory(temp_dir)
+    
+    assert list(df['filename']) == ["stack_hal1.pdf", "stack_hal2.pdf", "stack_hal3.pdf"]
@@ -0,0 +1,25 @@
+"""
+Tests for page layout fingerprints
+"""
+
+import file_handler
+from database.models import DatabaseManager
+from file_handler import parse_documents, process_single_pdf
+
+def log_layouts(monkeypatch, tmp_path, documents):
+    db = DatabaseManager(str(tmp_path / "ldb.db"))
+    monkeypatch.setattr(file_handler, '_template_log', db)
+    for document in documents:
+        process_single_pdf(document, 'ITAS')
+    return db.get_unknown_templates()
+
+def test_types_without_templates_are_not_fingerprinted_by_default(monkeypatch, tmp_path, itas_uploads):
+    assert log_layouts(monkeypatch, tmp_path, parse_documents(itas_uploads(2))) == []
+
+def test_unknown_layouts_are_logged_while_onboarding(monkeypatch, tmp_path, itas_uploads):
+    monkeypatch.setitem(file_handler.PROCESSING_CONFIG, 'template_onboarding', True)
+    
+    [layout] = log_layouts(monkeypatch, tmp_path, parse_documents(itas_uploads(2)))
+    
+    assert layout['document_type'] == 'ITAS'
+    assert layout['seen_count'] == 2
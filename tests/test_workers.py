@@ -0,0 +1,56 @@
+"""
+Tests for the supervised worker processes
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from file_handler import _run_supervised
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_workers_are_not_forked_from_the_app_process():
+    jobs = [((0, None), os.getppid, ())]
+    
+    [(key, status, parent, _, _)] = list(_run_supervised(jobs, 1, timeout=30))
+    
+    assert status == 'ok'
+    assert parent != os.getpid()
+
+def test_a_worker_past_its_timeout_is_killed():
+    jobs = [((0, None), time.sleep, (30,))]
+    
+    [(key, status, payload, _, elapsed)] = list(_run_supervised(jobs, 1, timeout=0.5))
+    
+    assert key == (0, None) and status == 'timeout' and payload is None
+    assert elapsed < 10
+
+def test_a_worker_over_its_memory_limit_reports_it():
+    jobs = [((0, None), bytearray, (500 * 1024 * 1024,)), ((1, None), os.getpid, ())]
+    
+    results = _run_supervised(jobs, 2, timeout=30, memory_limit=50 * 1024 * 1024)
+    
+    assert {key: status for key, status, _, _, _ in results} == {(0, None): 'memory', (1, None): 'ok'}
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/maps'), reason="needs /proc")
+def test_fork_server_preloads_the_module_from_any_directory(tmp_path):
+    # A worker's parent is the fork server; pandas' extension modules are
+    # mapped into it only if the preload import of file_handler succeeded
+    script = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from file_handler import _run_supervised, PROCESSING_CONFIG\n"
+        "PROCESSING_CONFIG['worker_start_method'] = 'forkserver'\n"
+        "check = \"'pandas/_libs' in open('/proc/%%d/maps' %% __import__('os').getppid()).read()\"\n"
+        "[(_, status, preloaded, _, _)] = _run_supervised([((0, None), eval, (check,))], 1, timeout=60)\n"
+        "print(status, preloaded)\n"
+    ) % REPO_DIR
+    env = dict(os.environ)
+    env.pop('PYTHONPATH', None)
+    
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+    
+    assert result.stdout.split() == ['ok', 'True'], result.stderr
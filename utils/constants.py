@@ -13,7 +13,7 @@ STATUS_CODES = {
 
 # Error messages
 ERROR_MESSAGES = {
-    'FILE_TOO_LARGE': 'File terlalu besar. Maksimal 50MB.',
+    'FILE_TOO_LARGE': 'File terlalu besar. Maksimal 500MB.',
     'INVALID_FORMAT': 'Format file tidak didukung.',
     'EXTRACTION_FAILED': 'Gagal mengekstrak data dari dokumen.',
     'DATABASE_ERROR': 'Terjadi kesalahan pada database.',